@@ -6,7 +6,8 @@ from langchain_openai import ChatOpenAI
 from langgraph.checkpoint.memory import InMemorySaver
 from langgraph.graph import StateGraph, START, END
 from langgraph.prebuilt import ToolNode
-from .state import State, UserCommand, Code
+from .state import State, UserCommand
+from .tracing import traced_http_client, traced_node, traced_tool
 
 api_key = os.getenv("OPENROUTER_API_KEY")
 
@@ -16,8 +17,10 @@ llm = ChatOpenAI(
     model="gpt-4o-mini",
 )
 
+# Запросы к MCP-серверу несут traceparent текущего спана (FINAM_TRACE, см. tracing.py)
 mcp_client = MultiServerMCPClient(
-    connections={"finam_mcp": {"url": "http://finam-mcp-server:8010/sse", "transport": "sse"}}
+    connections={"finam_mcp": {"url": "http://finam-mcp-server:8010/sse", "transport": "sse",
+                               "httpx_client_factory": traced_http_client}}
 )
 
 _docs = ""
@@ -60,10 +63,8 @@ Sharpe Ratio
 Equity Curve Smoothness
 """
 
-async def code(state: State):
-    sp = "You are a python developer. You are given a discription of a pyton script that generates metrics based on a trading strategy. You need to write a python script that implements this strategy. You can only use finam api to get data. You cant talk"
-    msgs = [{"role": "system", "content": sp}] + state["messages"] + [{"role": "user", "content": f"docs: {_docs}"}]
-    return {"code": await llm.with_structured_output(Code).ainvoke(msgs)}
+# Инструменты MCP-сервера, которыми стратегический аналитик считает метрики сам, без генерации кода
+STRATEGY_TOOLS = ("backtest_strategy", "resolve_symbol", "get_indicator", "get_technical_summary")
 
 def build_graph(tools):
     gb = StateGraph(State)
@@ -72,29 +73,31 @@ def build_graph(tools):
         llm,
         tools,
     )
+    strategy_tools = [t for t in tools if t.name in STRATEGY_TOOLS]
     planner = create_chatbot(
-        "You are a manager. Your task is to create a discription of a pyton script that generates this metrics based on a trading strategy."
+        "You are a quantitative analyst. Translate the user's trading strategy into the declarative spec of the "
+        "backtest_strategy tool (entry/exit rules over candle series, indicators and constants), resolve company "
+        "names to symbols with resolve_symbol, run the backtest and explain the resulting metrics."
         + strategy_metrics,
         llm,
-        None,
+        strategy_tools,
     )
-    gb.add_node("chatbot", chatbot)
-    gb.add_node("planner", planner)
-    gb.add_node("code", code)
-    gb.add_node("router", router)
+    gb.add_node("chatbot", traced_node("chatbot", chatbot))
+    gb.add_node("planner", traced_node("planner", planner))
+    gb.add_node("router", traced_node("router", router))
     gb.add_node("tools", ToolNode(tools))
+    gb.add_node("strategy_tools", ToolNode(strategy_tools))
     gb.add_edge(START, "router")
     gb.add_conditional_edges("router", react_to_command)
     gb.add_conditional_edges("chatbot", route_tools)
     gb.add_edge("tools", "chatbot")
-    gb.add_edge("planner", "code")
-    gb.add_edge("code", END)
-    gb.add_edge("planner", END)
+    gb.add_conditional_edges("planner", route_tools, {"tools": "strategy_tools", END: END})
+    gb.add_edge("strategy_tools", "planner")
     memory = InMemorySaver()
     return gb.compile(checkpointer=memory)
 
 async def init_tools():
-    return await mcp_client.get_tools()
+    return [traced_tool(t) for t in await mcp_client.get_tools()]
 
 async def get_graph():
     global _graph, _tools
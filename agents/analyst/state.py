@@ -19,12 +19,6 @@ class UserCommand:
     command: Literal["chat", "analyze_straregy"]
 
 
-@dataclass
-class Code:
-    description: str
-    imports: str
-    code: str
-
 @dataclass
 class CodePlan:
     needed_data_from_finam: str
@@ -0,0 +1,58 @@
+"""
+Трассировка агента: запрос /process_data, узлы графа (LLM роутера, чатбота, планировщика)
+и вызовы MCP-инструментов
+
+Спаны, экспортёры и переменные окружения — общий с MCP-сервером модуль finam_tracing
+(mcp_server/finam_tracing, в образ агента копируется при сборке): FINAM_TRACE=console|file,
+FINAM_TRACE_FILE, FINAM_TRACE_SAMPLE_RATE. Запросы к MCP-серверу несут заголовок traceparent
+текущего спана, поэтому спаны сервера (инструмент, кэш, запросы к Finam) продолжают трассу
+агента. Если оба сервиса пишут в один файл, общий водопад строит
+    python -m adapters.trace_view traces/spans.jsonl   (из каталога mcp_server)
+"""
+
+import functools
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+import httpx
+from finam_tracing import inject, tracer_from_env
+
+# Таймаут по умолчанию, как у HTTP-клиентов MCP SDK
+MCP_TIMEOUT = httpx.Timeout(30.0)
+
+tracer = tracer_from_env("agent")
+
+
+def traced_node(name: str, node: Callable[..., Awaitable[Any]]) -> Callable[..., Awaitable[Any]]:
+    """Узел графа в спане node <name>"""
+
+    @functools.wraps(node)
+    async def run(state: Any) -> Any:  # noqa: ANN401
+        with tracer.span(f"node {name}"):
+            return await node(state)
+
+    return run
+
+
+def traced_tool(tool: Any) -> Any:  # noqa: ANN401
+    """MCP-инструмент LangChain, вызов которого идёт в спане mcp <имя> (см. traced_http_client)"""
+    call = tool.coroutine
+
+    async def run(**arguments: Any) -> Any:  # noqa: ANN401
+        with tracer.span(f"mcp {tool.name}"):
+            return await call(**arguments)
+
+    tool.coroutine = run
+    return tool
+
+
+def traced_http_client(headers: dict[str, str] | None = None, timeout: httpx.Timeout | None = None,
+                       auth: httpx.Auth | None = None) -> httpx.AsyncClient:
+    """
+    HTTP-клиент MCP-сессии с заголовком traceparent текущего спана
+
+    Инструменты с connection открывают сессию на каждый вызов, поэтому клиент создаётся
+    внутри спана вызова, и сервер продолжает именно его.
+    """
+    return httpx.AsyncClient(headers=inject(headers), timeout=timeout or MCP_TIMEOUT, auth=auth,
+                             follow_redirects=True)
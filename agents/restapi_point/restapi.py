@@ -1,6 +1,7 @@
 import uvicorn
 from fastapi import FastAPI
 from analyst import get_graph
+from analyst.tracing import tracer
 from pydantic import BaseModel
 
 
@@ -15,13 +16,13 @@ async def startup():
 
 @service.post("/process_data")
 async def send_graph(input: Inp):
-    graph_ = await get_graph()
-    initial_state = graph_.ainvoke({
-        "messages": [{"role": "user", "content": input.user_query}]
-    }, config={"configurable": {"thread_id": input.account_id}})
-
-    result = await graph_.ainvoke(initial_state)
-    return {"text": result['messages'][-1]['content']}
+    # Корень трассы запроса: узлы графа, вызовы MCP-инструментов и запросы сервера к Finam (FINAM_TRACE)
+    with tracer.span("POST /process_data", root=True, thread_id=input.account_id):
+        graph_ = await get_graph()
+        result = await graph_.ainvoke({
+            "messages": [{"role": "user", "content": input.user_query}]
+        }, config={"configurable": {"thread_id": input.account_id}})
+    return {"text": result['messages'][-1].content}
 
 if __name__ == '__main__':
     uvicorn.run(service, port=8011)
\ No newline at end of file
@@ -0,0 +1,262 @@
+"""
+Общий кэш и шина сообщений для нескольких воркеров MCP-сервера
+
+Воркеры (процессы uvicorn или отдельные контейнеры) не делят память, поэтому всё, что должно
+быть общим, проходит через backplane:
+  - кэш ответов Finam второго уровня: котировки, справочники и свечи, загруженные одним
+    воркером, получают остальные — запросы с тем же токеном (ключ включает арендатора);
+  - аренда (claim) — ключ с владельцем и сроком: по ней выбирается единственный воркер,
+    который опрашивает поток подписки;
+  - каналы publish/subscribe: обновления потоков и сообщения MCP-сессий других воркеров.
+
+Реализация задаётся FINAM_BACKPLANE:
+  (пусто)         — без общего слоя, один процесс (по умолчанию)
+  memory          — в памяти процесса: тот же интерфейс для одного воркера и проверок
+  redis://host... — Redis или совместимый сервер (Valkey, KeyDB, Dragonfly); нужен пакет redis
+
+Ошибки backplane не прерывают запросы: вызывающий код считает их промахом и идёт в Finam.
+"""
+
+import asyncio
+import functools
+import logging
+import os
+import time
+import uuid
+from collections.abc import Awaitable, Callable
+from dataclasses import asdict, dataclass
+from typing import Any, Protocol
+
+from .cache import TTLCache
+
+try:
+    import redis.asyncio as aioredis
+except ImportError:  # pragma: no cover - redis необязателен
+    aioredis = None
+
+logger = logging.getLogger(__name__)
+
+Handler = Callable[[bytes], Awaitable[None]]
+
+# Обозначение процесса во владельцах аренды и в служебных сообщениях
+WORKER_ID = uuid.uuid4().hex
+
+
+@dataclass
+class BackplaneStats:
+    hits: int = 0
+    misses: int = 0
+    writes: int = 0
+    published: int = 0
+    received: int = 0
+    errors: int = 0
+
+    def as_dict(self) -> dict[str, int]:
+        return asdict(self)
+
+
+class Backplane(Protocol):
+    stats: BackplaneStats
+
+    async def get(self, key: str) -> tuple[bytes, float] | None:
+        """(значение, сколько секунд ему осталось жить) или None"""
+        ...
+
+    async def set(self, key: str, value: bytes, ttl: float) -> None: ...
+
+    async def claim(self, key: str, owner: str, ttl: float) -> bool:
+        """Взять или продлить аренду key на ttl секунд; False — ключ арендован другим владельцем"""
+        ...
+
+    async def release(self, key: str, owner: str) -> None: ...
+
+    async def publish(self, channel: str, message: bytes) -> None: ...
+
+    async def subscribe(self, channel: str, handler: Handler) -> None: ...
+
+    async def unsubscribe(self, channel: str, handler: Handler) -> None: ...
+
+    def snapshot(self) -> dict[str, Any]: ...
+
+    async def aclose(self) -> None: ...
+
+
+class MemoryBackplane:
+    """Backplane в памяти одного процесса"""
+
+    def __init__(self, max_entries: int | None = None, clock: Callable[[], float] = time.monotonic) -> None:
+        self._clock = clock
+        # Значения хранятся вместе со сроком: get сообщает остаток TTL, как PTTL в Redis
+        self._values = TTLCache(max_entries=max_entries if max_entries is not None
+                                else int(os.getenv("FINAM_BACKPLANE_MAX_ENTRIES", "65536")), clock=clock)
+        self._leases: dict[str, tuple[str, float]] = {}
+        self._channels: dict[str, list[Handler]] = {}
+        self.stats = BackplaneStats()
+
+    async def get(self, key: str) -> tuple[bytes, float] | None:
+        item = self._values.get(key)
+        if item is None:
+            self.stats.misses += 1
+            return None
+        expires_at, value = item
+        self.stats.hits += 1
+        return value, expires_at - self._clock()
+
+    async def set(self, key: str, value: bytes, ttl: float) -> None:
+        self._values.set(key, (self._clock() + ttl, value), ttl)
+        self.stats.writes += 1
+
+    async def claim(self, key: str, owner: str, ttl: float) -> bool:
+        current, expires_at = self._leases.get(key, (None, 0.0))
+        if current not in (None, owner) and expires_at > self._clock():
+            return False
+        self._leases[key] = (owner, self._clock() + ttl)
+        return True
+
+    async def release(self, key: str, owner: str) -> None:
+        if self._leases.get(key, (None,))[0] == owner:
+            del self._leases[key]
+
+    async def publish(self, channel: str, message: bytes) -> None:
+        self.stats.published += 1
+        for handler in list(self._channels.get(channel, ())):
+            self.stats.received += 1
+            try:
+                await handler(message)
+            except Exception:
+                self.stats.errors += 1
+                logger.exception("Ошибка обработчика канала %s", channel)
+
+    async def subscribe(self, channel: str, handler: Handler) -> None:
+        self._channels.setdefault(channel, []).append(handler)
+
+    async def unsubscribe(self, channel: str, handler: Handler) -> None:
+        handlers = self._channels.get(channel, [])
+        if handler in handlers:
+            handlers.remove(handler)
+        if not handlers:
+            self._channels.pop(channel, None)
+
+    def snapshot(self) -> dict[str, Any]:
+        return {"kind": "memory", **self.stats.as_dict(), "entries": len(self._values),
+                "channels": len(self._channels)}
+
+    async def aclose(self) -> None:
+        self._channels.clear()
+
+
+# Продлить аренду, если она наша, иначе взять свободную
+_CLAIM = """
+if redis.call('get', KEYS[1]) == ARGV[1] then return redis.call('pexpire', KEYS[1], ARGV[2]) end
+if redis.call('set', KEYS[1], ARGV[1], 'NX', 'PX', ARGV[2]) then return 1 end
+return 0
+"""
+_RELEASE = """
+if redis.call('get', KEYS[1]) == ARGV[1] then return redis.call('del', KEYS[1]) end
+return 0
+"""
+
+
+class RedisBackplane:
+    """
+    Backplane на Redis-совместимом сервере
+
+    Все ключи и каналы получают префикс prefix, чтобы несколько развёртываний могли делить
+    один сервер. Сообщения каналов читает одна фоновая задача на процесс.
+    """
+
+    def __init__(self, url: str, prefix: str | None = None) -> None:
+        if aioredis is None:
+            raise RuntimeError(f"FINAM_BACKPLANE={url}, но пакет redis не установлен (pip install redis)")
+        self.prefix = prefix if prefix is not None else os.getenv("FINAM_BACKPLANE_PREFIX", "finam:")
+        self.redis = aioredis.from_url(url)
+        self._claim = self.redis.register_script(_CLAIM)
+        self._release = self.redis.register_script(_RELEASE)
+        self._pubsub = self.redis.pubsub()
+        self._channels: dict[str, list[Handler]] = {}
+        self._reader: asyncio.Task | None = None
+        self.stats = BackplaneStats()
+
+    async def get(self, key: str) -> tuple[bytes, float] | None:
+        async with self.redis.pipeline(transaction=False) as pipe:
+            value, pttl = await pipe.get(self.prefix + key).pttl(self.prefix + key).execute()
+        if value is None:
+            self.stats.misses += 1
+            return None
+        self.stats.hits += 1
+        return value, pttl / 1000 if pttl > 0 else 0.0
+
+    async def set(self, key: str, value: bytes, ttl: float) -> None:
+        await self.redis.set(self.prefix + key, value, px=max(1, int(ttl * 1000)))
+        self.stats.writes += 1
+
+    async def claim(self, key: str, owner: str, ttl: float) -> bool:
+        return bool(await self._claim(keys=[self.prefix + key], args=[owner, max(1, int(ttl * 1000))]))
+
+    async def release(self, key: str, owner: str) -> None:
+        await self._release(keys=[self.prefix + key], args=[owner])
+
+    async def publish(self, channel: str, message: bytes) -> None:
+        await self.redis.publish(self.prefix + channel, message)
+        self.stats.published += 1
+
+    async def subscribe(self, channel: str, handler: Handler) -> None:
+        handlers = self._channels.setdefault(channel, [])
+        handlers.append(handler)
+        if len(handlers) == 1:
+            await self._pubsub.subscribe(self.prefix + channel)
+        if self._reader is None or self._reader.done():
+            self._reader = asyncio.create_task(self._read_forever())
+
+    async def unsubscribe(self, channel: str, handler: Handler) -> None:
+        handlers = self._channels.get(channel, [])
+        if handler in handlers:
+            handlers.remove(handler)
+        if not handlers and self._channels.pop(channel, None) is not None:
+            await self._pubsub.unsubscribe(self.prefix + channel)
+
+    async def _read_forever(self) -> None:
+        while True:
+            try:
+                message = await self._pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
+            except Exception:
+                self.stats.errors += 1
+                logger.exception("Ошибка чтения каналов backplane")
+                await asyncio.sleep(1.0)
+                continue
+            if message is None:
+                continue
+            channel = message["channel"].decode().removeprefix(self.prefix)
+            for handler in list(self._channels.get(channel, ())):
+                self.stats.received += 1
+                try:
+                    await handler(message["data"])
+                except Exception:
+                    self.stats.errors += 1
+                    logger.exception("Ошибка обработчика канала %s", channel)
+
+    def snapshot(self) -> dict[str, Any]:
+        return {"kind": "redis", **self.stats.as_dict(), "channels": len(self._channels)}
+
+    async def aclose(self) -> None:
+        if self._reader is not None:
+            self._reader.cancel()
+        await self._pubsub.aclose()
+        await self.redis.aclose()
+
+
+def backplane_from_env() -> Backplane | None:
+    url = os.getenv("FINAM_BACKPLANE", "")
+    if not url:
+        return None
+    if url == "memory":
+        return MemoryBackplane()
+    if url.startswith(("redis://", "rediss://", "unix://")):
+        return RedisBackplane(url)
+    raise RuntimeError(f"Неизвестный FINAM_BACKPLANE: {url}")
+
+
+@functools.cache
+def shared_backplane() -> Backplane | None:
+    """Backplane процесса: общий для всех клиентов реестра, подписок и MCP-сессий"""
+    return backplane_from_env()
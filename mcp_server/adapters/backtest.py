@@ -0,0 +1,158 @@
+"""
+Векторный бэктест стратегий по свечам
+
+Стратегия задаётся декларативно (StrategySpec): условия входа и выхода сравнивают столбцы
+свечей, индикаторы и константы. Позиция открывается по сигналу на закрытии свечи и даёт
+доходность со следующей свечи (без заглядывания вперёд); комиссия списывается с каждого
+изменения позиции. Весь расчёт — операции над массивами NumPy.
+"""
+
+from typing import Any
+
+import numpy as np
+
+from .bar_store import NS, to_iso
+from .columnar import ColumnarBars
+from .indicators import compute, periods_per_year, resolve_params
+from .pydantic_schema import Comparison, Operand, SignalRule, StrategySpec, TimeFrame
+
+YEAR_NS = int(365.25 * 86400 * NS)
+
+
+def _operand(bars: ColumnarBars, operand: Operand, timeframe: TimeFrame,
+             memo: dict[tuple, dict[str, np.ndarray]]) -> np.ndarray | float:
+    given = [name for name in ("series", "indicator", "value") if getattr(operand, name) is not None]
+    if len(given) != 1:
+        raise ValueError("В операнде должно быть ровно одно из полей series, indicator, value")
+    if operand.value is not None:
+        return operand.value
+    if operand.series is not None:
+        return getattr(bars, operand.series)
+    params = resolve_params(operand.indicator, operand.params, timeframe)
+    key = (operand.indicator, tuple(sorted(params.items())))
+    if key not in memo:
+        memo[key] = compute(bars, operand.indicator, params)
+    series = memo[key]
+    name = operand.output or next(iter(series))
+    if name not in series:
+        raise ValueError(f"У {operand.indicator.value} нет ряда {name}; есть: {', '.join(series)}")
+    return series[name]
+
+
+def _shift(x: np.ndarray | float) -> np.ndarray | float:
+    """Значение на предыдущей свече (NaN для первой)"""
+    if np.isscalar(x):
+        return x
+    return np.concatenate(([np.nan], x[:-1]))
+
+
+def rule_mask(bars: ColumnarBars, rule: SignalRule, timeframe: TimeFrame,
+              memo: dict[tuple, dict[str, np.ndarray]]) -> np.ndarray:
+    """Свечи, на которых условие выполняется (сравнения с NaN — не выполняются)"""
+    left = _operand(bars, rule.left, timeframe, memo)
+    right = _operand(bars, rule.right, timeframe, memo)
+    with np.errstate(invalid="ignore"):
+        if rule.op == Comparison.GT:
+            mask = left > right
+        elif rule.op == Comparison.LT:
+            mask = left < right
+        elif rule.op == Comparison.GE:
+            mask = left >= right
+        elif rule.op == Comparison.LE:
+            mask = left <= right
+        elif rule.op == Comparison.CROSSES_ABOVE:
+            mask = (left > right) & (_shift(left) <= _shift(right))
+        else:
+            mask = (left < right) & (_shift(left) >= _shift(right))
+    return np.broadcast_to(mask, len(bars))
+
+
+def positions(entry: np.ndarray, exit_: np.ndarray | None) -> np.ndarray:
+    """
+    Позиция 0/1 на закрытии каждой свечи
+
+    Без условий выхода позиция совпадает с условием входа. С ними — открывается по входу
+    и держится до выхода (если на свече выполнены оба, выход важнее).
+    """
+    if exit_ is None:
+        return entry.astype(np.float64)
+    state = np.where(exit_, 0.0, np.where(entry, 1.0, np.nan))
+    # Протянуть последнее известное состояние вперёд
+    last = np.maximum.accumulate(np.where(np.isnan(state), 0, np.arange(len(state))))
+    held = state[last]
+    return np.nan_to_num(held, nan=0.0)
+
+
+def max_drawdown(equity: np.ndarray) -> float:
+    if not len(equity):
+        return 0.0
+    return float(np.max(1.0 - equity / np.maximum.accumulate(equity)))
+
+
+def strategy_metrics(returns: np.ndarray, ts: np.ndarray, ppy: float, risk_free_rate: float = 0.0) -> dict[str, Any]:
+    """
+    Метрики ряда доходностей за свечу
+
+    cagr — среднегодовой рост по календарному времени; volatility и sharpe — в годовом
+    выражении; var_95 — исторический VaR за одну свечу (потеря, которую с вероятностью 95%
+    не превысит доходность); equity_smoothness — R² линейной регрессии логарифма капитала
+    по номеру свечи (1 — капитал растёт ровно).
+    """
+    equity = np.cumprod(1.0 + returns)
+    total = float(equity[-1] - 1.0) if len(equity) else 0.0
+    years = (int(ts[-1]) - int(ts[0])) / YEAR_NS if len(ts) > 1 else 0.0
+    std = float(returns.std(ddof=1)) if len(returns) > 1 else 0.0
+    excess = returns.mean() - risk_free_rate / ppy if len(returns) else 0.0
+
+    smoothness = None
+    if len(equity) > 2 and np.all(equity > 0):
+        log_equity = np.log(equity)
+        if log_equity.std():
+            smoothness = float(np.corrcoef(np.arange(len(equity)), log_equity)[0, 1] ** 2)
+    return {
+        "total_return": total,
+        "cagr": float((1.0 + total) ** (1.0 / years) - 1.0) if years > 0 and total > -1 else None,
+        "volatility": std * float(np.sqrt(ppy)),
+        "var_95": float(-np.percentile(returns, 5)) if len(returns) else None,
+        "sharpe": float(excess / std * np.sqrt(ppy)) if std else None,
+        "max_drawdown": max_drawdown(equity),
+        "equity_smoothness": smoothness,
+    }
+
+
+def run_backtest(bars: ColumnarBars, spec: StrategySpec, timeframe: TimeFrame,
+                 equity_points: int = 100) -> dict[str, Any]:
+    """Прогнать стратегию по свечам; ValueError — при ошибке в описании стратегии"""
+    if len(bars) < 2:
+        raise ValueError("Для бэктеста нужно хотя бы две свечи")
+    memo: dict[tuple, dict[str, np.ndarray]] = {}
+    entry = np.logical_and.reduce([rule_mask(bars, r, timeframe, memo) for r in spec.entry])
+    exit_ = np.logical_or.reduce([rule_mask(bars, r, timeframe, memo) for r in spec.exit]) if spec.exit else None
+    position = positions(entry, exit_) * (1.0 if spec.side == "long" else -1.0)
+
+    bar_returns = np.diff(bars.close) / bars.close[:-1]
+    turnover = np.abs(np.diff(position, prepend=0.0))[:-1]
+    returns = position[:-1] * bar_returns - turnover * spec.fee_bps / 10_000
+    ts = bars.ts[1:]
+    ppy = periods_per_year(timeframe)
+
+    metrics = strategy_metrics(returns, ts, ppy, spec.risk_free_rate)
+    equity = np.cumprod(1.0 + returns)
+    step = max(1, -(-len(equity) // equity_points)) if equity_points else 0
+    curve_idx = np.unique(np.append(np.arange(0, len(equity), step), len(equity) - 1)) if step else np.array([], int)
+    return {
+        "symbol": bars.symbol,
+        "bars": len(bars),
+        "start": to_iso(int(bars.ts[0])),
+        "end": to_iso(int(bars.ts[-1])),
+        "metrics": {
+            **metrics,
+            "trades": int(np.count_nonzero(np.diff(position, prepend=0.0))),
+            "exposure": float(np.mean(position != 0)),
+            "buy_and_hold_return": float(bars.close[-1] / bars.close[0] - 1.0),
+        },
+        "equity_curve": {
+            "columns": ["timestamp", "equity"],
+            "rows": [[to_iso(int(ts[i])), float(equity[i])] for i in curve_idx],
+        },
+    }
@@ -0,0 +1,240 @@
+"""
+Локальное хранилище исторических свечей
+
+Для каждой пары (символ, таймфрейм) на диске лежат два файла:
+  <dir>/<symbol>/<TIMEFRAME>.bin  — записи BAR_DTYPE, отсортированные по времени (читаются через np.memmap)
+  <dir>/<symbol>/<TIMEFRAME>.json — покрытие: список полуинтервалов [start_ns, end_ns), уже загруженных из API
+
+Покрытие хранится отдельно от самих свечей, потому что отсутствие свечей
+(выходные, клиринг) не означает, что интервал не загружен. Запись идёт под файловой
+блокировкой <TIMEFRAME>.lock, поэтому каталог могут делить несколько воркеров.
+Все методы блокирующие (файловый ввод-вывод и ожидание блокировки), поэтому
+асинхронный код вызывает их через asyncio.to_thread.
+"""
+
+import contextlib
+import json
+import os
+import re
+from collections.abc import Iterator
+from datetime import UTC, datetime
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - нет на Windows: хранилище одного процесса
+    fcntl = None
+
+from .pydantic_schema import TimeFrame
+
+BAR_DTYPE = np.dtype([
+    ("ts", "<i8"),  # Время открытия свечи, нс с эпохи UTC
+    ("open", "<f8"),
+    ("high", "<f8"),
+    ("low", "<f8"),
+    ("close", "<f8"),
+    ("volume", "<f8"),
+])
+
+NS = 1_000_000_000
+
+# Длительность свечи, нс. Для MN и QR — верхняя оценка.
+TIMEFRAME_NS: dict[TimeFrame, int] = {
+    TimeFrame.TIME_FRAME_M1: 60 * NS,
+    TimeFrame.TIME_FRAME_M5: 5 * 60 * NS,
+    TimeFrame.TIME_FRAME_M15: 15 * 60 * NS,
+    TimeFrame.TIME_FRAME_M30: 30 * 60 * NS,
+    TimeFrame.TIME_FRAME_H1: 3600 * NS,
+    TimeFrame.TIME_FRAME_H2: 2 * 3600 * NS,
+    TimeFrame.TIME_FRAME_H4: 4 * 3600 * NS,
+    TimeFrame.TIME_FRAME_H8: 8 * 3600 * NS,
+    TimeFrame.TIME_FRAME_D: 86400 * NS,
+    TimeFrame.TIME_FRAME_W: 7 * 86400 * NS,
+    TimeFrame.TIME_FRAME_MN: 31 * 86400 * NS,
+    TimeFrame.TIME_FRAME_QR: 92 * 86400 * NS,
+}
+
+# Максимальная длина интервала одного запроса /bars по таймфреймам (ограничения API, с запасом)
+CHUNK_SPAN_NS: dict[TimeFrame, int] = {
+    TimeFrame.TIME_FRAME_M1: 7 * 86400 * NS,
+    TimeFrame.TIME_FRAME_M5: 30 * 86400 * NS,
+    TimeFrame.TIME_FRAME_M15: 30 * 86400 * NS,
+    TimeFrame.TIME_FRAME_M30: 30 * 86400 * NS,
+    TimeFrame.TIME_FRAME_H1: 90 * 86400 * NS,
+    TimeFrame.TIME_FRAME_H2: 90 * 86400 * NS,
+    TimeFrame.TIME_FRAME_H4: 180 * 86400 * NS,
+    TimeFrame.TIME_FRAME_H8: 180 * 86400 * NS,
+    TimeFrame.TIME_FRAME_D: 365 * 86400 * NS,
+    TimeFrame.TIME_FRAME_W: 5 * 365 * 86400 * NS,
+    TimeFrame.TIME_FRAME_MN: 10 * 365 * 86400 * NS,
+    TimeFrame.TIME_FRAME_QR: 10 * 365 * 86400 * NS,
+}
+
+Intervals = list[tuple[int, int]]
+
+
+def to_ns(value: str | datetime) -> int:
+    """ISO8601 (c Z или offset) или datetime → нс с эпохи UTC"""
+    dt = datetime.fromisoformat(value) if isinstance(value, str) else value
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=UTC)
+    return int(dt.timestamp()) * NS + dt.microsecond * 1000
+
+
+def from_ns(ns: int) -> datetime:
+    """нс с эпохи UTC → datetime с tzinfo=UTC"""
+    return datetime.fromtimestamp(ns // NS, tz=UTC).replace(microsecond=(ns % NS) // 1000)
+
+
+def to_iso(ns: int) -> str:
+    """нс с эпохи UTC → ISO8601 c Z"""
+    return from_ns(ns).isoformat().replace("+00:00", "Z")
+
+
+def now_ns() -> int:
+    return to_ns(datetime.now(UTC))
+
+
+def normalize(arr: np.ndarray) -> np.ndarray:
+    """Отсортировать по времени и убрать дубликаты (при совпадении ts остаётся последняя запись)"""
+    if len(arr) < 2:
+        return arr
+    order = np.argsort(arr["ts"], kind="stable")
+    arr = arr[order]
+    # Оставляем последнюю запись из каждой группы одинаковых ts
+    keep = np.append(arr["ts"][1:] != arr["ts"][:-1], True)
+    return arr[keep]
+
+
+def split_interval(start: int, end: int, span: int) -> Intervals:
+    """Разбить [start, end) на последовательные куски длиной не более span"""
+    if end <= start:
+        return [(start, end)]
+    return [(chunk_start, min(chunk_start + span, end)) for chunk_start in range(start, end, span)]
+
+
+def merge_intervals(intervals: Intervals) -> Intervals:
+    merged: Intervals = []
+    for start, end in sorted(intervals):
+        if end <= start:
+            continue
+        if merged and start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def subtract_intervals(start: int, end: int, covered: Intervals) -> Intervals:
+    """Части [start, end), не покрытые covered (covered отсортирован и не пересекается)"""
+    gaps: Intervals = []
+    cursor = start
+    for c_start, c_end in covered:
+        if c_end <= cursor:
+            continue
+        if c_start >= end:
+            break
+        if c_start > cursor:
+            gaps.append((cursor, c_start))
+        cursor = max(cursor, c_end)
+        if cursor >= end:
+            break
+    if cursor < end:
+        gaps.append((cursor, end))
+    return gaps
+
+
+@contextlib.contextmanager
+def _locked(path: str) -> Iterator[None]:
+    """Монопольная блокировка файла path между процессами"""
+    if fcntl is None:
+        yield
+        return
+    with open(path, "a") as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+class BarStore:
+    """
+    Файловое колоночное хранилище свечей с учётом загруженных интервалов
+
+    Используется так: missing() → догрузить недостающие интервалы из API → write() → read().
+    """
+
+    def __init__(self, root: str | None = None) -> None:
+        self.root = root or os.getenv("FINAM_BAR_STORE_DIR", "data/bars")
+
+    def _paths(self, symbol: str, timeframe: TimeFrame) -> tuple[str, str]:
+        safe_symbol = re.sub(r"[^\w@.\-]", "_", symbol)
+        base = os.path.join(self.root, safe_symbol, timeframe.name.removeprefix("TIME_FRAME_"))
+        return base + ".bin", base + ".json"
+
+    def coverage(self, symbol: str, timeframe: TimeFrame) -> Intervals:
+        """Загруженные интервалы [start_ns, end_ns)"""
+        _, meta_path = self._paths(symbol, timeframe)
+        try:
+            with open(meta_path) as f:
+                return [tuple(iv) for iv in json.load(f)["coverage"]]
+        except FileNotFoundError:
+            return []
+
+    def missing(self, symbol: str, timeframe: TimeFrame, start: int, end: int) -> Intervals:
+        """Интервалы внутри [start, end), которых нет в хранилище"""
+        return subtract_intervals(start, end, self.coverage(symbol, timeframe))
+
+    def _load(self, symbol: str, timeframe: TimeFrame) -> np.ndarray:
+        data_path, _ = self._paths(symbol, timeframe)
+        try:
+            size = os.path.getsize(data_path)
+        except FileNotFoundError:
+            return np.empty(0, dtype=BAR_DTYPE)
+        if size < BAR_DTYPE.itemsize:
+            return np.empty(0, dtype=BAR_DTYPE)
+        return np.memmap(data_path, dtype=BAR_DTYPE, mode="r", shape=(size // BAR_DTYPE.itemsize,))
+
+    def last_ts(self, symbol: str, timeframe: TimeFrame) -> int | None:
+        """Время последней сохранённой свечи (None, если свечей нет)"""
+        data = self._load(symbol, timeframe)
+        return int(data["ts"][-1]) if len(data) else None
+
+    def read(self, symbol: str, timeframe: TimeFrame, start: int, end: int) -> np.ndarray:
+        """Свечи с ts в [start, end) — копия из memmap"""
+        data = self._load(symbol, timeframe)
+        lo, hi = np.searchsorted(data["ts"], [start, end], side="left")
+        return np.array(data[lo:hi])
+
+    def write(self, symbol: str, timeframe: TimeFrame, bars: np.ndarray, start: int, end: int) -> None:
+        """
+        Сохранить свечи, загруженные за интервал [start, end), и отметить интервал как покрытый
+
+        Если новые свечи идут строго после уже сохранённых, файл дописывается,
+        иначе переписывается целиком (атомарно через временный файл).
+        """
+        data_path, meta_path = self._paths(symbol, timeframe)
+        os.makedirs(os.path.dirname(data_path), exist_ok=True)
+        with _locked(os.path.splitext(data_path)[0] + ".lock"):
+            bars = normalize(np.asarray(bars, dtype=BAR_DTYPE))
+            existing = self._load(symbol, timeframe)
+
+            if len(bars):
+                if not len(existing) or bars["ts"][0] > existing["ts"][-1]:
+                    with open(data_path, "ab") as f:
+                        f.write(bars.tobytes())
+                else:
+                    merged = normalize(np.concatenate([np.array(existing), bars]))
+                    del existing  # Закрываем memmap перед заменой файла
+                    tmp_path = data_path + ".tmp"
+                    with open(tmp_path, "wb") as f:
+                        f.write(merged.tobytes())
+                    os.replace(tmp_path, data_path)
+
+            coverage = merge_intervals([*self.coverage(symbol, timeframe), (start, end)])
+            tmp_path = meta_path + ".tmp"
+            with open(tmp_path, "w") as f:
+                json.dump({"coverage": coverage}, f)
+            os.replace(tmp_path, meta_path)
@@ -0,0 +1,104 @@
+"""
+Ограниченный in-process кэш ответов с TTL и вытеснением LRU
+"""
+
+import os
+import time
+from collections import OrderedDict
+from collections.abc import Callable, Hashable
+from dataclasses import asdict, dataclass
+from typing import Any
+
+from .endpoints import EndpointClass
+
+# TTL по умолчанию (секунды). 0 — не кэшировать.
+DEFAULT_TTLS: dict[EndpointClass, float] = {
+    EndpointClass.REFERENCE: 3600.0,
+    EndpointClass.QUOTES: 1.0,
+    EndpointClass.BARS: 60.0,
+    EndpointClass.ACCOUNT: 0.0,
+    EndpointClass.ORDERS: 0.0,
+    EndpointClass.SESSION: 0.0,
+    EndpointClass.CLOCK: 0.0,
+}
+
+
+def ttls_from_env(overrides: dict[EndpointClass, float] | None = None) -> dict[EndpointClass, float]:
+    """
+    TTL по классам эндпоинтов: значения по умолчанию, затем FINAM_CACHE_TTL_<CLASS>, затем overrides
+    """
+    ttls = dict(DEFAULT_TTLS)
+    for endpoint_class in EndpointClass:
+        env_value = os.getenv(f"FINAM_CACHE_TTL_{endpoint_class.name}")
+        if env_value is not None:
+            ttls[endpoint_class] = float(env_value)
+    ttls.update(overrides or {})
+    return ttls
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0  # Вытеснены по размеру (LRU)
+    expirations: int = 0  # Удалены по истечении TTL
+
+    def as_dict(self) -> dict[str, int]:
+        return asdict(self)
+
+
+_MISSING = object()
+
+
+class TTLCache:
+    """
+    Кэш «ключ → значение» с индивидуальным TTL записи и ограничением числа записей
+
+    При переполнении вытесняется запись, к которой дольше всего не обращались.
+    """
+
+    def __init__(self, max_entries: int = 4096, clock: Callable[[], float] = time.monotonic) -> None:
+        self.max_entries = max_entries
+        self._clock = clock
+        self._data: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+        self.stats = CacheStats()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:  # noqa: ANN401
+        """Получить значение или default, если записи нет или она устарела"""
+        item = self._data.get(key, _MISSING)
+        if item is _MISSING:
+            self.stats.misses += 1
+            return default
+        expires_at, value = item
+        if expires_at <= self._clock():
+            del self._data[key]
+            self.stats.expirations += 1
+            self.stats.misses += 1
+            return default
+        self._data.move_to_end(key)
+        self.stats.hits += 1
+        return value
+
+    def set(self, key: Hashable, value: Any, ttl: float) -> None:  # noqa: ANN401
+        """Сохранить значение на ttl секунд (ttl <= 0 — не сохранять)"""
+        if ttl <= 0 or self.max_entries <= 0:
+            return
+        self._data[key] = (self._clock() + ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_entries:
+            self._data.popitem(last=False)
+            self.stats.evictions += 1
+
+    def invalidate(self, predicate: Callable[[Hashable], bool] | None = None) -> int:
+        """Удалить записи, ключи которых удовлетворяют predicate (или все). Возвращает число удалённых"""
+        if predicate is None:
+            removed = len(self._data)
+            self._data.clear()
+            return removed
+        keys = [k for k in self._data if predicate(k)]
+        for k in keys:
+            del self._data[k]
+        return len(keys)
+
+    def __len__(self) -> int:
+        return len(self._data)
@@ -0,0 +1,71 @@
+"""
+Схлопывание одинаковых одновременных запросов (single-flight)
+
+Если несколько корутин одновременно запрашивают один и тот же ресурс,
+в сеть уходит только один запрос, а результат получают все ожидающие.
+"""
+
+import asyncio
+from collections.abc import Awaitable, Callable, Hashable
+from dataclasses import asdict, dataclass
+from typing import Any
+
+
+def request_key(method: str, path: str, params: dict[str, Any] | None = None) -> tuple:
+    """Ключ запроса: метод, путь и отсортированные параметры"""
+    return method.upper(), path, tuple(sorted((params or {}).items()))
+
+
+@dataclass
+class SingleFlightStats:
+    calls: int = 0  # Сколько раз вызывали do()
+    executed: int = 0  # Сколько реальных запросов было выполнено
+    coalesced: int = 0  # Сколько вызовов дождались чужого запроса (сэкономленные запросы)
+
+    def as_dict(self) -> dict[str, int]:
+        return asdict(self)
+
+
+class SingleFlight:
+    """
+    Группа «один запрос в полёте на ключ»
+
+    Результат общий для всех ожидающих, поэтому вызывающий код не должен его изменять.
+    """
+
+    def __init__(self) -> None:
+        self._inflight: dict[Hashable, asyncio.Task] = {}
+        self.stats = SingleFlightStats()
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:  # noqa: ANN401
+        """
+        Выполнить fn() или присоединиться к уже выполняющемуся запросу с тем же ключом
+
+        Args:
+            key: Ключ запроса (см. request_key)
+            fn: Фабрика корутины, выполняющей запрос
+        """
+        self.stats.calls += 1
+        task = self._inflight.get(key)
+        if task is None:
+            self.stats.executed += 1
+            task = asyncio.ensure_future(fn())
+            self._inflight[key] = task
+            task.add_done_callback(lambda t: self._forget(key, t))
+        else:
+            self.stats.coalesced += 1
+        # shield: отмена одного из ожидающих не должна отменять запрос для остальных
+        return await asyncio.shield(task)
+
+    def _forget(self, key: Hashable, task: asyncio.Task) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+
+    @property
+    def inflight(self) -> int:
+        """Количество запросов, выполняющихся прямо сейчас"""
+        return len(self._inflight)
+
+    def running(self, key: Hashable) -> bool:
+        """Выполняется ли сейчас запрос с ключом key"""
+        return key in self._inflight
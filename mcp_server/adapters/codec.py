@@ -0,0 +1,82 @@
+"""
+JSON-кодеки для ответов Finam и результатов MCP-инструментов
+
+Кодек выбирается переменной окружения FINAM_JSON_CODEC:
+  auto   — orjson, если установлен, иначе стандартный json (по умолчанию)
+  orjson — только orjson
+  json   — стандартный json
+"""
+
+import json
+import os
+from typing import Any, Protocol
+
+import pydantic_core
+from mcp.types import TextContent
+from pydantic import BaseModel
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson необязателен
+    orjson = None
+
+
+class Codec(Protocol):
+    name: str
+
+    def loads(self, data: bytes | str) -> Any: ...  # noqa: ANN401
+
+    def dumps(self, obj: Any) -> bytes: ...  # noqa: ANN401
+
+
+def _default(obj: Any) -> Any:  # noqa: ANN401
+    """Decimal, datetime, enum, pydantic-модели → JSON-совместимые значения"""
+    return pydantic_core.to_jsonable_python(obj, fallback=str)
+
+
+class StdJsonCodec:
+    name = "json"
+
+    def loads(self, data: bytes | str) -> Any:  # noqa: ANN401
+        return json.loads(data)
+
+    def dumps(self, obj: Any) -> bytes:  # noqa: ANN401
+        return json.dumps(obj, ensure_ascii=False, separators=(",", ":"), default=_default).encode()
+
+
+class OrjsonCodec:
+    name = "orjson"
+
+    def loads(self, data: bytes | str) -> Any:  # noqa: ANN401
+        return orjson.loads(data)
+
+    def dumps(self, obj: Any) -> bytes:  # noqa: ANN401
+        return orjson.dumps(obj, default=_default)
+
+
+def get_codec(name: str | None = None) -> Codec:
+    name = name or os.getenv("FINAM_JSON_CODEC", "auto")
+    if name == "json" or (name == "auto" and orjson is None):
+        return StdJsonCodec()
+    if orjson is None:
+        raise RuntimeError("FINAM_JSON_CODEC=orjson, но пакет orjson не установлен")
+    return OrjsonCodec()
+
+
+codec = get_codec()
+
+
+def dumps_text(result: Any) -> str:  # noqa: ANN401
+    """Компактный JSON для результата инструмента; pydantic-модели сериализуются в pydantic-core"""
+    if isinstance(result, BaseModel):
+        return result.model_dump_json()
+    return codec.dumps(result).decode()
+
+
+def to_content(result: Any) -> list[TextContent]:  # noqa: ANN401
+    """Результат инструмента → готовый TextContent (FastMCP не будет сериализовать его повторно с отступами)"""
+    if result is None:
+        return []
+    if isinstance(result, str):
+        return [TextContent(type="text", text=result)]
+    return [TextContent(type="text", text=dumps_text(result))]
@@ -0,0 +1,110 @@
+"""
+Колоночное представление свечей
+
+Вместо списка pydantic-моделей Bar с Decimal-полями свечи хранятся в массивах NumPy:
+метки времени — int64 (нс UTC), OHLCV — float64. В BarsResponse они
+превращаются только по запросу (to_response).
+"""
+
+from dataclasses import dataclass
+
+import numpy as np
+
+from .bar_store import BAR_DTYPE, normalize, to_ns
+from .pydantic_schema import BarsResponse
+
+OHLCV = ("open", "high", "low", "close", "volume")
+
+
+def _parse_timestamps(values: list[str]) -> np.ndarray:
+    """ISO8601 → int64 нс UTC; быстрый путь для меток с Z, иначе разбор по одной"""
+    try:
+        if all(v.endswith("Z") for v in values):
+            return np.array([v[:-1] for v in values], dtype="datetime64[ns]").astype(np.int64)
+    except ValueError:
+        pass
+    return np.fromiter((to_ns(v) for v in values), dtype=np.int64, count=len(values))
+
+
+@dataclass
+class ColumnarBars:
+    symbol: str
+    ts: np.ndarray  # int64, нс UTC, по возрастанию
+    open: np.ndarray  # float64
+    high: np.ndarray
+    low: np.ndarray
+    close: np.ndarray
+    volume: np.ndarray
+
+    @classmethod
+    def from_array(cls, symbol: str, arr: np.ndarray) -> "ColumnarBars":
+        """Из структурированного массива BAR_DTYPE (как в BarStore)"""
+        return cls(symbol, arr["ts"], *(arr[name] for name in OHLCV))
+
+    @classmethod
+    def from_payload(cls, d: dict, symbol: str) -> "ColumnarBars":
+        """Из ответа /v1/instruments/{symbol}/bars; свечи сортируются и дедуплицируются по времени"""
+        raw = d.get("bars", [])
+        arr = np.empty(len(raw), dtype=BAR_DTYPE)
+        if raw:
+            arr["ts"] = _parse_timestamps([b["timestamp"] for b in raw])
+            for name in OHLCV:
+                arr[name] = np.array([b[name] for b in raw], dtype=np.float64)
+        return cls.from_array(d.get("symbol", symbol), normalize(arr))
+
+    @classmethod
+    def concat(cls, symbol: str, parts: list["ColumnarBars"]) -> "ColumnarBars":
+        """Склеить несколько кусков, убрав свечи, повторяющиеся на границах"""
+        if not parts:
+            return cls.from_array(symbol, np.empty(0, dtype=BAR_DTYPE))
+        return cls.from_array(symbol, normalize(np.concatenate([p.to_array() for p in parts])))
+
+    def __len__(self) -> int:
+        return len(self.ts)
+
+    def tail(self, n: int) -> "ColumnarBars":
+        """Последние n свечей (срез без копирования)"""
+        start = max(len(self) - n, 0)
+        return ColumnarBars(self.symbol, *(getattr(self, name)[start:] for name in ("ts", *OHLCV)))
+
+    def to_array(self) -> np.ndarray:
+        """Структурированный массив BAR_DTYPE"""
+        arr = np.empty(len(self), dtype=BAR_DTYPE)
+        arr["ts"] = self.ts
+        for name in OHLCV:
+            arr[name] = getattr(self, name)
+        return arr
+
+    def scaled(self, column: str, decimals: int) -> np.ndarray:
+        """Цены столбца column как int64 в единицах 10^-decimals (для точной арифметики)"""
+        return np.rint(getattr(self, column) * 10 ** decimals).astype(np.int64)
+
+    def iso_timestamps(self) -> list[str]:
+        """Время открытия свечей в ISO 8601 (UTC, до секунд)"""
+        return np.datetime_as_string(self.ts.astype("datetime64[ns]"), unit="s", timezone="UTC").tolist()
+
+    def _rows(self) -> list[dict]:
+        return [
+            {"timestamp": ts, "open": o, "high": h, "low": lo, "close": c, "volume": v}
+            for ts, o, h, lo, c, v in zip(
+                self.iso_timestamps(), self.open.tolist(), self.high.tolist(),
+                self.low.tolist(), self.close.tolist(), self.volume.tolist(), strict=True,
+            )
+        ]
+
+    def to_payload(self) -> dict:
+        """В формате ответа API (значения — строки)"""
+        rows = self._rows()
+        for row in rows:
+            for name in OHLCV:
+                row[name] = repr(row[name])
+        return {"symbol": self.symbol, "bars": rows}
+
+    def to_response(self) -> BarsResponse:
+        """
+        В pydantic-модель BarsResponse
+
+        Валидация идёт целиком в pydantic-core: float → Decimal через кратчайшую
+        десятичную запись, ISO-строка → datetime.
+        """
+        return BarsResponse.model_validate({"symbol": self.symbol, "bars": self._rows()})
@@ -0,0 +1,64 @@
+"""
+Сборка pydantic-моделей из ответов Finam для MCP-инструментов
+
+converter(model) создаётся один раз на модель: он берёт её скомпилированный валидатор
+pydantic-core (JSON-ответ → модель за один проход, без Python-обёртки model_validate)
+и добавляет доверенный путь для уже проверенных данных. Кэш ответов отдаёт один и тот же
+объект, пока запись свежая, поэтому модель, однажды собранная из ответа, берётся из памяти
+по идентичности ответа (как локальные стаканы и ленты сделок), без повторной валидации.
+Запись живёт не дольше memo_ttl (FINAM_MODEL_MEMO_TTL); ответы по счетам, заявкам и
+сессиям не кэшируются и приходят каждый раз новыми объектами, поэтому их модели
+собираются с memo_ttl=0 и в памяти не остаются.
+
+Сборка полей в Python с model_construct проверялась и оказалась не быстрее pydantic-core:
+Decimal и datetime создаются теми же конструкторами, а установка служебных атрибутов
+экземпляра стоит столько же, сколько вызов валидатора (benchmarks/bench_converters.py).
+Собранные модели общие для всех вызовов с тем же ответом — изменять их нельзя.
+"""
+
+import functools
+import os
+from collections.abc import Callable
+from typing import Any, Generic, TypeVar
+
+from pydantic import BaseModel
+
+from .cache import TTLCache
+
+M = TypeVar("M", bound=BaseModel)
+
+
+class ModelConverter(Generic[M]):
+    def __init__(self, model: type[M], memo_entries: int | None = None, memo_ttl: float | None = None) -> None:
+        """
+        Args:
+            model: Модель ответа
+            memo_entries: Сколько собранных моделей держать в памяти (FINAM_MODEL_MEMO_ENTRIES)
+            memo_ttl: Сколько секунд держать собранную модель (FINAM_MODEL_MEMO_TTL, 0 — не держать)
+        """
+        self.model = model
+        self._validate = model.__pydantic_validator__.validate_python
+        # id(ответа) → (ответ, модель): ответ хранится, чтобы его id не достался другому объекту
+        self._memo = TTLCache(max_entries=memo_entries if memo_entries is not None
+                              else int(os.getenv("FINAM_MODEL_MEMO_ENTRIES", "64")))
+        self.memo_ttl = memo_ttl if memo_ttl is not None else float(os.getenv("FINAM_MODEL_MEMO_TTL", "60"))
+
+    def __call__(self, payload: Any, shape: Callable[[Any], Any] | None = None) -> M:  # noqa: ANN401
+        """
+        Модель из ответа API payload
+
+        shape(payload) приводит ответ к виду модели (например, оборачивает котировку
+        в {"symbol", "quote"}) и вызывается только при первой сборке.
+        """
+        key = id(payload)
+        hit = self._memo.get(key)
+        if hit is not None and hit[0] is payload:
+            return hit[1]
+        result = self._validate(shape(payload) if shape is not None else payload)
+        self._memo.set(key, (payload, result), self.memo_ttl)
+        return result
+
+
+@functools.cache
+def converter(model: type[M], memo_ttl: float | None = None) -> ModelConverter[M]:
+    return ModelConverter(model, memo_ttl=memo_ttl)
@@ -0,0 +1,54 @@
+"""
+Классы эндпоинтов Finam TradeAPI
+
+Эндпоинты группируются по характеру данных: от этого зависят TTL кэша
+и другие политики клиента.
+"""
+
+import re
+from enum import StrEnum
+
+
+class EndpointClass(StrEnum):
+    REFERENCE = "reference"  # Биржи, инструменты, расписание, опционы — меняются редко
+    QUOTES = "quotes"  # Котировки, стакан, лента сделок
+    BARS = "bars"  # Исторические свечи
+    ACCOUNT = "account"  # Счёт, сделки и транзакции по счёту, параметры инструмента для счёта
+    ORDERS = "orders"  # Заявки
+    SESSION = "session"  # Сессии и токены
+    CLOCK = "clock"  # Время сервера
+
+
+_RULES: list[tuple[re.Pattern, EndpointClass]] = [
+    (re.compile(r"^/v1/assets/clock$"), EndpointClass.CLOCK),
+    (re.compile(r"^/v1/assets/[^/]+/params$"), EndpointClass.ACCOUNT),
+    (re.compile(r"^/v1/(exchanges|assets)(/|$)"), EndpointClass.REFERENCE),
+    (re.compile(r"^/v1/instruments/[^/]+/bars$"), EndpointClass.BARS),
+    (re.compile(r"^/v1/instruments/"), EndpointClass.QUOTES),
+    (re.compile(r"^/v1/accounts/[^/]+/orders(/|$)"), EndpointClass.ORDERS),
+    (re.compile(r"^/v1/accounts/"), EndpointClass.ACCOUNT),
+    (re.compile(r"^/v1/sessions(/|$)"), EndpointClass.SESSION),
+]
+
+
+def classify(path: str) -> EndpointClass:
+    """Определить класс эндпоинта по пути запроса (неизвестные пути считаются ACCOUNT — без кэша)"""
+    for pattern, endpoint_class in _RULES:
+        if pattern.search(path):
+            return endpoint_class
+    return EndpointClass.ACCOUNT
+
+
+# Символы и идентификаторы в пути заменяются шаблонами: у метрик эндпоинтов ограниченный набор меток
+_ROUTE_PATTERNS: list[tuple[re.Pattern, str]] = [
+    (re.compile(r"^/v1/(instruments|assets)/(?!clock$)[^/]+"), r"/v1/\1/{symbol}"),
+    (re.compile(r"^/v1/accounts/[^/]+"), "/v1/accounts/{account_id}"),
+    (re.compile(r"/orders/[^/]+$"), "/orders/{order_id}"),
+]
+
+
+def route(path: str) -> str:
+    """Шаблон пути запроса: /v1/instruments/SBER@MISX/bars → /v1/instruments/{symbol}/bars"""
+    for pattern, template in _ROUTE_PATTERNS:
+        path = pattern.sub(template, path)
+    return path
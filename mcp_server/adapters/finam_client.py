@@ -3,23 +3,139 @@
 https://tradeapi.finam.ru/
 """
 
+import asyncio
+import contextlib
+import contextvars
+import functools
+import hashlib
+import itertools
+import logging
 import os
-from datetime import datetime
-from decimal import Decimal
+import time
+from collections.abc import Callable
 from typing import Any
+from urllib.parse import urlencode
 
-import requests
+import httpx
+import numpy as np
+from finam_tracing import Tracer, annotate, detached
 from mcp.server.fastmcp import FastMCP
-from .pydantic_schema import (
-    GetAccountArgs, GetOrdersArgs, SessionCreateArgs, TransactionsArgs,
-    SessionToken, AssetOptions, AssetOptionsArgs, AssetSchedule,
-    AssetScheduleArgs, AssetParamsArgs, AssetParams, GetAssetArgs, Asset, SearchAssetsArgs, Assets, Exchanges,
-    SessionDetails, Account, TradesArgs, CancelOrderArgs, CreateOrderArgs, Order, GetOrderArgs, Quote,
-    PlaceOrderArgs, BarsResponse, BarsRequest, OrderBookRequest,
-    OrderBookResponse, OrderBookRow, OrderBookAction, OrderBook, QuoteResponse, QuoteRequest, LatestTradesRequest,
-    LatestTradesResponse, Trade, TimeFrame, QuoteOption, Bar, TradeSide
 
+from .backplane import Backplane, shared_backplane
+from .backtest import run_backtest
+from .bar_store import CHUNK_SPAN_NS, NS, TIMEFRAME_NS, BarStore, now_ns, split_interval, to_iso, to_ns
+from .cache import TTLCache, ttls_from_env
+from .coalescing import SingleFlight, request_key
+from .codec import codec, to_content
+from .columnar import OHLCV, ColumnarBars
+from .converters import converter
+from .endpoints import EndpointClass, classify
+from .endpoints import route as endpoint_route
+from .indicators import compute, periods_per_year, resolve_params, summarize
+from .metrics import API_DURATION, API_INFLIGHT, API_RESPONSE_BYTES, API_RESPONSES, track_tool
+from .options import chain_analytics, parse_chain, quote_price
+from .orderbook import LocalOrderBook
+from .portfolio import portfolio_risk
+from .pydantic_schema import (
+    Account,
+    Asset,
+    AssetOptions,
+    AssetOptionsArgs,
+    AssetParams,
+    AssetParamsArgs,
+    Assets,
+    AssetSchedule,
+    AssetScheduleArgs,
+    BacktestArgs,
+    BarsRequest,
+    BarsResponse,
+    CancelOrderArgs,
+    Exchanges,
+    GetAccountArgs,
+    GetAssetArgs,
+    GetOrderArgs,
+    GetOrderbookArgs,
+    GetOrdersArgs,
+    Indicator,
+    IndicatorArgs,
+    LatestTradesRequest,
+    LatestTradesResponse,
+    OptionChainArgs,
+    Order,
+    OrderBookRequest,
+    OrderBookResponse,
+    OrderBooksRequest,
+    OrderBookSummary,
+    PlaceOrderArgs,
+    PortfolioAnalyticsArgs,
+    QuoteRequest,
+    QuoteResponse,
+    QuotesRequest,
+    ResolveSymbolArgs,
+    SearchAssetsArgs,
+    SessionCreateArgs,
+    SessionDetails,
+    SessionToken,
+    StrategySpec,
+    SymbolMatches,
+    TechnicalSummaryArgs,
+    TimeFrame,
+    TradeFlow,
+    TradeFlowArgs,
+    TradesArgs,
+    TransactionsArgs,
+)
+from .resample import RESAMPLE_SOURCES, bucket_starts, native_offset_ns, next_bucket_start, resample
+from .resilience import (
+    RETRYABLE_STATUSES,
+    LatencyTracker,
+    ResilienceStats,
+    RetryPolicy,
+    timeouts_from_env,
 )
+from .scheduler import RequestScheduler
+from .sessions import TradingCalendar, symbol_from_path
+from .symbols import SymbolCatalog, shared_catalog
+from .tape import TradeTape
+from .tracing import shared_tracer
+
+logger = logging.getLogger(__name__)
+
+# Классы эндпоинтов, ответы которых могут лежать в общем кэше воркеров. Ключ включает арендатора:
+# что вернёт API (задержанные котировки, ошибка доступа), зависит от токена
+SHARED_CLASSES = frozenset({EndpointClass.REFERENCE, EndpointClass.QUOTES, EndpointClass.BARS})
+
+
+def tenant_id(access_token: str) -> str:
+    """Обозначение арендатора для статистики, логов и ключей общего кэша"""
+    return hashlib.sha256(access_token.encode()).hexdigest()[:12] if access_token else "default"
+
+
+def shared_key(tenant: str, key: tuple) -> str:
+    """Ключ общего кэша арендатора tenant для ключа запроса request_key"""
+    method, path, params = key
+    return f"cache:{tenant}:{method}:{path}?{urlencode(params, doseq=True)}"
+
+
+def http_pool(base_url: str | None = None, max_connections: int | None = None,
+              max_keepalive_connections: int | None = None) -> httpx.AsyncClient:
+    """Пул соединений с API; токен передаётся в каждом запросе, поэтому пул можно делить между клиентами"""
+    limits = httpx.Limits(
+        max_connections=max_connections or int(os.getenv("FINAM_HTTP_MAX_CONNECTIONS", "100")),
+        max_keepalive_connections=max_keepalive_connections or int(os.getenv("FINAM_HTTP_MAX_KEEPALIVE", "20")),
+        keepalive_expiry=30.0,
+    )
+    return httpx.AsyncClient(base_url=base_url or os.getenv("FINAM_API_BASE_URL", "https://api.finam.ru"),
+                             headers={"Content-Type": "application/json"}, limits=limits)
+
+
+def _retry_after(response: httpx.Response) -> float | None:
+    """Значение заголовка Retry-After в секундах (формат HTTP-даты не поддерживается)"""
+    try:
+        return float(response.headers["Retry-After"])
+    except (KeyError, ValueError):
+        return None
+
 
 class FinamAPIClient:
     """
@@ -28,413 +144,1157 @@ class FinamAPIClient:
     Документация: https://tradeapi.finam.ru/
     """
 
-    def __init__(self, access_token: str | None = None, base_url: str | None = None) -> None:
+    def __init__(
+        self,
+        access_token: str | None = None,
+        base_url: str | None = None,
+        max_connections: int | None = None,
+        max_keepalive_connections: int | None = None,
+        cache_ttls: dict[EndpointClass, float] | None = None,
+        cache_max_entries: int | None = None,
+        bar_store_dir: str | None = None,
+        bars_concurrency: int | None = None,
+        batch_concurrency: int | None = None,
+        rate_limit_retries: int | None = None,
+        timeouts: dict[EndpointClass, float] | None = None,
+        retries: int | None = None,
+        hedge_requests: bool | None = None,
+        http: httpx.AsyncClient | None = None,
+        backplane: Backplane | None = None,
+        tracer: Tracer | None = None,
+        symbols: SymbolCatalog | None = None,
+    ) -> None:
         """
         Инициализация клиента
 
         Args:
             access_token: Токен доступа к API (из переменной окружения FINAM_ACCESS_TOKEN)
             base_url: Базовый URL API (по умолчанию из документации)
+            max_connections: Максимум одновременных соединений в пуле (FINAM_HTTP_MAX_CONNECTIONS)
+            max_keepalive_connections: Сколько keep-alive соединений держать открытыми (FINAM_HTTP_MAX_KEEPALIVE)
+            cache_ttls: TTL кэша по классам эндпоинтов поверх FINAM_CACHE_TTL_<CLASS>
+            cache_max_entries: Максимум записей в кэше ответов (FINAM_CACHE_MAX_ENTRIES)
+            bar_store_dir: Каталог локального хранилища свечей (FINAM_BAR_STORE_DIR; FINAM_BAR_STORE=0 — отключить)
+            bars_concurrency: Сколько запросов свечей выполнять одновременно (FINAM_BARS_CONCURRENCY)
+            batch_concurrency: Сколько инструментов одного пакетного запроса загружать одновременно (FINAM_BATCH_CONCURRENCY)
+            rate_limit_retries: Сколько раз повторять запрос после ответа 429 (FINAM_RATE_LIMIT_RETRIES)
+            timeouts: Таймауты по классам эндпоинтов поверх FINAM_TIMEOUT_<CLASS>
+            retries: Сколько раз повторять GET при сетевой ошибке или 5xx (FINAM_RETRIES)
+            hedge_requests: Дублировать медленные GET-запросы (FINAM_HEDGE_REQUESTS)
+            http: Общий пул соединений (см. http_pool); клиент его не закрывает
+            backplane: Общий кэш воркеров (по умолчанию FINAM_BACKPLANE, см. adapters.backplane)
+            tracer: Спаны запросов к API (по умолчанию FINAM_TRACE, см. adapters.tracing)
+            symbols: Индекс инструментов для resolve_symbol (по умолчанию общий для процесса, см. adapters.symbols)
         """
         self.access_token = access_token or os.getenv("FINAM_ACCESS_TOKEN", "")
         self.base_url = base_url or os.getenv("FINAM_API_BASE_URL", "https://api.finam.ru")
-        self.session = requests.Session()
 
-        if self.access_token:
-            self.session.headers.update({
-                "Authorization": f"{self.access_token}",
-                "Content-Type": "application/json",
-            })
+        self._headers = {"Authorization": f"{self.access_token}"} if self.access_token else {}
+        # Один пул соединений на клиент (или общий для нескольких клиентов): запросы из разных
+        # tool-хендлеров выполняются параллельно
+        self._owns_session = http is None
+        self.session = http or http_pool(self.base_url, max_connections, max_keepalive_connections)
+        # Одинаковые одновременные GET-запросы уходят в сеть один раз
+        self._flights = SingleFlight()
+        # Кэш GET-ответов; счета и заявки по умолчанию не кэшируются (TTL 0)
+        self.cache_ttls = ttls_from_env(cache_ttls)
+        self._cache = TTLCache(
+            max_entries=cache_max_entries if cache_max_entries is not None
+            else int(os.getenv("FINAM_CACHE_MAX_ENTRIES", "4096")),
+        )
+        # Второй уровень кэша, общий для воркеров: только рыночные и справочные данные этого же токена
+        # (ответы по счетам и заявкам туда не попадают)
+        self.backplane = backplane if backplane is not None else shared_backplane()
+        self.tenant = tenant_id(self.access_token)
+        # Спаны кэша и запросов в сеть внутри трассы вызова инструмента
+        self.tracer = tracer or shared_tracer()
+        # Исторические свечи не меняются: храним их на диске и догружаем только пропуски
+        self.bar_store = BarStore(bar_store_dir) if os.getenv("FINAM_BAR_STORE", "1") != "0" else None
+        # Общий лимит на параллельные запросы свечей, чтобы длинная загрузка истории не занимала весь пул
+        self._bars_semaphore = asyncio.Semaphore(bars_concurrency or int(os.getenv("FINAM_BARS_CONCURRENCY", "4")))
+        self.batch_concurrency = batch_concurrency or int(os.getenv("FINAM_BATCH_CONCURRENCY", "8"))
+        # Лимиты API по классам эндпоинтов и приоритеты (заявки вперёд истории свечей)
+        self.scheduler = RequestScheduler()
+        self.rate_limit_retries = rate_limit_retries if rate_limit_retries is not None \
+            else int(os.getenv("FINAM_RATE_LIMIT_RETRIES", "5"))
+        self.timeouts = timeouts_from_env(timeouts)
+        self.retry_policy = RetryPolicy(retries=retries if retries is not None else int(os.getenv("FINAM_RETRIES", "2")))
+        self.hedge_requests = hedge_requests if hedge_requests is not None \
+            else os.getenv("FINAM_HEDGE_REQUESTS", "0") == "1"
+        self.latency = LatencyTracker()
+        self.resilience_stats = ResilienceStats()
+        # Стаканы, ленты и индекс инструментов живут в памяти процесса, в backplane их нет.
+        # Стакан пересобирается из каждого полного снимка, а индекс — из /v1/assets: оба ответа
+        # кэшируются в backplane, поэтому любой воркер вернёт то же самое. Лента же копит сделки
+        # только тех опросов, что прошли через этот процесс: при нескольких воркерах get_trade_flow
+        # видит полную историю, лишь если запросы арендатора попадают на один воркер (sticky routing
+        # по токену, см. FINAM_MCP_WORKERS в .env.example)
+        # Локальные стаканы по инструментам и ответы API, из которых они собраны
+        self.orderbooks: dict[str, LocalOrderBook] = {}
+        self._orderbook_sources: dict[str, dict[str, Any]] = {}
+        # Накопленные ленты сделок: каждый опрос последних сделок дополняет ленту инструмента
+        self.tape_capacity = int(os.getenv("FINAM_TAPE_CAPACITY", "10000"))
+        self.tapes: dict[str, TradeTape] = {}
+        self._tape_sources: dict[str, dict[str, Any]] = {}
+        # Индекс инструментов для resolve_symbol — один на процесс: снимок /v1/assets одинаков для всех токенов
+        self.symbols = symbols or shared_catalog()
+        # Расписания торгов и время сервера: вне сессии котировки и свечи кэшируются дольше
+        self.calendar = TradingCalendar()
+        self.clock_sync_interval = float(os.getenv("FINAM_CLOCK_SYNC_INTERVAL", "300"))
+        self._clock_checked: float | None = None
+        self._background: dict[str, asyncio.Task] = {}
+        # Рассчитанные индикаторы по (инструмент, таймфрейм, период, индикатор, параметры, первая и последняя свеча)
+        self._indicator_memo = TTLCache(max_entries=int(os.getenv("FINAM_INDICATOR_MEMO_ENTRIES", "512")))
+        # Аналитика портфеля: бенчмарк для бет по умолчанию и глубина истории, если начало не задано
+        self.portfolio_benchmark = os.getenv("FINAM_PORTFOLIO_BENCHMARK", "") or None
+        self.portfolio_lookback_days = float(os.getenv("FINAM_PORTFOLIO_LOOKBACK_DAYS", "365"))
+        # Безрисковая ставка для моделей опционов, доля годовых
+        self.risk_free_rate = float(os.getenv("FINAM_RISK_FREE_RATE", "0"))
+
+    async def __aenter__(self) -> "FinamAPIClient":
+        return self
+
+    async def __aexit__(self, *exc_info: object) -> None:
+        await self.aclose()
 
-    def register_tools(self, mcp: FastMCP):
-        @mcp.tool(
+    async def aclose(self) -> None:
+        """Остановить фоновые задачи и закрыть собственный пул соединений"""
+        for task in list(self._background.values()):
+            task.cancel()
+        if self._owns_session:
+            await self.session.aclose()
+
+    def stats(self) -> dict[str, Any]:
+        """Счётчики клиента (сколько запросов сэкономлено и т.п.)"""
+        return {
+            "coalescing": {**self._flights.stats.as_dict(), "inflight": self._flights.inflight},
+            "cache": {**self._cache.stats.as_dict(), "entries": len(self._cache)},
+            "shared_cache": self.backplane.snapshot() if self.backplane is not None else None,
+            "scheduler": self.scheduler.snapshot(),
+            "resilience": {
+                **self.resilience_stats.as_dict(),
+                "p95": {cls.value: self.latency.percentile(cls, 95) for cls in EndpointClass},
+            },
+        }
+
+    def register_tools(self, mcp: FastMCP,
+                       lease: Callable[[], contextlib.AbstractAsyncContextManager["FinamAPIClient"]] | None = None):
+        """
+        Зарегистрировать инструменты API в mcp
+
+        lease() выдаёт клиента на время одного вызова инструмента (например, клиента арендатора,
+        см. ClientRegistry.register_tools); без него все вызовы выполняет этот клиент.
+        """
+        current: contextvars.ContextVar[FinamAPIClient] = contextvars.ContextVar("client")
+        # Клиент текущего вызова инструмента
+        client = current.get
+
+        def tool(**kwargs: Any) -> Callable[[Callable], Callable]:
+            """
+            mcp.tool с метриками вызова; для инструментов без structured output результат
+            сразу кодируется в компактный JSON
+            """
+            def decorator(fn: Callable) -> Callable:
+                name = kwargs["name"]
+                encode = kwargs.get("structured_output") is False
+
+                @functools.wraps(fn)
+                async def observed(*args: Any, **kw: Any) -> Any:  # noqa: ANN401
+                    with track_tool(name) as call:
+                        async with lease() if lease is not None else contextlib.nullcontext(self) as leased:
+                            token = current.set(leased)
+                            try:
+                                result = await fn(*args, **kw)
+                            finally:
+                                current.reset(token)
+                        if isinstance(result, dict) and "error" in result:
+                            call.error = "api"
+                            annotate(error="api")
+                        if not encode:
+                            return result
+                        content = to_content(result)
+                        call.size = sum(len(c.text) for c in content)
+                        annotate(bytes=call.size)
+                        return content
+                return mcp.tool(**kwargs)(observed)
+            return decorator
+
+        @tool(
             name="get_quote",
             title="Котировка",
             description="получает последнюю котировку по инструменту (а именно: Символ инструмента, Цена последней сделки (то есть: Символ инструмента, Метка времени, Аск. 0 при отсутствии активного аска, Размер аска, Бид. 0 при отсутствии активного бида, Размер бида, Цена последней сделки, Размер последней сделки, Дневной объем и оборот сделок, Максимальная и минимальная дневная цена, Дневная цена закрытия, Изменение цены, Информация об опционе))",
             structured_output=False)
-        def _get_quote(args: QuoteRequest) -> QuoteResponse:
-            d = self.execute_request("GET", f"/v1/instruments/{args.symbol}/quotes/latest")
+        async def _get_quote(args: QuoteRequest) -> QuoteResponse | dict:
+            d = await client().get_quote(args.symbol)
+            if "error" in d:
+                return d
+            return converter(QuoteResponse)(d, lambda d: {
+                "symbol": d.get("symbol", args.symbol),
+                "quote": {"symbol": args.symbol, **d.get("quote", d)},
+            })
 
-            q = d.get("quote", d)
-            opt = q.get("option")
-            return QuoteResponse(
-                symbol=d.get("symbol", args.symbol),
-                quote=Quote(
-                    symbol=q.get("symbol", args.symbol),
-                    timestamp=datetime.fromisoformat(q["timestamp"]),
-                    ask=Decimal(q["ask"]) if q.get("ask") is not None else None,
-                    ask_size=Decimal(q["ask_size"]) if q.get("ask_size") is not None else None,
-                    bid=Decimal(q["bid"]) if q.get("bid") is not None else None,
-                    bid_size=Decimal(q["bid_size"]) if q.get("bid_size") is not None else None,
-                    last=Decimal(q["last"]) if q.get("last") is not None else None,
-                    last_size=Decimal(q["last_size"]) if q.get("last_size") is not None else None,
-                    volume=Decimal(q["volume"]) if q.get("volume") is not None else None,
-                    turnover=Decimal(q["turnover"]) if q.get("turnover") is not None else None,
-                    open=Decimal(q["open"]) if q.get("open") is not None else None,
-                    high=Decimal(q["high"]) if q.get("high") is not None else None,
-                    low=Decimal(q["low"]) if q.get("low") is not None else None,
-                    close=Decimal(q["close"]) if q.get("close") is not None else None,
-                    change=Decimal(q["change"]) if q.get("change") is not None else None,
-                    option=QuoteOption(
-                        **{k: (Decimal(v) if v is not None else None) for k, v in opt.items()}) if opt else None,
-                ),
-            )
-
-        @mcp.tool(
+        @tool(
             name="get_orderbook",
             title="Стакан",
             description="получает текущий стакан по инструменту (а именно: Символ инструмента, Стакан (то есть Уровни стакана))",
             structured_output=False)
-        def _get_orderbook(args: OrderBookRequest) -> OrderBookResponse:
-            d = self.execute_request("GET", f"/v1/instruments/{args.symbol}/orderbook")
-            rows = []
-            for r in d.get("orderbook", {}).get("rows", d.get("rows", [])):
-                rows.append(OrderBookRow(
-                    price=Decimal(r["price"]),
-                    sell_size=Decimal(r["sell_size"]),
-                    buy_size=Decimal(r["buy_size"]),
-                    action=OrderBookAction(int(r["action"])) if not isinstance(r["action"], int) else OrderBookAction(
-                        r["action"]),
-                    mpid=r.get("mpid"),
-                    timestamp=datetime.fromisoformat(r["timestamp"]),
-                ))
-            ob = OrderBook(rows=rows)
-            return OrderBookResponse(symbol=d.get("symbol", args.symbol), orderbook=ob)
-
-        @mcp.tool(
+        async def _get_orderbook(args: OrderBookRequest) -> OrderBookResponse | dict:
+            d = await client().get_orderbook(args.symbol, args.depth)
+            if "error" in d:
+                return d
+            return converter(OrderBookResponse)(d, lambda d: {
+                "symbol": d.get("symbol", args.symbol),
+                "orderbook": {"rows": d.get("orderbook", {}).get("rows", d.get("rows", []))},
+            })
+
+        @tool(
+            name="get_orderbook_summary",
+            title="Сводка по стакану",
+            description="получает лучшие цены, спред и depth уровней стакана с накопленным объемом (а именно: Символ инструмента, Лучший бид и аск, Спред, Середина спреда, Уровни спроса и предложения с объемом и накопленным объемом)",
+            structured_output=False)
+        async def _get_orderbook_summary(args: GetOrderbookArgs) -> OrderBookSummary | dict:
+            book = await client().get_local_orderbook(args.symbol)
+            if isinstance(book, dict):
+                return book
+            return OrderBookSummary.model_validate(book.summary(args.depth))
+
+        @tool(
+            name="get_quotes",
+            title="Котировки по списку инструментов",
+            description="получает котировки сразу по нескольким инструментам одной таблицей (а именно: Символ инструмента, Цена последней сделки, Бид, Аск, Размеры бида и аска, Изменение цены, Дневной объем, Метка времени, Ошибка)",
+            structured_output=False)
+        async def _get_quotes(args: QuotesRequest) -> dict:
+            return await client().get_quotes(args.symbols)
+
+        @tool(
+            name="get_orderbooks",
+            title="Стаканы по списку инструментов",
+            description="получает сводку стаканов сразу по нескольким инструментам одной таблицей (а именно: Символ инструмента, Лучший бид и аск, Спред, Середина спреда, Объем depth лучших уровней спроса и предложения, Ошибка)",
+            structured_output=False)
+        async def _get_orderbooks(args: OrderBooksRequest) -> dict:
+            return await client().get_orderbooks(args.symbols, args.depth)
+
+        @tool(
             name="get_candles",
             title="Свечи",
             description="получает исторические данные по инструменту (а именно: Символ инструмента, Агрегированная свеча (то есть: Метка времени, Цена открытия свечи, Максимальная цена свечи, Минимальная цена свечи, Цена закрытия свечи, Объём торгов за свечу в шт.))",
             structured_output=False,
         )
-        def _get_candles(args: BarsRequest) -> BarsResponse:
-            params = {"timeframe": args.timeframe.value}
-            if args.start: params["interval.start_time"] = args.start
-            if args.end: params["interval.end_time"] = args.end
-            d = self.execute_request("GET", f"/v1/instruments/{args.symbol}/bars", params=params)
-            bars = []
-            for b in d.get("bars", []):
-                bars.append(Bar(
-                    timestamp=datetime.fromisoformat(b["timestamp"]),
-                    open=Decimal(b["open"]),
-                    high=Decimal(b["high"]),
-                    low=Decimal(b["low"]),
-                    close=Decimal(b["close"]),
-                    volume=Decimal(b["volume"]),
-                ))
-            return BarsResponse(symbol=d.get("symbol", args.symbol), bars=bars)
-
-        @mcp.tool(
+        async def _get_candles(args: BarsRequest) -> BarsResponse | dict:
+            bars = await client().get_candles_columnar(args.symbol, args.timeframe, args.start, args.end)
+            if isinstance(bars, dict):
+                return bars
+            return bars.to_response()
+
+        @tool(
+            name="get_indicator",
+            title="Технический индикатор",
+            description="рассчитывает технический индикатор по свечам инструмента: sma, ema, rsi, macd, atr, bollinger (полосы Боллинджера) или volatility (годовая волатильность) (а именно: Символ инструмента, Индикатор и его параметры, Число свечей, Метка времени последней свечи, Сводка (последние значения и их интерпретация), Последние значения ряда)",
+            structured_output=False,
+        )
+        async def _get_indicator(args: IndicatorArgs) -> dict:
+            return await client().get_indicator(args.symbol, args.timeframe, args.indicator, args.params,
+                                            args.start, args.end, args.tail)
+
+        @tool(
+            name="get_technical_summary",
+            title="Сводка технических индикаторов",
+            description="рассчитывает все технические индикаторы с параметрами по умолчанию и возвращает их последние значения (а именно: Символ инструмента, Число свечей, Метка времени последней свечи, Для каждого индикатора (sma, ema, rsi, macd, atr, bollinger, volatility): последние значения и их интерпретация)",
+            structured_output=False,
+        )
+        async def _get_technical_summary(args: TechnicalSummaryArgs) -> dict:
+            return await client().get_technical_summary(args.symbol, args.timeframe, args.start, args.end)
+
+        @tool(
+            name="backtest_strategy",
+            title="Бэктест стратегии",
+            description="тестирует торговую стратегию на исторических свечах инструмента. Стратегия задается условиями входа и выхода над столбцами свечей (series), индикаторами (indicator с params и output) и константами (value), например вход: close crosses_above sma(period=50). Возвращает метрики (а именно: Совокупная доходность, Среднегодовая доходность (CAGR), Волатильность, VaR 95%, Коэффициент Шарпа, Максимальная просадка, Гладкость кривой капитала (R²), Число сделок, Доля времени в позиции, Доходность купить-и-держать) и кривую капитала",
+            structured_output=False,
+        )
+        async def _backtest_strategy(args: BacktestArgs) -> dict:
+            return await client().backtest_strategy(args.symbol, args.timeframe, args.strategy, args.start, args.end,
+                                                args.equity_points)
+
+        @tool(
             name="get_account",
             title="Счёт",
             description="получает информацию по конкретному аккаунту (а именно: Идентификатор аккаунта, Тип аккаунта, Статус аккаунта, Доступные средства плюс стоимость открытых позиций, Нереализованная прибыль, Позиции (для каждой отдельной позиции: Символ инструмента, Количество в шт, Средняя цена, Текущая цена, Поддерживающее гарантийное обеспечение, Прибыль или убыток за текущий день, Суммарная нереализованная прибыль или убыток (PnL) текущей позиции), Сумма собственных денежных средств на счете, доступная для торговли, Начальная маржа, Минимальная маржа, Тип портфеля для счетов на американских рынках, Тип портфеля для торговли на срочном рынке Московской Биржи)",
             structured_output=False,
         )
-        def _get_account(args: GetAccountArgs) -> Account:
-            d = self.get_account(args.account_id)
-            return Account.model_validate(d)
+        async def _get_account(args: GetAccountArgs) -> Account:
+            d = await client().get_account(args.account_id)
+            return converter(Account, memo_ttl=0)(d)
 
-        @mcp.tool(
+        @tool(
+            name="get_portfolio_analytics",
+            title="Риск портфеля",
+            description="рассчитывает риск портфеля по позициям счета на общих исторических свечах (а именно: Период и число доходностей, Символы позиций, Веса позиций (доля валовой экспозиции, шорт со знаком минус), Годовая волатильность каждой позиции, Годовая волатильность портфеля, VaR 95% портфеля за свечу, Валовая и чистая экспозиция, Бета позиций к портфелю, Вклад позиций в риск, Матрица корреляций, Годовая матрица ковариаций, Беты к бенчмарку, если он задан, Ошибки загрузки свечей по инструментам)",
+            structured_output=False,
+        )
+        async def _get_portfolio_analytics(args: PortfolioAnalyticsArgs) -> dict:
+            return await client().get_portfolio_analytics(args.account_id, args.timeframe, args.start, args.end,
+                                                      args.benchmark)
+
+        @tool(
             name="get_orders",
             title="Ордеры",
             description="получает список заявок для аккаунта (а именно: список заявок)",
         )
-        def _get_orders(args: GetOrdersArgs) -> dict:
-            d = self.get_orders(args.account_id)
+        async def _get_orders(args: GetOrdersArgs) -> dict:
+            d = await client().get_orders(args.account_id)
             return d
 
-        @mcp.tool(
+        @tool(
             name="get_order",
             title="Ордер",
             description="получает информацию о конкретном ордере (а именно: Идентификатор заявки, Идентификатор исполнения, Статус заявки)",
             structured_output=False,
         )
-        def _get_order(args: GetOrderArgs) -> Order:
-            d = self.get_order(args.account_id, args.order_id)
-            return Order.model_validate(d)
+        async def _get_order(args: GetOrderArgs) -> Order:
+            d = await client().get_order(args.account_id, args.order_id)
+            return converter(Order, memo_ttl=0)(d)
 
-        @mcp.tool(
+        @tool(
             name="create_order",
             title="Создать ордер",
             description="выставляет биржевую заявку",
             structured_output=False,
         )
-        def _create_order(args: PlaceOrderArgs) -> dict:
-            return self.place_order(args)
+        async def _create_order(args: PlaceOrderArgs) -> dict:
+            return await client().place_order(args)
 
-        @mcp.tool(
+        @tool(
             name="cancel_order",
             title="Отменить ордер",
             description="отменяет биржевую заявку",
         )
-        def _cancel_order(args: CancelOrderArgs) -> dict:
-            d = self.cancel_order(args.account_id, args.order_id)
+        async def _cancel_order(args: CancelOrderArgs) -> dict:
+            d = await client().cancel_order(args.account_id, args.order_id)
             return d
 
-        @mcp.tool(
+        @tool(
             name="get_trades",
             title="Сделки",
             description="получает историю по сделкам аккаунта (для каждой отдельной сделки: Идентификатор сделки, отправленный биржей; Идентификатор участника рынка; Метка времени; Цена сделки; Размер сделки; Сторона сделки (buy или sell))",
         )
-        def _get_trades(args: TradesArgs) -> dict:
-            d = self.get_trades(args.account_id, args.start, args.end)
+        async def _get_trades(args: TradesArgs) -> dict:
+            d = await client().get_trades(args.account_id, args.start, args.end)
             return d
 
-
-        @mcp.tool(
+        @tool(
             name="get_session_details",
             title="Сессия",
             description="получает информацию о токене сессии (а именно: Дата и время создания, Дата и время создания, Идентификаторы аккаунтов, Информация о доступе к рыночным данным (а именно: Уровень котировок, Задержка в минутах, Идентификатор биржи mic, Страна, Континент, Весь мир))",
             structured_output=False,
         )
-        def _get_session_details() -> SessionDetails:
-            d = self.get_session_details()
-            return SessionDetails.model_validate(d)
+        async def _get_session_details() -> SessionDetails:
+            d = await client().get_session_details()
+            return converter(SessionDetails, memo_ttl=0)(d)
 
-        @mcp.tool(
+        @tool(
             name="get_exchanges",
             title="Биржи",
             description="получает список доступных бирж, названия и mic коды (для каждой отдельной биржи: Идентификатор биржи mic, Наименование биржи)",
             structured_output=False,
         )
-        def _get_exchanges() -> Exchanges:
-            d = self.get_exchanges()
+        async def _get_exchanges() -> Exchanges:
+            d = await client().get_exchanges()
 
-            return Exchanges.model_validate(d)
+            return converter(Exchanges)(d)
 
-        @mcp.tool(
+        @tool(
             name="search_assets",
             title="Поиск инструментов",
             description="получает список доступных инструментов, их описание (для каждого отдельного инструмента: Символ инструмента ticker@mic, Идентификатор инструмента, Тикер инструмента, mic идентификатор биржи, Isin идентификатор инструмента, Тип инструмента, Наименование инструмента)",
             structured_output=False,
         )
-        def _search_assets(args: SearchAssetsArgs) -> Assets:
+        async def _search_assets(args: SearchAssetsArgs) -> Assets:
             params = {k: v for k, v in args.model_dump().items() if v is not None}
-            d = self.search_assets(**params)
-            return Assets.model_validate(d)
+            d = await client().search_assets(**params)
+            return converter(Assets)(d)
 
-        @mcp.tool(
+        @tool(
+            name="resolve_symbol",
+            title="Поиск символа инструмента",
+            description="находит символ инструмента (ticker@mic) по названию компании, тикеру или ISIN на русском или английском, в том числе по началу слова и с опечатками (а именно: Символ инструмента, Тикер, mic биржи, ISIN, Наименование, Тип инструмента, Оценка и способ совпадения)",
+            structured_output=False,
+        )
+        async def _resolve_symbol(args: ResolveSymbolArgs) -> SymbolMatches | dict:
+            matches = await client().resolve_symbol(args.query, args.limit, args.mic)
+            if isinstance(matches, dict):
+                return matches
+            return SymbolMatches.model_validate({"query": args.query, "matches": matches})
+
+        @tool(
             name="get_asset",
             title="Инструмент",
             description="получает информацию по конкретному инструменту (а именно: Код режима торгов, Идентификатор инструмента, Тикер инструмента, mic идентификатор биржи,  Isin идентификатор инструмента, Тип инструмента, Наименование инструмента, Кол-во десятичных знаков в цене, Минимальный шаг цены, Кол-во штук в лоте, Дата экспирации фьючерса, Валюта котировки)",
             structured_output=False,
         )
-        def _get_asset(args: GetAssetArgs) -> Asset:
-            d = self.get_asset(args.symbol)
-            return Asset.model_validate(d)
+        async def _get_asset(args: GetAssetArgs) -> Asset:
+            d = await client().get_asset(args.symbol)
+            return converter(Asset)(d)
 
-        @mcp.tool(
+        @tool(
             name="get_asset_params",
             title="Параметры инструмента",
             description="получает торговые параметры по инструменту (а именно: Символ инструмента, ID аккаунта для которого подбираются торговые параметры, Доступны ли торговые операции, Доступны ли операции в Лонг и Шорт (статус и сколько дней действует запрет),  Ставка риска для операций в Лонг и Шорт, Сумма обеспечения для поддержания позиций Лонг и Шорт, сколько на счету должно быть свободных денежных средств для открытия Лонг и Шорт позиций)",
             structured_output=False,
         )
-        def _get_asset_params(args: AssetParamsArgs) -> AssetParams:
-            d = self.get_asset_params(args.symbol, args.account_id)
-            return AssetParams.model_validate(d)
+        async def _get_asset_params(args: AssetParamsArgs) -> AssetParams:
+            d = await client().get_asset_params(args.symbol, args.account_id)
+            return converter(AssetParams)(d)
 
-        @mcp.tool(
+        @tool(
             name="get_asset_schedule",
             title="Календарь инструмента",
             description="получает расписание торгов для инструмента (а именно: Символ инструмента, Сессии инструмента (для каждой отдельной сессии: Тип сессии, Интервал сессии))",
             structured_output=False,
         )
-        def _get_asset_schedule(args: AssetScheduleArgs) -> AssetSchedule:
-            d = self.get_asset_schedule(args.symbol)
-            return AssetSchedule.model_validate(d)
+        async def _get_asset_schedule(args: AssetScheduleArgs) -> AssetSchedule:
+            d = await client().get_asset_schedule(args.symbol)
+            return converter(AssetSchedule)(d)
 
-        @mcp.tool(
+        @tool(
             name="get_asset_options",
             title="Опционы",
             description="получает цепочку опционов для базового актива (а именно: Символ базового актива опциона, Информация об опционе (для каждого отдельного инструмента: Символ инструмента, Тип инструмента, Лот, количество базового актива в инструменте, Дата старта торговли, Дата окончания торговли, Цена исполнения опциона, Множитель опциона, Дата начала экспирации, Дата окончания экспирации)) ",
             structured_output=False,
         )
-        def _get_asset_options(args: AssetOptionsArgs) -> AssetOptions:
-            d = self.get_asset_options(args.symbol)
-            return AssetOptions.model_validate(d)
+        async def _get_asset_options(args: AssetOptionsArgs) -> AssetOptions:
+            d = await client().get_asset_options(args.symbol)
+            return converter(AssetOptions)(d)
+
+        @tool(
+            name="get_option_chain",
+            title="Опционная доска",
+            description="получает опционную доску по базовому активу с котировками, подразумеваемой волатильностью и греками (если Finam их не прислал, они рассчитываются по Black-76 для опционов на фьючерсы или Black-Scholes для акций) (а именно: Символ и цена базового актива, Модель, Безрисковая ставка, Поверхность волатильности страйк × экспирация (вне-денежные опционы), Таблица серий: Символ, Экспирация, Страйк, Тип, Цена, Подразумеваемая волатильность, Delta, Gamma, Theta за день, Vega на 1 п.п., Rho на 1 п.п., Источник волатильности, Ошибки загрузки котировок)",
+            structured_output=False,
+        )
+        async def _get_option_chain(args: OptionChainArgs) -> dict:
+            return await client().get_option_chain(args.symbol, args.expirations, args.strike_range, args.model,
+                                               args.risk_free_rate)
 
-        @mcp.tool(
+        @tool(
             name="get_instrument_trades_latest",
             title="Последние сделки",
             description="получает список последних сделок по инструменту (а именно: Символ инструмента, Список последних сделок (для каждой отдельной сделки:  Идентификатор сделки, Идентификатор участника рынка, Метка времени, Цена сделки, Размер сделки, Сторона сделки (buy или sell)))",
             structured_output=False,
         )
-        def _get_instrument_trades_latest(args: LatestTradesRequest) -> LatestTradesResponse:
-            d = self.get_instrument_trades_latest(args.symbol)
-            trades = []
-            for t in d.get("trades", []):
-                trades.append(Trade(
-                    trade_id=t["trade_id"],
-                    mpid=t.get("mpid"),
-                    timestamp=datetime.fromisoformat(t["timestamp"]),
-                    price=Decimal(t["price"]),
-                    size=Decimal(t["size"]),
-                    side=TradeSide(t["side"]),
-                ))
-            return LatestTradesResponse(symbol=d.get("symbol", args.symbol), trades=trades)
-
-        @mcp.tool(
+        async def _get_instrument_trades_latest(args: LatestTradesRequest) -> LatestTradesResponse | dict:
+            d = await client().get_instrument_trades_latest(args.symbol)
+            if "error" in d:
+                return d
+            return converter(LatestTradesResponse)(d, lambda d: {
+                "symbol": d.get("symbol", args.symbol),
+                "trades": d.get("trades", []),
+            })
+
+        @tool(
+            name="get_trade_flow",
+            title="Поток сделок",
+            description="получает показатели потока сделок по накопленной ленте инструмента (а именно: Символ инструмента, Количество сделок, Время первой и последней сделки, Цена последней сделки, Объем, VWAP, Объем покупок и продаж, Дисбаланс покупок и продаж, Объем по интервалам времени)",
+            structured_output=False,
+        )
+        async def _get_trade_flow(args: TradeFlowArgs) -> TradeFlow | dict:
+            tape = await client().get_trade_tape(args.symbol)
+            if isinstance(tape, dict):
+                return tape
+            return TradeFlow.model_validate(tape.flow(args.window_seconds, args.bucket_seconds))
+
+        @tool(
             name="get_transactions",
             title="Транзакции",
             description="получает список транзакций аккаунта (для каждой отдельной транзакции: Идентификатор транзакции, Тип транзакции из TransactionCategory, Метка времени, Символ инструмента, Изменение в деньгах, Информация о сделке, Наименование транзакции)",
         )
-        def _get_transactions(args: TransactionsArgs) -> dict:
-            d = self.get_transactions(args.account_id, args.start, args.end)
+        async def _get_transactions(args: TransactionsArgs) -> dict:
+            d = await client().get_transactions(args.account_id, args.start, args.end)
             return d
 
-        @mcp.tool(
+        @tool(
             name="create_session",
             title="Создать сессию",
             description="получает JWT токен из API токена",
             structured_output=False,
         )
-        def _create_session(args: SessionCreateArgs) -> SessionToken:
+        async def _create_session(args: SessionCreateArgs) -> SessionToken:
             payload = {}
             if args.secret is not None:
                 payload["secret"] = args.secret
             if args.readonly is not None:
                 payload["readonly"] = args.readonly
-            d = self.create_session(payload)
-            return SessionToken.model_validate(d)
+            d = await client().create_session(payload)
+            return converter(SessionToken, memo_ttl=0)(d)
 
-    def execute_request(self, method: str, path: str, **kwargs: Any) -> dict[str, Any]:  # noqa: ANN401
+    async def execute_request(self, method: str, path: str, **kwargs: Any) -> dict[str, Any]:  # noqa: ANN401
         """
         Выполнить HTTP запрос к Finam TradeAPI
 
         Args:
             method: HTTP метод (GET, POST, DELETE и т.д.)
             path: Путь API (например, /v1/instruments/SBER@MISX/quotes/latest)
-            **kwargs: Дополнительные параметры для requests
+            **kwargs: Дополнительные параметры для httpx
 
         Returns:
-            Ответ API в виде словаря
+            Ответ API в виде словаря (или словарь с ключом "error" при ошибке).
+            Для GET ответ может быть общим для нескольких вызывающих — не изменяйте его.
+        """
+        with self.tracer.span(f"{method.upper()} {endpoint_route(path)}", endpoint_class=classify(path).value):
+            return await self._execute(method, path, **kwargs)
+
+    async def _execute(self, method: str, path: str, **kwargs: Any) -> dict[str, Any]:  # noqa: ANN401
+        if method.upper() != "GET":
+            return await self._send(method, path, **kwargs)
+
+        key = request_key(method, path, kwargs.get("params"))
+        endpoint_class = classify(path)
+        ttl = self.cache_ttls.get(endpoint_class, 0.0)
+        if endpoint_class in (EndpointClass.QUOTES, EndpointClass.BARS):
+            ttl = self.stretch_for_session(symbol_from_path(path), ttl)
+        if ttl > 0:
+            cached = self._cache.get(key)
+            if cached is not None:
+                annotate(cache="hit")
+                return cached
+
+        shared = ttl > 0 and self.backplane is not None and endpoint_class in SHARED_CLASSES
+
+        async def fetch() -> dict[str, Any]:
+            if shared:
+                hit = await self._shared_get(key)
+                if hit is not None:
+                    annotate(cache="shared")
+                    data, left = hit
+                    self._cache.set(key, data, min(ttl, left))
+                    return data
+            data = await self._send(method, path, **kwargs)
+            if "error" not in data:
+                self._cache.set(key, data, ttl)
+                if shared:
+                    await self._shared_set(key, data, ttl)
+            return data
+
+        # Вызов, который дождался чужого запроса, не имеет своих спанов сети: они в трассе первого вызова
+        annotate(cache="coalesced" if self._flights.running(key) else "miss")
+        return await self._flights.do(key, fetch)
+
+    async def _shared_get(self, key: tuple) -> tuple[dict[str, Any], float] | None:
+        try:
+            hit = await self.backplane.get(shared_key(self.tenant, key))
+        except Exception:
+            self.backplane.stats.errors += 1
+            logger.warning("Общий кэш недоступен", exc_info=True)
+            return None
+        return None if hit is None else (codec.loads(hit[0]), hit[1])
+
+    async def _shared_set(self, key: tuple, data: dict[str, Any], ttl: float) -> None:
+        try:
+            await self.backplane.set(shared_key(self.tenant, key), codec.dumps(data), ttl)
+        except Exception:
+            self.backplane.stats.errors += 1
+            logger.warning("Общий кэш недоступен", exc_info=True)
+
+    def stretch_for_session(self, symbol: str | None, base: float) -> float:
+        """
+        TTL или период опроса рыночных данных инструмента с учётом торговой сессии
 
-        Raises:
-            requests.HTTPError: Если запрос завершился с ошибкой
+        Расписание инструмента и время сервера подгружаются в фоне: пока их нет,
+        возвращается base.
         """
-        url = f"{self.base_url}{path}"
+        if symbol is None or base <= 0:
+            return base
+        if self.calendar.needs_schedule(symbol):
+            self._in_background(f"schedule:{symbol}", self._load_schedule(symbol))
+        if self._clock_checked is None or time.monotonic() - self._clock_checked > self.clock_sync_interval:
+            self._clock_checked = time.monotonic()
+            self._in_background("clock", self._sync_clock())
+        return self.calendar.stretch(symbol, base)
+
+    def _in_background(self, name: str, coro: Any) -> None:  # noqa: ANN401
+        """Запустить задачу, если задача с таким именем ещё не выполняется"""
+        if name in self._background:
+            coro.close()
+            return
+        # Задача переживает запрос, который её запустил, и не входит в его трассу
+        task = asyncio.get_running_loop().create_task(coro, context=detached())
+        self._background[name] = task
+        task.add_done_callback(lambda _: self._background.pop(name, None))
+
+    async def _load_schedule(self, symbol: str) -> None:
+        self.calendar.set_schedule(symbol, await self.get_asset_schedule(symbol))
 
+    async def _sync_clock(self) -> None:
+        sent = now_ns()
+        d = await self.get_clock()
+        if "error" not in d:
+            self.calendar.sync_clock(d, sent, now_ns())
+
+    async def _send(self, method: str, path: str, **kwargs: Any) -> dict[str, Any]:  # noqa: ANN401
+        """
+        Отправить запрос в сеть без схлопывания
+
+        GET-запросы повторяются при сетевых ошибках и 5xx и при необходимости хеджируются;
+        остальные методы отправляются один раз (кроме повторов на 429, см. _attempt).
+        """
+        endpoint_class = classify(path)
+        idempotent = method.upper() == "GET"
+        attempts = self.retry_policy.retries + 1 if idempotent else 1
         try:
-            response = self.session.request(method, url, timeout=30, **kwargs)
+            for attempt in range(attempts):
+                is_last = attempt + 1 == attempts
+                try:
+                    if idempotent and self.hedge_requests:
+                        response = await self._hedged(method, path, endpoint_class, **kwargs)
+                    else:
+                        response = await self._attempt(method, path, endpoint_class, **kwargs)
+                except httpx.TransportError:
+                    if is_last:
+                        raise
+                else:
+                    if is_last or response.status_code not in RETRYABLE_STATUSES:
+                        break
+                self.resilience_stats.retries += 1
+                await asyncio.sleep(self.retry_policy.delay(attempt))
+
             response.raise_for_status()
 
             # Если ответ пустой (например, для DELETE)
             if not response.content:
                 return {"status": "success", "message": "Operation completed"}
 
-            return response.json()
+            return codec.loads(response.content)
 
-        except requests.exceptions.HTTPError as e:
+        except httpx.HTTPStatusError as e:
             # Пытаемся извлечь детали ошибки из ответа
-            error_detail = {"error": str(e), "status_code": e.response.status_code if e.response else None}
+            error_detail = {"error": str(e), "status_code": e.response.status_code}
 
             try:
-                if e.response and e.response.content:
-                    error_detail["details"] = e.response.json()
+                if e.response.content:
+                    error_detail["details"] = codec.loads(e.response.content)
             except Exception:
-                error_detail["details"] = e.response.text if e.response else None
+                error_detail["details"] = e.response.text
 
             return error_detail
 
         except Exception as e:
             return {"error": str(e), "type": type(e).__name__}
 
+    async def _attempt(self, method: str, path: str, endpoint_class: EndpointClass,
+                       sent: asyncio.Event | None = None, **kwargs: Any) -> httpx.Response:  # noqa: ANN401
+        """
+        Одна попытка запроса с таймаутом класса эндпоинта
+
+        Запрос ждёт своей очереди в планировщике; на 429 планировщик замедляется,
+        и запрос повторяется (API его не выполнил, поэтому это безопасно и для заявок).
+        sent выставляется, когда запрос прошёл очередь и ушёл в сеть.
+        """
+        route = endpoint_route(path)
+        for attempt in itertools.count():
+            with self.tracer.span(f"http {method} {route}") as span:
+                queued = time.perf_counter()
+                await self.scheduler.acquire(endpoint_class)
+                if sent is not None:
+                    sent.set()
+                started = time.perf_counter()
+                API_INFLIGHT.inc((endpoint_class,))
+                try:
+                    response = await self.session.request(method, path, headers=self._headers,
+                                                          timeout=self.timeouts[endpoint_class], **kwargs)
+                except httpx.TransportError as e:
+                    API_RESPONSES.inc((method, route, type(e).__name__))
+                    raise
+                finally:
+                    API_INFLIGHT.dec((endpoint_class,))
+                API_DURATION.observe((method, route), time.perf_counter() - started)
+                API_RESPONSES.inc((method, route, str(response.status_code)))
+                API_RESPONSE_BYTES.observe((route,), len(response.content))
+                if span is not None:
+                    # Ожидание в очереди планировщика (лимиты API) отдельно от времени в сети
+                    span.set(status=response.status_code, bytes=len(response.content),
+                             queued_ms=round((started - queued) * 1000, 1), attempt=attempt)
+            if response.status_code != httpx.codes.TOO_MANY_REQUESTS:
+                self.latency.record(endpoint_class, time.perf_counter() - started)
+                self.scheduler.on_success(endpoint_class)
+                return response
+            self.scheduler.on_rate_limited(endpoint_class, _retry_after(response))
+            if attempt >= self.rate_limit_retries:
+                return response
+
+    async def _hedged(self, method: str, path: str, endpoint_class: EndpointClass,
+                      **kwargs: Any) -> httpx.Response:  # noqa: ANN401
+        """Попытка GET с дубликатом, если основной запрос не ответил за p95 своего класса"""
+        sent = asyncio.Event()
+        primary = asyncio.ensure_future(self._attempt(method, path, endpoint_class, sent, **kwargs))
+        hedge_after = self.latency.percentile(endpoint_class, 95)
+        if hedge_after is None:
+            return await primary
+        # Время в очереди планировщика не считается: p95 меряется от отправки запроса
+        sent_wait = asyncio.ensure_future(sent.wait())
+        await asyncio.wait({primary, sent_wait}, return_when=asyncio.FIRST_COMPLETED)
+        sent_wait.cancel()
+        done, _ = await asyncio.wait({primary}, timeout=hedge_after)
+        # Дубликат не отправляем, если лимит запросов и так исчерпан
+        if done or self.scheduler.waiting:
+            return await primary
+
+        self.resilience_stats.hedges += 1
+        backup = asyncio.ensure_future(self._attempt(method, path, endpoint_class, **kwargs))
+        pending = {primary, backup}
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None and task.result().status_code < 500:
+                        if task is backup:
+                            self.resilience_stats.hedge_wins += 1
+                        return task.result()
+            # Обе попытки неудачны — отдаём результат последней (ответ или исключение)
+            return task.result()
+        finally:
+            for task in pending:
+                task.cancel()
+
     # Удобные методы для частых операций
 
-    def get_quote(self, symbol: str) -> dict[str, Any]:
+    async def get_quote(self, symbol: str) -> dict[str, Any]:
         """Получить текущую котировку инструмента"""
-        return self.execute_request("GET", f"/v1/instruments/{symbol}/quotes/latest")
+        return await self.execute_request("GET", f"/v1/instruments/{symbol}/quotes/latest")
+
+    async def get_orderbook(self, symbol: str, depth: int | None = None) -> dict[str, Any]:
+        """Получить биржевой стакан; depth — только столько лучших уровней с каждой стороны"""
+        if depth is None:
+            return await self.execute_request("GET", f"/v1/instruments/{symbol}/orderbook")
+        book = await self.get_local_orderbook(symbol)
+        if isinstance(book, dict):
+            return book
+        return {"symbol": symbol, "orderbook": {"rows": book.to_rows(depth)}}
+
+    async def get_local_orderbook(self, symbol: str) -> LocalOrderBook | dict[str, Any]:
+        """
+        Локальный стакан инструмента, обновлённый по последнему ответу API (или словарь с ошибкой)
 
-    def get_orderbook(self, symbol: str) -> dict[str, Any]:
-        """Получить биржевой стакан"""
-        return self.execute_request("GET", f"/v1/instruments/{symbol}/orderbook")
+        Снимок из кэша ответов повторно не разбирается: стакан пересобирается,
+        только когда от API пришёл новый ответ.
+        """
+        d = await self.execute_request("GET", f"/v1/instruments/{symbol}/orderbook")
+        if "error" in d:
+            return d
+        book = self.orderbooks.get(symbol)
+        if book is None:
+            book = self.orderbooks[symbol] = LocalOrderBook(symbol)
+        if self._orderbook_sources.get(symbol) is not d:
+            book.load_snapshot(d.get("orderbook", {}).get("rows", d.get("rows", [])))
+            self._orderbook_sources[symbol] = d
+        return book
+
+    async def _gather_symbols(self, fn: Callable[[str], Any], symbols: list[str]) -> dict[str, Any]:
+        """fn по каждому инструменту (без повторов), не больше batch_concurrency одновременно"""
+        semaphore = asyncio.Semaphore(self.batch_concurrency)
+        unique = list(dict.fromkeys(symbols))
+
+        async def one(symbol: str) -> Any:  # noqa: ANN401
+            async with semaphore:
+                return await fn(symbol)
+
+        return dict(zip(unique, await asyncio.gather(*(one(s) for s in unique)), strict=True))
 
-    def get_candles(self, symbol: str, timeframe: TimeFrame, start: str | None = None,
+    async def get_quotes(self, symbols: list[str]) -> dict[str, Any]:
+        """Котировки по нескольким инструментам одной таблицей: {"columns": [...], "rows": [[...], ...]}"""
+        columns = ["symbol", "last", "bid", "ask", "bid_size", "ask_size", "change", "volume", "timestamp", "error"]
+        rows = []
+        for symbol, d in (await self._gather_symbols(self.get_quote, symbols)).items():
+            if "error" in d:
+                rows.append([symbol, *[None] * (len(columns) - 2), d["error"]])
+                continue
+            q = d.get("quote", d)
+            rows.append([symbol, *(q.get(c) for c in columns[1:-1]), None])
+        return {"columns": columns, "rows": rows}
+
+    async def get_orderbooks(self, symbols: list[str], depth: int = 10) -> dict[str, Any]:
+        """Сводка стаканов по нескольким инструментам одной таблицей; bid_volume/ask_volume — объём depth лучших уровней"""
+        columns = ["symbol", "best_bid", "best_ask", "spread", "mid", "bid_volume", "ask_volume", "error"]
+        rows = []
+        for symbol, book in (await self._gather_symbols(self.get_local_orderbook, symbols)).items():
+            if isinstance(book, dict):
+                rows.append([symbol, *[None] * (len(columns) - 2), book["error"]])
+                continue
+            bids, asks = book.depth(depth)
+            rows.append([
+                symbol, bids[0][0] if bids else None, asks[0][0] if asks else None, book.spread(), book.mid(),
+                sum(size for _, size in bids), sum(size for _, size in asks), None,
+            ])
+        return {"columns": columns, "rows": rows}
+
+    async def get_candles(self, symbol: str, timeframe: TimeFrame, start: str | None = None,
                     end: str | None = None) -> dict:
+        """Получить исторические свечи в формате ответа API (см. get_candles_columnar)"""
+        bars = await self.get_candles_columnar(symbol, timeframe, start, end)
+        return bars if isinstance(bars, dict) else bars.to_payload()
+
+    async def get_candles_columnar(self, symbol: str, timeframe: TimeFrame, start: str | None = None,
+                                   end: str | None = None) -> ColumnarBars | dict[str, Any]:
+        """
+        Получить исторические свечи в колоночном виде (или словарь с ошибкой)
+
+        Если задано начало периода, ответ собирается из локального хранилища,
+        а из API загружаются только отсутствующие в нём интервалы. Если пропуски целиком
+        покрыты более мелким таймфреймом, свечи строятся из него и сохраняются в хранилище.
+        """
+        timeframe = TimeFrame(timeframe)
+        if self.bar_store is None or not start:
+            return await self._fetch_candles(symbol, timeframe, start, end)
+
+        start_ns = to_ns(start)
+        end_ns = to_ns(end) if end else now_ns()
+        # Хранилище читает и пишет файлы под блокировкой — не в потоке event loop
+        gaps = await asyncio.to_thread(self.bar_store.missing, symbol, timeframe, start_ns, end_ns)
+        if gaps and await asyncio.to_thread(self._resample_from_store, symbol, timeframe, gaps):
+            gaps = []
+
+        # Незавершённая свеча ещё может измениться — её интервал не отмечаем как загруженный
+        complete_ns = now_ns() - TIMEFRAME_NS[timeframe]
+        results = await asyncio.gather(*(
+            self._fetch_candles(symbol, timeframe, to_iso(gap_start), to_iso(gap_end)) for gap_start, gap_end in gaps
+        ))
+        for (gap_start, gap_end), bars in zip(gaps, results, strict=True):
+            if isinstance(bars, dict):
+                return bars
+            await asyncio.to_thread(self.bar_store.write, symbol, timeframe, bars.to_array(),
+                                    gap_start, min(gap_end, complete_ns))
+
+        stored = await asyncio.to_thread(self.bar_store.read, symbol, timeframe, start_ns, end_ns)
+        return ColumnarBars.from_array(symbol, stored)
+
+    def _resample_from_store(self, symbol: str, timeframe: TimeFrame, gaps: list[tuple[int, int]]) -> bool:
+        """
+        Заполнить пропуски timeframe свечами из более мелкого таймфрейма, загруженного в хранилище
+
+        Свечи размечаются так же, как уже сохранённые свечи API этого таймфрейма; пока таких нет,
+        разметка неизвестна и пропуски загружаются из API. Возвращает True, если заполнены все пропуски.
+        """
+        sample = self.bar_store.last_ts(symbol, timeframe)
+        if sample is None:
+            return False
+        offset = native_offset_ns(sample, timeframe)
+        now = now_ns()
+        filled = []
+        for gap_start, gap_end in gaps:
+            # Свечи с началом в [gap_start, gap_end) — ровно свечи [first, until)
+            first = int(bucket_starts(np.array([gap_start]), timeframe, offset)[0])
+            if first < gap_start:
+                first = next_bucket_start(first, timeframe, offset)
+            last = int(bucket_starts(np.array([gap_end - 1]), timeframe, offset)[0])
+            until = next_bucket_start(last, timeframe, offset)
+            for source in RESAMPLE_SOURCES.get(timeframe, []):
+                # Для текущей (незавершённой) свечи достаточно того, что уже есть в хранилище
+                if first >= until or not self.bar_store.missing(symbol, source, first,
+                                                                min(until, now - TIMEFRAME_NS[source])):
+                    filled.append((gap_start, gap_end, source, first, until))
+                    break
+            else:
+                return False
+        for gap_start, gap_end, source, first, until in filled:
+            bars = resample(self.bar_store.read(symbol, source, first, until), timeframe, offset)
+            # Незавершённая свеча ещё может измениться — её интервал не отмечаем как загруженный
+            self.bar_store.write(symbol, timeframe, bars, gap_start, min(gap_end, now - TIMEFRAME_NS[timeframe]))
+        return True
+
+    async def _fetch_candles(self, symbol: str, timeframe: TimeFrame, start: str | None = None,
+                             end: str | None = None) -> ColumnarBars | dict[str, Any]:
+        """
+        Загрузить свечи из API
+
+        Длинный интервал делится на куски допустимой для таймфрейма длины (CHUNK_SPAN_NS),
+        которые загружаются параллельно (не более bars_concurrency одновременно) и склеиваются по порядку.
+        """
+        if not start:
+            return await self._fetch_candles_chunk(symbol, timeframe, start, end)
+
+        chunks = split_interval(to_ns(start), to_ns(end) if end else now_ns(), CHUNK_SPAN_NS[timeframe])
+        if len(chunks) == 1:
+            return await self._fetch_candles_chunk(symbol, timeframe, start, end)
+
+        results = await asyncio.gather(*(
+            self._fetch_candles_chunk(symbol, timeframe, to_iso(chunk_start), to_iso(chunk_end))
+            for chunk_start, chunk_end in chunks
+        ))
+        for bars in results:
+            if isinstance(bars, dict):
+                return bars
+        # Свеча на границе кусков может прийти дважды — concat убирает повторы
+        return ColumnarBars.concat(symbol, results)
+
+    async def _fetch_candles_chunk(self, symbol: str, timeframe: TimeFrame, start: str | None = None,
+                                   end: str | None = None) -> ColumnarBars | dict[str, Any]:
+        """Загрузить свечи из API одним запросом"""
         params = {"timeframe": timeframe.value}
-        if start: params["interval.start_time"] = start
-        if end: params["interval.end_time"] = end
-        return self.execute_request("GET", f"/v1/instruments/{symbol}/bars", params=params)
+        if start:
+            params["interval.start_time"] = start
+        if end:
+            params["interval.end_time"] = end
+        async with self._bars_semaphore:
+            d = await self.execute_request("GET", f"/v1/instruments/{symbol}/bars", params=params)
+        if "error" in d:
+            return d
+        return ColumnarBars.from_payload(d, symbol)
+
+    def _indicator(self, bars: ColumnarBars, key: tuple, indicator: Indicator,
+                   params: dict[str, float]) -> tuple[dict[str, np.ndarray], dict[str, Any]]:
+        """Ряды и сводка индикатора; повторный расчёт по тем же свечам берётся из памяти"""
+        # Последняя свеча может быть незавершённой и меняться без новой метки времени — её OHLCV входят в ключ
+        last = ((int(bars.ts[0]), int(bars.ts[-1]), *(float(getattr(bars, name)[-1]) for name in OHLCV))
+                if len(bars) else ())
+        key = (*key, indicator.value, tuple(sorted(params.items())), len(bars), *last)
+        memo = self._indicator_memo.get(key)
+        if memo is None:
+            series = compute(bars, indicator, params)
+            memo = (series, summarize(bars, indicator, series))
+            self._indicator_memo.set(key, memo, float("inf"))
+        return memo
+
+    async def get_indicator(self, symbol: str, timeframe: TimeFrame, indicator: Indicator,
+                            params: dict[str, float] | None = None, start: str | None = None,
+                            end: str | None = None, tail: int = 20) -> dict[str, Any]:
+        """Индикатор по свечам: сводка и последние tail значений таблицей {"columns", "rows"}"""
+        indicator = Indicator(indicator)
+        try:
+            params = resolve_params(indicator, params, timeframe)
+        except ValueError as e:
+            return {"error": str(e)}
+        bars = await self.get_candles_columnar(symbol, timeframe, start, end)
+        if isinstance(bars, dict):
+            return bars
+        series, summary = self._indicator(bars, (symbol, int(timeframe), start, end), indicator, params)
+        last = bars.tail(tail)
+        columns = [np.where(np.isnan(v[len(bars) - len(last):]), None, v[len(bars) - len(last):]).tolist()
+                   for v in series.values()]
+        return {
+            "symbol": symbol,
+            "indicator": indicator.value,
+            "params": params,
+            "bars": len(bars),
+            "last_timestamp": to_iso(int(bars.ts[-1])) if len(bars) else None,
+            "summary": summary,
+            "columns": ["timestamp", *series],
+            "rows": [list(row) for row in zip(last.iso_timestamps(), *columns, strict=True)],
+        }
+
+    async def get_technical_summary(self, symbol: str, timeframe: TimeFrame, start: str | None = None,
+                                    end: str | None = None) -> dict[str, Any]:
+        """Сводки всех индикаторов с параметрами по умолчанию по одним и тем же свечам"""
+        bars = await self.get_candles_columnar(symbol, timeframe, start, end)
+        if isinstance(bars, dict):
+            return bars
+        key = (symbol, int(timeframe), start, end)
+        return {
+            "symbol": symbol,
+            "bars": len(bars),
+            "last_timestamp": to_iso(int(bars.ts[-1])) if len(bars) else None,
+            "indicators": {
+                indicator.value: self._indicator(bars, key, indicator, resolve_params(indicator, None, timeframe))[1]
+                for indicator in Indicator
+            },
+        }
+
+    async def backtest_strategy(self, symbol: str, timeframe: TimeFrame, strategy: StrategySpec | dict[str, Any],
+                                start: str, end: str | None = None, equity_points: int = 100) -> dict[str, Any]:
+        """Бэктест стратегии по свечам из локального хранилища (см. run_backtest)"""
+        strategy = StrategySpec.model_validate(strategy)
+        bars = await self.get_candles_columnar(symbol, timeframe, start, end)
+        if isinstance(bars, dict):
+            return bars
+        try:
+            return run_backtest(bars, strategy, TimeFrame(timeframe), equity_points)
+        except ValueError as e:
+            return {"error": str(e)}
 
-    def get_account(self, account_id: str) -> dict[str, Any]:
+    async def get_account(self, account_id: str) -> dict[str, Any]:
         """Получить информацию о счете"""
-        return self.execute_request("GET", f"/v1/accounts/{account_id}")
+        return await self.execute_request("GET", f"/v1/accounts/{account_id}")
+
+    async def get_portfolio_analytics(self, account_id: str, timeframe: TimeFrame = TimeFrame.TIME_FRAME_D,
+                                      start: str | None = None, end: str | None = None,
+                                      benchmark: str | None = None) -> dict[str, Any]:
+        """
+        Риск портфеля счета (см. portfolio_risk)
+
+        Свечи позиций и бенчмарка загружаются одновременно; инструменты, по которым свечи
+        получить не удалось, исключаются из расчёта и перечисляются в errors.
+        """
+        account = await self.get_account(account_id)
+        if "error" in account:
+            return account
+        timeframe = TimeFrame(timeframe)
+        start = start or to_iso(now_ns() - int(self.portfolio_lookback_days * 86400 * NS))
+        benchmark = benchmark or self.portfolio_benchmark
+        positions = [p for p in Account.model_validate(account).positions if p.quantity]
+        symbols = [p.symbol for p in positions]
+        if not symbols:
+            return {"error": "На счете нет открытых позиций"}
+
+        fetched = await self._gather_symbols(
+            lambda symbol: self.get_candles_columnar(symbol, timeframe, start, end),
+            [*symbols, benchmark] if benchmark else symbols,
+        )
+        errors = {s: r["error"] for s, r in fetched.items() if isinstance(r, dict)}
+        errors.update({s: "Нет свечей за период" for s, r in fetched.items() if not isinstance(r, dict) and not len(r)})
+        bars = {s: fetched[s] for s in symbols if s not in errors}
+        if not bars:
+            return {"error": "Не удалось загрузить свечи ни по одной позиции", "errors": errors}
+
+        values = {}
+        for p in positions:
+            if p.symbol in bars:
+                price = p.current_price or float(bars[p.symbol].close[-1])
+                values[p.symbol] = values.get(p.symbol, 0.0) + p.quantity * price
+        try:
+            result = portfolio_risk(bars, values, periods_per_year(timeframe),
+                                    fetched[benchmark] if benchmark and benchmark not in errors else None)
+        except ValueError as e:
+            return {"error": str(e), "errors": errors}
+        return {"account_id": account_id, "benchmark": benchmark if benchmark not in errors else None,
+                **result, "errors": errors}
 
-    def get_orders(self, account_id: str) -> dict[str, Any]:
+    async def get_orders(self, account_id: str) -> dict[str, Any]:
         """Получить список ордеров"""
-        return self.execute_request("GET", f"/v1/accounts/{account_id}/orders")
+        return await self.execute_request("GET", f"/v1/accounts/{account_id}/orders")
 
-    def get_order(self, account_id: str, order_id: str) -> dict[str, Any]:
+    async def get_order(self, account_id: str, order_id: str) -> dict[str, Any]:
         """Получить информацию об ордере"""
-        return self.execute_request("GET", f"/v1/accounts/{account_id}/orders/{order_id}")
+        return await self.execute_request("GET", f"/v1/accounts/{account_id}/orders/{order_id}")
 
     # def create_order(self, account_id: str, order_data: dict[str, Any]) -> dict[str, Any]:
     #     """Создать новый ордер"""
     #     return self.execute_request("POST", f"/v1/accounts/{account_id}/orders", json=order_data)
 
-    def cancel_order(self, account_id: str, order_id: str) -> dict[str, Any]:
+    async def cancel_order(self, account_id: str, order_id: str) -> dict[str, Any]:
         """Отменить ордер"""
-        return self.execute_request("DELETE", f"/v1/accounts/{account_id}/orders/{order_id}")
+        return await self.execute_request("DELETE", f"/v1/accounts/{account_id}/orders/{order_id}")
 
-    def get_trades(self, account_id: str, start: str | None = None, end: str | None = None) -> dict[str, Any]:
+    async def get_trades(self, account_id: str, start: str | None = None, end: str | None = None) -> dict[str, Any]:
         """Получить историю сделок"""
         params = {}
         if start:
             params["interval.start_time"] = start
         if end:
             params["interval.end_time"] = end
-        return self.execute_request("GET", f"/v1/accounts/{account_id}/trades", params=params)
+        return await self.execute_request("GET", f"/v1/accounts/{account_id}/trades", params=params)
 
-    def get_session_details(self) -> dict[str, Any]:
+    async def get_session_details(self) -> dict[str, Any]:
         """Получить детали текущей сессии"""
-        return self.execute_request("POST", "/v1/sessions/details")
+        return await self.execute_request("POST", "/v1/sessions/details")
 
-    def get_exchanges(self) -> dict[str, Any]:
+    async def get_exchanges(self) -> dict[str, Any]:
         """Список бирж."""
-        return self.execute_request("GET", "/v1/exchanges")
+        return await self.execute_request("GET", "/v1/exchanges")
 
-    def search_assets(self, **params: Any) -> dict[str, Any]:
+    async def search_assets(self, **params: Any) -> dict[str, Any]:
         """Поиск инструментов."""
-        return self.execute_request("GET", "/v1/assets", params=params or None)
+        return await self.execute_request("GET", "/v1/assets", params=params or None)
 
-    def get_asset(self, symbol: str) -> dict[str, Any]:
+    async def resolve_symbol(self, query: str, limit: int = 5, mic: str | None = None) -> list[dict[str, Any]] | dict[str, Any]:
+        """Найти инструменты по названию, тикеру или ISIN (см. SymbolIndex.resolve)"""
+        # Если индекс ещё не загружен (или загрузка не удалась), его загружает этот клиент
+        error = await self.symbols.ready(self.search_assets)
+        if error is not None:
+            return error
+        return self.symbols.index.resolve(query, limit, mic)
+
+    async def get_asset(self, symbol: str) -> dict[str, Any]:
         """Информация об инструменте."""
-        return self.execute_request("GET", f"/v1/assets/{symbol}")
+        return await self.execute_request("GET", f"/v1/assets/{symbol}")
 
-    def get_asset_params(self, symbol: str, account_id: str) -> dict[str, Any]:
+    async def get_asset_params(self, symbol: str, account_id: str) -> dict[str, Any]:
         """Параметры инструмента для указанного счёта."""
-        return self.execute_request("GET", f"/v1/assets/{symbol}/params", params={"account_id": account_id})
+        return await self.execute_request("GET", f"/v1/assets/{symbol}/params", params={"account_id": account_id})
 
-    def get_asset_schedule(self, symbol: str) -> dict[str, Any]:
+    async def get_asset_schedule(self, symbol: str) -> dict[str, Any]:
         """Расписание торгов по инструменту."""
-        return self.execute_request("GET", f"/v1/assets/{symbol}/schedule")
+        return await self.execute_request("GET", f"/v1/assets/{symbol}/schedule")
 
-    def get_asset_options(self, symbol: str) -> dict[str, Any]:
+    async def get_asset_options(self, symbol: str) -> dict[str, Any]:
         """Опционы на базовый актив."""
-        return self.execute_request("GET", f"/v1/assets/{symbol}/options")
+        return await self.execute_request("GET", f"/v1/assets/{symbol}/options")
+
+    async def get_option_chain(self, symbol: str, expirations: int = 3, strike_range: float = 0.2,
+                               model: str = "auto", risk_free_rate: float | None = None) -> dict[str, Any]:
+        """
+        Опционная доска с волатильностями и греками (см. chain_analytics)
+
+        Цепочка, котировка и описание базового актива загружаются одновременно, затем котировки
+        отобранных серий — пакетом. Берутся ближайшие expirations экспираций и страйки не дальше
+        strike_range от цены базового актива.
+        """
+        rate = self.risk_free_rate if risk_free_rate is None else risk_free_rate
+        requests = [self.get_asset_options(symbol), self.get_quote(symbol)]
+        if model == "auto":
+            requests.append(self.get_asset(symbol))
+        responses = await asyncio.gather(*requests)
+        for d in responses:
+            if "error" in d:
+                return d
+        chain, quote, asset = responses[0], responses[1], responses[2] if model == "auto" else {}
+        underlying = quote_price(quote.get("quote", quote))
+        if not underlying:
+            return {"error": f"Нет цены базового актива {symbol}"}
+        futures = model == "black76" or (model == "auto" and "FUTURE" in str(asset.get("type", "")).upper())
 
-    def get_instrument_trades_latest(self, symbol: str) -> dict[str, Any]:
-        """Лента последних сделок по инструменту."""
-        return self.execute_request("GET", f"/v1/instruments/{symbol}/trades/latest")
+        now = self.calendar.now_ns()
+        series = [s for s in parse_chain(chain)
+                  if s["expiration"] > now and abs(s["strike"] / underlying - 1.0) <= strike_range]
+        nearest = sorted({s["expiration"] for s in series})[:expirations]
+        series = [s for s in series if s["expiration"] in nearest]
+        if not series:
+            return {"error": f"Нет опционных серий по {symbol} в заданном диапазоне"}
+
+        fetched = await self._gather_symbols(self.get_quote, [s["symbol"] for s in series])
+        errors = {s: d["error"] for s, d in fetched.items() if "error" in d}
+        quotes = {s: d.get("quote", d) for s, d in fetched.items() if "error" not in d}
+        return {
+            "underlying": symbol,
+            "underlying_price": underlying,
+            "model": "black76" if futures else "black_scholes",
+            "risk_free_rate": rate,
+            **chain_analytics(series, quotes, underlying, rate, futures, now),
+            "errors": errors,
+        }
+
+    async def get_instrument_trades_latest(self, symbol: str) -> dict[str, Any]:
+        """Лента последних сделок по инструменту (новые сделки добавляются и в накопленную ленту)."""
+        d = await self.execute_request("GET", f"/v1/instruments/{symbol}/trades/latest")
+        if "error" not in d and self._tape_sources.get(symbol) is not d:
+            tape = self.tapes.get(symbol)
+            if tape is None:
+                tape = self.tapes[symbol] = TradeTape(symbol, self.tape_capacity)
+            tape.merge(d.get("trades", []))
+            self._tape_sources[symbol] = d
+        return d
+
+    async def get_trade_tape(self, symbol: str) -> TradeTape | dict[str, Any]:
+        """Накопленная лента сделок, дополненная последним опросом (или словарь с ошибкой)"""
+        d = await self.get_instrument_trades_latest(symbol)
+        if "error" in d:
+            return d
+        return self.tapes[symbol]
 
-    def get_transactions(self, account_id: str, start: str | None = None, end: str | None = None) -> dict[str, Any]:
+    async def get_transactions(self, account_id: str, start: str | None = None, end: str | None = None) -> dict[str, Any]:
         """Транзакции по счёту."""
         params: dict[str, Any] = {}
         if start:
             params["interval.start_time"] = start
         if end:
             params["interval.end_time"] = end
-        return self.execute_request("GET", f"/v1/accounts/{account_id}/transactions", params=params or None)
+        return await self.execute_request("GET", f"/v1/accounts/{account_id}/transactions", params=params or None)
 
-    def create_session(self, payload: dict[str, Any] | None = None) -> dict[str, Any]:
+    async def create_session(self, payload: dict[str, Any] | None = None) -> dict[str, Any]:
         """Создать торговую сессию."""
-        return self.execute_request("POST", "/v1/sessions", json=payload or {})
+        return await self.execute_request("POST", "/v1/sessions", json=payload or {})
 
-    def get_clock(self) -> dict[str, Any]:
+    async def get_clock(self) -> dict[str, Any]:
         """Текущее время на сервере"""
-        return self.execute_request("GET", "/v1/assets/clock")
+        return await self.execute_request("GET", "/v1/assets/clock")
 
-    def place_order(self, args: PlaceOrderArgs) -> dict[str, Any]:
+    async def place_order(self, args: PlaceOrderArgs) -> dict[str, Any]:
         """Размещение ордера на платформе"""
         payload: dict[str, Any] = {}
         if args.symbol is not None: payload["symbol"] = args.symbol
@@ -463,4 +1323,4 @@ class FinamAPIClient:
         if args.client_order_id is not None: payload["client_order_id"] = args.client_order_id
         if args.valid_before is not None: payload["valid_before"] = args.valid_before.model_dump()
         if args.comment is not None: payload["comment"] = args.comment
-        return self.execute_request("POST", f"/v1/accounts/{args.account_id}/orders", json=payload)
\ No newline at end of file
+        return await self.execute_request("POST", f"/v1/accounts/{args.account_id}/orders", json=payload)
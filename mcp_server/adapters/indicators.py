@@ -0,0 +1,202 @@
+"""
+Технические индикаторы на массивах NumPy
+
+Все функции принимают float64-массивы одинаковой длины (например, столбцы ColumnarBars)
+и возвращают массивы той же длины; значения, для которых окна ещё не хватает, — NaN.
+Сглаживания (EMA, Уайлдер в RSI и ATR) считаются блоками в замкнутой форме,
+без цикла Python по каждой свече.
+"""
+
+from collections.abc import Callable
+from typing import Any
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from .bar_store import NS, TIMEFRAME_NS
+from .columnar import ColumnarBars
+from .pydantic_schema import Indicator, TimeFrame
+
+# Для годовой нормировки внутридневных рядов: примерная длина основной сессии Московской биржи
+TRADING_HOURS_PER_DAY = 8.5
+TRADING_DAYS_PER_YEAR = 252
+
+# Во сколько раз может вырасти множитель (1-α)^-i внутри блока EMA, не теряя точности
+_EWM_BLOCK_GROWTH = 1e8
+
+
+def periods_per_year(timeframe: TimeFrame) -> float:
+    """Сколько свечей таймфрейма приходится на год торгов"""
+    timeframe = TimeFrame(timeframe)
+    fixed = {TimeFrame.TIME_FRAME_D: TRADING_DAYS_PER_YEAR, TimeFrame.TIME_FRAME_W: 52,
+             TimeFrame.TIME_FRAME_MN: 12, TimeFrame.TIME_FRAME_QR: 4}
+    if timeframe in fixed:
+        return float(fixed[timeframe])
+    bars_per_day = max(1.0, TRADING_HOURS_PER_DAY * 3600 * NS / TIMEFRAME_NS[timeframe])
+    return TRADING_DAYS_PER_YEAR * bars_per_day
+
+
+def _nan(n: int) -> np.ndarray:
+    return np.full(n, np.nan)
+
+
+def ewm(x: np.ndarray, alpha: float, init: float) -> np.ndarray:
+    """
+    Экспоненциальное сглаживание e[t] = (1-α)·e[t-1] + α·x[t], e[-1] = init
+
+    Внутри блока длины L: e[t] = w^(t+1)·(init + α·Σ x[i]·w^-(i+1)), w = 1-α —
+    это cumsum; L выбран так, чтобы w^-L не превышал _EWM_BLOCK_GROWTH.
+    """
+    out = np.empty(len(x))
+    w = 1.0 - alpha
+    if w <= 0:
+        out[:] = x
+        return out
+    block = max(1, int(np.log(_EWM_BLOCK_GROWTH) / -np.log(w)))
+    powers = w ** np.arange(1, block + 1)
+    prev = init
+    for start in range(0, len(x), block):
+        chunk = x[start:start + block]
+        p = powers[:len(chunk)]
+        out[start:start + len(chunk)] = p * (prev + alpha * np.cumsum(chunk / p))
+        prev = out[start + len(chunk) - 1]
+    return out
+
+
+def sma(x: np.ndarray, period: int) -> np.ndarray:
+    out = _nan(len(x))
+    if len(x) >= period:
+        c = np.cumsum(np.insert(x, 0, 0.0))
+        out[period - 1:] = (c[period:] - c[:-period]) / period
+    return out
+
+
+def _seeded_ewm(x: np.ndarray, period: int, alpha: float) -> np.ndarray:
+    """Сглаживание, начинающееся с SMA первых period значений (как в TA-Lib)"""
+    out = _nan(len(x))
+    if len(x) >= period:
+        seed = x[:period].mean()
+        out[period - 1] = seed
+        out[period:] = ewm(x[period:], alpha, seed)
+    return out
+
+
+def ema(x: np.ndarray, period: int) -> np.ndarray:
+    return _seeded_ewm(x, period, 2.0 / (period + 1))
+
+
+def wilder(x: np.ndarray, period: int) -> np.ndarray:
+    """Сглаживание Уайлдера (α = 1/period)"""
+    return _seeded_ewm(x, period, 1.0 / period)
+
+
+def rsi(close: np.ndarray, period: int = 14) -> np.ndarray:
+    out = _nan(len(close))
+    if len(close) <= period:
+        return out
+    delta = np.diff(close)
+    gain = wilder(np.clip(delta, 0, None), period)
+    loss = wilder(np.clip(-delta, 0, None), period)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        value = np.where(loss == 0, 100.0, 100.0 - 100.0 / (1.0 + gain / loss))
+    out[1:] = np.where(np.isnan(gain), np.nan, value)
+    return out
+
+
+def macd(close: np.ndarray, fast: int = 12, slow: int = 26, signal: int = 9) -> tuple[np.ndarray, ...]:
+    """(линия MACD, сигнальная линия, гистограмма)"""
+    line = ema(close, fast) - ema(close, slow)
+    signal_line = _nan(len(close))
+    valid = np.flatnonzero(~np.isnan(line))
+    if len(valid):
+        signal_line[valid[0]:] = ema(line[valid[0]:], signal)
+    return line, signal_line, line - signal_line
+
+
+def atr(high: np.ndarray, low: np.ndarray, close: np.ndarray, period: int = 14) -> np.ndarray:
+    out = _nan(len(close))
+    if len(close) <= period:
+        return out
+    prev_close = close[:-1]
+    true_range = np.maximum(high[1:], prev_close) - np.minimum(low[1:], prev_close)
+    out[1:] = wilder(true_range, period)
+    return out
+
+
+def bollinger(close: np.ndarray, period: int = 20, k: float = 2.0) -> tuple[np.ndarray, ...]:
+    """(средняя, верхняя, нижняя полоса)"""
+    mid = sma(close, period)
+    std = _nan(len(close))
+    if len(close) >= period:
+        std[period - 1:] = sliding_window_view(close, period).std(axis=1)
+    return mid, mid + k * std, mid - k * std
+
+
+def volatility(close: np.ndarray, period: int = 20, periods_per_year: float = 252.0) -> np.ndarray:
+    """Скользящая годовая волатильность логарифмических доходностей"""
+    out = _nan(len(close))
+    if len(close) > period:
+        returns = np.diff(np.log(close))
+        out[period:] = sliding_window_view(returns, period).std(axis=1, ddof=1) * np.sqrt(periods_per_year)
+    return out
+
+
+# Индикатор → (параметры по умолчанию, расчёт по свечам → {имя столбца: ряд})
+INDICATORS: dict[Indicator, tuple[dict[str, float], Callable[..., dict[str, np.ndarray]]]] = {
+    Indicator.SMA: ({"period": 20}, lambda b, period: {"sma": sma(b.close, int(period))}),
+    Indicator.EMA: ({"period": 20}, lambda b, period: {"ema": ema(b.close, int(period))}),
+    Indicator.RSI: ({"period": 14}, lambda b, period: {"rsi": rsi(b.close, int(period))}),
+    Indicator.MACD: (
+        {"fast": 12, "slow": 26, "signal": 9},
+        lambda b, fast, slow, signal: dict(zip(("macd", "signal", "histogram"),
+                                               macd(b.close, int(fast), int(slow), int(signal)), strict=True)),
+    ),
+    Indicator.ATR: ({"period": 14}, lambda b, period: {"atr": atr(b.high, b.low, b.close, int(period))}),
+    Indicator.BOLLINGER: (
+        {"period": 20, "k": 2.0},
+        lambda b, period, k: dict(zip(("middle", "upper", "lower"), bollinger(b.close, int(period), k), strict=True)),
+    ),
+    Indicator.VOLATILITY: (
+        {"period": 20, "periods_per_year": 252.0},
+        lambda b, period, periods_per_year: {"volatility": volatility(b.close, int(period), periods_per_year)},
+    ),
+}
+
+
+def resolve_params(indicator: Indicator, params: dict[str, float] | None,
+                   timeframe: TimeFrame | None = None) -> dict[str, float]:
+    """Параметры по умолчанию, переопределённые params; неизвестные имена — ValueError"""
+    defaults, _ = INDICATORS[indicator]
+    unknown = set(params or {}) - defaults.keys()
+    if unknown:
+        raise ValueError(f"Неизвестные параметры {indicator.value}: {', '.join(sorted(unknown))}")
+    if "periods_per_year" in defaults and timeframe is not None:
+        defaults = {**defaults, "periods_per_year": periods_per_year(timeframe)}
+    return {**defaults, **(params or {})}
+
+
+def compute(bars: ColumnarBars, indicator: Indicator, params: dict[str, float]) -> dict[str, np.ndarray]:
+    _, fn = INDICATORS[indicator]
+    return fn(bars, **params)
+
+
+def _last(series: np.ndarray) -> float | None:
+    return None if not len(series) or np.isnan(series[-1]) else float(series[-1])
+
+
+def summarize(bars: ColumnarBars, indicator: Indicator, series: dict[str, np.ndarray]) -> dict[str, Any]:
+    """Последние значения и простая интерпретация (перекупленность, положение цены и т.п.)"""
+    summary: dict[str, Any] = {name: _last(values) for name, values in series.items()}
+    close = _last(bars.close)
+    if indicator == Indicator.RSI and summary["rsi"] is not None:
+        summary["state"] = "overbought" if summary["rsi"] >= 70 else "oversold" if summary["rsi"] <= 30 else "neutral"
+    elif indicator == Indicator.MACD and summary["histogram"] is not None:
+        summary["state"] = "bullish" if summary["histogram"] > 0 else "bearish"
+    elif indicator == Indicator.BOLLINGER and summary["upper"] is not None and close is not None:
+        width = summary["upper"] - summary["lower"]
+        summary["percent_b"] = (close - summary["lower"]) / width if width else None
+    elif indicator in (Indicator.SMA, Indicator.EMA) and close is not None:
+        average = summary[indicator.value]
+        summary["close_above"] = None if average is None else close > average
+    summary["close"] = close
+    return summary
@@ -0,0 +1,237 @@
+"""
+Метрики MCP-сервера в текстовом формате Prometheus и настройка логов
+
+Счётчики, гистограммы и gauge живут в памяти процесса (METRICS); на горячем пути это
+несколько операций со словарём. Значения, которые и так считаются в компонентах (кэши,
+реестр клиентов, подписки), не дублируются: их отдают сборщики (collector), которые
+вызываются только при запросе /metrics.
+
+Каждый воркер (FINAM_MCP_WORKERS) экспортирует свои метрики — при нескольких воркерах их
+собирают с каждого процесса отдельно.
+
+Логи: уровень — FINAM_LOG_LEVEL (INFO по умолчанию), FINAM_LOG_SAMPLE_RATE — доля записей
+ниже WARNING, которые попадают в лог (1 — все); предупреждения и ошибки пишутся всегда.
+"""
+
+import bisect
+import contextlib
+import logging
+import os
+import random
+import sys
+import time
+from collections.abc import Callable, Iterable, Iterator
+from dataclasses import dataclass, field
+from typing import Any, ClassVar
+
+# (имя, тип, описание, [(метки, значение)])
+Family = tuple[str, str, str, list[tuple[dict[str, str], float]]]
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+tool_logger = logging.getLogger("finam.tools")
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels: dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(str(v))}"' for k, v in labels.items()) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) and not value.is_integer() else str(int(value))
+
+
+@dataclass(eq=False)
+class _Metric:
+    kind: ClassVar[str] = ""
+    name: str
+    description: str
+    labelnames: tuple[str, ...] = ()
+
+    def _labels(self, values: tuple) -> dict[str, str]:
+        return dict(zip(self.labelnames, values, strict=True))
+
+
+@dataclass(eq=False)
+class Counter(_Metric):
+    kind: ClassVar[str] = "counter"
+    _values: dict[tuple, float] = field(default_factory=dict, init=False, repr=False)
+
+    def inc(self, labels: tuple = (), amount: float = 1) -> None:
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+    def get(self, labels: tuple = ()) -> float:
+        return self._values.get(labels, 0)
+
+    def families(self) -> Iterable[Family]:
+        yield self.name, self.kind, self.description, [(self._labels(k), v) for k, v in self._values.items()]
+
+
+class Gauge(Counter):
+    kind: ClassVar[str] = "gauge"
+
+    def dec(self, labels: tuple = (), amount: float = 1) -> None:
+        self._values[labels] = self._values.get(labels, 0) - amount
+
+    def set(self, labels: tuple, value: float) -> None:
+        self._values[labels] = value
+
+
+@dataclass(eq=False)
+class Histogram(_Metric):
+    kind: ClassVar[str] = "histogram"
+    buckets: tuple[float, ...] = LATENCY_BUCKETS
+    # метки → [счётчики по корзинам (последняя — +Inf), сумма, количество]
+    _series: dict[tuple, list] = field(default_factory=dict, init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        self.buckets = tuple(sorted(self.buckets))
+
+    def observe(self, labels: tuple, value: float) -> None:
+        series = self._series.get(labels)
+        if series is None:
+            series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+        series[0][bisect.bisect_left(self.buckets, value)] += 1
+        series[1] += value
+        series[2] += 1
+
+    def count(self, labels: tuple = ()) -> int:
+        series = self._series.get(labels)
+        return series[2] if series else 0
+
+    def families(self) -> Iterable[Family]:
+        samples = []
+        for key, (counts, total, count) in self._series.items():
+            labels = self._labels(key)
+            cumulative = 0
+            for bound, n in zip((*self.buckets, float("inf")), counts, strict=True):
+                cumulative += n
+                samples.append(({**labels, "le": _format_value(bound)}, cumulative))
+            samples.append(({**labels, "__suffix__": "_sum"}, total))
+            samples.append(({**labels, "__suffix__": "_count"}, count))
+        yield self.name, self.kind, self.description, samples
+
+
+class MetricsRegistry:
+    def __init__(self) -> None:
+        self._metrics: dict[str, _Metric] = {}
+        self._collectors: list[Callable[[], Iterable[Family]]] = []
+
+    def _add(self, metric: _Metric) -> Any:  # noqa: ANN401
+        if metric.name in self._metrics:
+            raise ValueError(f"Метрика {metric.name} уже зарегистрирована")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, description: str, labelnames: tuple[str, ...] = ()) -> Counter:
+        return self._add(Counter(name, description, labelnames))
+
+    def gauge(self, name: str, description: str, labelnames: tuple[str, ...] = ()) -> Gauge:
+        return self._add(Gauge(name, description, labelnames))
+
+    def histogram(self, name: str, description: str, labelnames: tuple[str, ...] = (),
+                  buckets: tuple[float, ...] = LATENCY_BUCKETS) -> Histogram:
+        return self._add(Histogram(name, description, labelnames, buckets))
+
+    def collector(self, fn: Callable[[], Iterable[Family]]) -> Callable[[], Iterable[Family]]:
+        """Зарегистрировать функцию, которая отдаёт семейства метрик при каждом запросе /metrics"""
+        self._collectors.append(fn)
+        return fn
+
+    def families(self) -> Iterator[Family]:
+        for metric in self._metrics.values():
+            yield from metric.families()
+        for collect in self._collectors:
+            yield from collect()
+
+    def render(self) -> str:
+        """Все метрики в текстовом формате Prometheus 0.0.4"""
+        lines = []
+        for name, kind, help_text, samples in self.families():
+            lines.append(f"# HELP {name} {_escape(help_text)}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, value in samples:
+                suffix = labels.pop("__suffix__", "_bucket" if "le" in labels else "")
+                lines.append(f"{name}{suffix}{_format_labels(labels)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+METRICS = MetricsRegistry()
+
+TOOL_DURATION = METRICS.histogram("finam_tool_duration_seconds", "Длительность вызова MCP-инструмента", ("tool",))
+TOOL_INFLIGHT = METRICS.gauge("finam_tool_inflight", "Выполняющиеся вызовы MCP-инструмента", ("tool",))
+TOOL_ERRORS = METRICS.counter("finam_tool_errors_total", "Вызовы инструмента с ошибкой", ("tool", "kind"))
+TOOL_RESPONSE_BYTES = METRICS.histogram("finam_tool_response_bytes", "Размер ответа инструмента (текст JSON)",
+                                        ("tool",), SIZE_BUCKETS)
+
+API_DURATION = METRICS.histogram("finam_api_request_duration_seconds", "Длительность запроса к Finam TradeAPI",
+                                 ("method", "route"))
+API_INFLIGHT = METRICS.gauge("finam_api_inflight", "Запросы к Finam TradeAPI в сети", ("endpoint_class",))
+API_RESPONSES = METRICS.counter("finam_api_responses_total", "Ответы Finam TradeAPI по статусам",
+                                ("method", "route", "status"))
+API_RESPONSE_BYTES = METRICS.histogram("finam_api_response_bytes", "Размер тела ответа Finam TradeAPI",
+                                       ("route",), SIZE_BUCKETS)
+
+
+@dataclass
+class ToolCall:
+    """Итог вызова инструмента, который заполняет обёртка (см. track_tool)"""
+
+    error: str | None = None
+    size: int | None = None
+
+
+@contextlib.contextmanager
+def track_tool(name: str) -> Iterator[ToolCall]:
+    """Время, число выполняющихся вызовов, ошибки и размер ответа инструмента name"""
+    call = ToolCall()
+    labels = (name,)
+    TOOL_INFLIGHT.inc(labels)
+    started = time.perf_counter()
+    try:
+        yield call
+    except Exception as e:
+        call.error = type(e).__name__
+        raise
+    finally:
+        elapsed = time.perf_counter() - started
+        TOOL_INFLIGHT.dec(labels)
+        TOOL_DURATION.observe(labels, elapsed)
+        if call.error is not None:
+            TOOL_ERRORS.inc((name, call.error))
+        if call.size is not None:
+            TOOL_RESPONSE_BYTES.observe(labels, call.size)
+        tool_logger.debug("%s: %.1f мс, ошибка: %s", name, elapsed * 1000, call.error)
+
+
+def ratio(hits: float, misses: float) -> float:
+    return hits / (hits + misses) if hits + misses else 0.0
+
+
+class SamplingFilter(logging.Filter):
+    """Пропускает долю rate записей ниже WARNING; WARNING и выше — всегда"""
+
+    def __init__(self, rate: float) -> None:
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        return record.levelno >= logging.WARNING or self.rate >= 1 or random.random() < self.rate
+
+
+def configure_logging(level: str | None = None, sample_rate: float | None = None) -> None:
+    """Корневой логгер в stdout с уровнем FINAM_LOG_LEVEL и выборкой FINAM_LOG_SAMPLE_RATE"""
+    level = (level or os.getenv("FINAM_LOG_LEVEL", "INFO")).upper()
+    sample_rate = sample_rate if sample_rate is not None else float(os.getenv("FINAM_LOG_SAMPLE_RATE", "1"))
+    handler = logging.StreamHandler(sys.stdout)
+    handler.addFilter(SamplingFilter(sample_rate))
+    logging.basicConfig(level=level, format="%(asctime)s %(levelname)s %(name)s %(message)s",
+                        handlers=[handler], force=True)
@@ -0,0 +1,210 @@
+"""
+Аналитика опционной цепочки
+
+Цены опционов считаются в единой форме через форвард F и дисконт D = e^(-rT):
+Black-76 — для опционов на фьючерсы (F — цена фьючерса), Black-Scholes без дивидендов —
+для опционов на акции (F = S·e^(rT)). Все функции работают с массивами NumPy по всей
+цепочке сразу. Подразумеваемая волатильность — метод Ньютона, защищённый бисекцией:
+шаг, выходящий за текущую вилку [lo, hi], заменяется её серединой.
+"""
+
+from datetime import UTC, date, datetime
+from typing import Any
+
+import numpy as np
+
+from .bar_store import NS, now_ns, to_ns
+
+# Опционы Московской биржи экспирируются в 18:50 МСК
+EXPIRY_TIME_UTC = "15:50:00"
+YEAR_SECONDS = 365 * 86400
+
+VOL_BOUNDS = (1e-4, 5.0)
+_IV_ITERATIONS = 60
+_IV_TOLERANCE = 1e-8
+
+
+def norm_cdf(x: np.ndarray) -> np.ndarray:
+    """Функция нормального распределения через erfc (Numerical Recipes, относительная ошибка < 1.2e-7)"""
+    z = np.abs(x) / np.sqrt(2.0)
+    t = 1.0 / (1.0 + 0.5 * z)
+    poly = -z * z - 1.26551223 + t * (1.00002368 + t * (0.37409196 + t * (0.09678418 + t * (
+        -0.18628806 + t * (0.27886807 + t * (-1.13520398 + t * (1.48851587 + t * (-0.82215223 + t * 0.17087277))))))))
+    erfc = t * np.exp(poly)
+    return np.where(x >= 0, 1.0 - 0.5 * erfc, 0.5 * erfc)
+
+
+def norm_pdf(x: np.ndarray) -> np.ndarray:
+    return np.exp(-0.5 * x * x) / np.sqrt(2.0 * np.pi)
+
+
+def _d1_d2(forward: np.ndarray, strike: np.ndarray, t: np.ndarray, vol: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    sigma_t = vol * np.sqrt(t)
+    d1 = (np.log(forward / strike) + 0.5 * sigma_t * sigma_t) / sigma_t
+    return d1, d1 - sigma_t
+
+
+def black_price(forward: np.ndarray, strike: np.ndarray, t: np.ndarray, vol: np.ndarray,
+                discount: np.ndarray, is_call: np.ndarray) -> np.ndarray:
+    """Цена опциона по форварду (Black-76; для Black-Scholes — F = S/D)"""
+    d1, d2 = _d1_d2(forward, strike, t, vol)
+    call = discount * (forward * norm_cdf(d1) - strike * norm_cdf(d2))
+    put = discount * (strike * norm_cdf(-d2) - forward * norm_cdf(-d1))
+    return np.where(is_call, call, put)
+
+
+def implied_vol(price: np.ndarray, forward: np.ndarray, strike: np.ndarray, t: np.ndarray,
+                discount: np.ndarray, is_call: np.ndarray) -> np.ndarray:
+    """Подразумеваемая волатильность; NaN — цена вне границ без арбитража или срок истёк"""
+    intrinsic = discount * np.maximum(np.where(is_call, forward - strike, strike - forward), 0.0)
+    upper = discount * np.where(is_call, forward, strike)
+    valid = (t > 0) & (price > intrinsic) & (price < upper) & (forward > 0) & (strike > 0)
+
+    lo = np.full(len(price), VOL_BOUNDS[0])
+    hi = np.full(len(price), VOL_BOUNDS[1])
+    vol = np.full(len(price), 0.3)
+    safe_t = np.where(valid, t, 1.0)
+    for _ in range(_IV_ITERATIONS):
+        diff = black_price(forward, strike, safe_t, vol, discount, is_call) - price
+        hi = np.where(diff > 0, vol, hi)
+        lo = np.where(diff <= 0, vol, lo)
+        d1, _ = _d1_d2(forward, strike, safe_t, vol)
+        vega = discount * forward * norm_pdf(d1) * np.sqrt(safe_t)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            step = vol - diff / vega
+        vol = np.where((step > lo) & (step < hi), step, 0.5 * (lo + hi))
+        if np.all(~valid | (np.abs(diff) < _IV_TOLERANCE * np.maximum(price, 1e-12))):
+            break
+    return np.where(valid, vol, np.nan)
+
+
+def greeks(underlying: float, forward: np.ndarray, strike: np.ndarray, t: np.ndarray, vol: np.ndarray,
+           rate: float, is_call: np.ndarray, futures: bool) -> dict[str, np.ndarray]:
+    """
+    Греки по цене базового актива underlying
+
+    vega — на 1 п.п. волатильности, theta — за календарный день, rho — на 1 п.п. ставки.
+    """
+    discount = np.exp(-rate * t)
+    d1, d2 = _d1_d2(forward, strike, t, vol)
+    pdf = norm_pdf(d1)
+    scale = discount * forward / underlying  # dF/dU · D: 1 для акций, D для фьючерсов
+    delta = scale * np.where(is_call, norm_cdf(d1), norm_cdf(d1) - 1.0)
+    gamma = scale * scale * pdf / (forward * vol * np.sqrt(t)) / discount
+    vega = discount * forward * pdf * np.sqrt(t)
+    price = black_price(forward, strike, t, vol, discount, is_call)
+    decay = -discount * forward * pdf * vol / (2.0 * np.sqrt(t))
+    if futures:
+        theta = decay + rate * price
+        rho = -t * price
+    else:
+        carry = rate * strike * discount * np.where(is_call, norm_cdf(d2), -norm_cdf(-d2))
+        theta = decay - carry
+        rho = strike * t * discount * np.where(is_call, norm_cdf(d2), -norm_cdf(-d2))
+    return {"price": price, "delta": delta, "gamma": gamma, "vega": vega / 100, "theta": theta / 365,
+            "rho": rho / 100}
+
+
+def number(value: Any) -> float | None:  # noqa: ANN401
+    """Число из ответа API: 12.5, "12.5" или {"value": "12.5"}"""
+    if isinstance(value, dict):
+        value = value.get("value")
+    try:
+        return float(value) if value not in (None, "") else None
+    except (TypeError, ValueError):
+        return None
+
+
+def expiry_ns(value: Any) -> int | None:  # noqa: ANN401
+    """Момент экспирации: "YYYY-MM-DD", ISO8601 или {"year", "month", "day"}"""
+    if isinstance(value, dict) and value.get("year"):
+        value = date(int(value["year"]), int(value["month"]), int(value["day"])).isoformat()
+    if not isinstance(value, str) or not value:
+        return None
+    if len(value) == 10:
+        value = f"{value}T{EXPIRY_TIME_UTC}Z"
+    return to_ns(value)
+
+
+def parse_chain(payload: dict[str, Any]) -> list[dict[str, Any]]:
+    """Серии цепочки {symbol, expiration, strike, is_call}; серии без страйка, даты или типа пропускаются"""
+    series = []
+    for entry in payload.get("options") or payload.get("series") or []:
+        kind = str(entry.get("type") or entry.get("option_type") or "").upper()
+        expiration = expiry_ns(entry.get("expiration_last_day") or entry.get("expiration_date"))
+        strike = number(entry.get("strike"))
+        if ("CALL" not in kind and "PUT" not in kind) or expiration is None or not strike:
+            continue
+        series.append({"symbol": entry["symbol"], "expiration": expiration, "strike": strike,
+                       "is_call": "CALL" in kind})
+    return series
+
+
+def quote_price(quote: dict[str, Any]) -> float | None:
+    """Середина спреда, если есть обе стороны, иначе цена последней сделки"""
+    bid, ask = number(quote.get("bid")), number(quote.get("ask"))
+    if bid and ask and ask >= bid:
+        return (bid + ask) / 2
+    return number(quote.get("last")) or None
+
+
+def _finam_iv(value: Any) -> float | None:  # noqa: ANN401
+    iv = number(value)
+    # Биржа публикует волатильность в процентах; долями считаем значения не больше VOL_BOUNDS[1]
+    return None if not iv else iv / 100 if iv > VOL_BOUNDS[1] else iv
+
+
+def chain_analytics(series: list[dict[str, Any]], quotes: dict[str, dict[str, Any]], underlying: float,
+                    rate: float, futures: bool, now: int | None = None) -> dict[str, Any]:
+    """
+    Волатильности и греки по цепочке и поверхность волатильности страйк × экспирация
+
+    Значения, которые прислал Finam (implied_volatility и греки в quote.option), сохраняются;
+    недостающие рассчитываются моделью. В поверхности для каждого страйка берётся
+    вне-денежный опцион: пут ниже форварда, колл выше.
+    """
+    now = now_ns() if now is None else now
+    n = len(series)
+    strike = np.array([s["strike"] for s in series], dtype=np.float64)
+    expiration = np.array([s["expiration"] for s in series], dtype=np.int64)
+    is_call = np.array([s["is_call"] for s in series], dtype=bool)
+    t = (expiration - now) / NS / YEAR_SECONDS
+    discount = np.exp(-rate * t)
+    forward = np.full(n, underlying) if futures else underlying / discount
+
+    option = [quotes.get(s["symbol"], {}).get("option") or {} for s in series]
+    price = np.array([quote_price(quotes.get(s["symbol"], {})) or np.nan for s in series])
+    finam_iv = np.array([_finam_iv(o.get("implied_volatility")) or np.nan for o in option])
+    model_iv = implied_vol(price, forward, strike, np.maximum(t, 0), discount, is_call)
+    iv = np.where(np.isnan(finam_iv), model_iv, finam_iv)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        computed = greeks(underlying, forward, strike, np.where(t > 0, t, np.nan), iv, rate, is_call, futures)
+    for name in ("delta", "gamma", "theta", "vega", "rho"):
+        given = np.array([number(o.get(name)) if number(o.get(name)) is not None else np.nan for o in option])
+        computed[name] = np.where(np.isnan(given), computed[name], given)
+    source = np.where(~np.isnan(finam_iv), "finam", np.where(np.isnan(model_iv), None, "model"))
+
+    expirations = np.unique(expiration)
+    strikes = np.unique(strike)
+    surface = np.full((len(strikes), len(expirations)), np.nan)
+    out_of_money = np.where(is_call, strike >= forward, strike < forward)
+    pick = out_of_money & ~np.isnan(iv)
+    surface[np.searchsorted(strikes, strike[pick]), np.searchsorted(expirations, expiration[pick])] = iv[pick]
+
+    def clean(x: np.ndarray, digits: int) -> list:
+        return np.where(np.isnan(x), None, np.round(x, digits)).tolist()
+
+    expiry_dates = [datetime.fromtimestamp(int(e) / NS, UTC).date().isoformat() for e in expirations]
+    rows = zip(
+        [s["symbol"] for s in series],
+        [expiry_dates[i] for i in np.searchsorted(expirations, expiration)],
+        strike.tolist(), np.where(is_call, "call", "put").tolist(), clean(price, 6), clean(iv, 6),
+        *(clean(computed[name], 6) for name in ("delta", "gamma", "theta", "vega", "rho")),
+        source.tolist(), strict=True,
+    )
+    return {
+        "surface": {"expirations": expiry_dates, "strikes": strikes.tolist(), "iv": clean(surface, 4)},
+        "columns": ["symbol", "expiration", "strike", "type", "price", "iv", "delta", "gamma", "theta", "vega", "rho",
+                    "iv_source"],
+        "rows": [list(row) for row in rows],
+    }
@@ -0,0 +1,175 @@
+"""
+Локальный стакан по инструменту
+
+Каждая сторона стакана — два параллельных массива array('d'): цены по возрастанию и объёмы.
+Уровень ищется бинарным поиском, но вставка и удаление сдвигают хвост массива (memmove),
+так что обновление уровня стоит O(n); для стаканов глубиной в десятки-сотни уровней это
+дешевле дерева. REST API Finam отдаёт только полные снимки, поэтому стакан собирается
+из снимка целиком (load_snapshot, одна сортировка); apply — для дельт поверх снимка.
+Запросы лучших цен и N уровней читают только нужный срез, не копируя весь стакан.
+
+Строки стакана Finam применяются с учётом action: ACTION_REMOVE удаляет уровень,
+ACTION_ADD / ACTION_UPDATE (и ACTION_UNSPECIFIED в снимке) задают объёмы на покупку
+и продажу; нулевой объём убирает уровень со своей стороны.
+"""
+
+from array import array
+from bisect import bisect_left
+from collections.abc import Iterable
+from datetime import UTC, datetime
+from typing import Any
+
+from .pydantic_schema import OrderBookAction
+
+Level = tuple[float, float]  # (цена, объём)
+
+
+class Ladder:
+    """Одна сторона стакана"""
+
+    def __init__(self) -> None:
+        self.prices = array("d")
+        self.sizes = array("d")
+
+    def __len__(self) -> int:
+        return len(self.prices)
+
+    def set(self, price: float, size: float) -> None:
+        """Установить объём на уровне price (size <= 0 — удалить уровень)"""
+        i = bisect_left(self.prices, price)
+        exists = i < len(self.prices) and self.prices[i] == price
+        if size <= 0:
+            if exists:
+                del self.prices[i]
+                del self.sizes[i]
+        elif exists:
+            self.sizes[i] = size
+        else:
+            self.prices.insert(i, price)
+            self.sizes.insert(i, size)
+
+    def remove(self, price: float) -> None:
+        self.set(price, 0.0)
+
+    def clear(self) -> None:
+        del self.prices[:]
+        del self.sizes[:]
+
+    def replace(self, levels: dict[float, float]) -> None:
+        """Заменить сторону уровнями {цена: объём} (уровни с нулевым объёмом пропускаются)"""
+        items = sorted((price, size) for price, size in levels.items() if size > 0)
+        self.prices = array("d", [price for price, _ in items])
+        self.sizes = array("d", [size for _, size in items])
+
+    def lowest(self, n: int | None = None) -> list[Level]:
+        """n уровней с наименьшими ценами, по возрастанию"""
+        stop = len(self.prices) if n is None else min(n, len(self.prices))
+        return list(zip(self.prices[:stop], self.sizes[:stop], strict=True))
+
+    def highest(self, n: int | None = None) -> list[Level]:
+        """n уровней с наибольшими ценами, по убыванию"""
+        start = 0 if n is None else max(len(self.prices) - n, 0)
+        return list(zip(reversed(self.prices[start:]), reversed(self.sizes[start:]), strict=True))
+
+
+def _cumulative(levels: list[Level]) -> list[float]:
+    total = 0.0
+    out = []
+    for _, size in levels:
+        total += size
+        out.append(total)
+    return out
+
+
+class LocalOrderBook:
+    """Стакан одного инструмента: заявки на покупку (bids) и продажу (asks)"""
+
+    def __init__(self, symbol: str) -> None:
+        self.symbol = symbol
+        self.bids = Ladder()
+        self.asks = Ladder()
+        self.timestamp: datetime | None = None
+
+    def apply(self, rows: Iterable[dict[str, Any]]) -> None:
+        """Применить строки стакана Finam (дельты или снимок) к текущему состоянию"""
+        for r in rows:
+            price = float(r["price"])
+            action = OrderBookAction(int(r.get("action") or 0))
+            if action == OrderBookAction.ACTION_REMOVE:
+                self.bids.remove(price)
+                self.asks.remove(price)
+            else:
+                self.bids.set(price, float(r.get("buy_size") or 0))
+                self.asks.set(price, float(r.get("sell_size") or 0))
+            if r.get("timestamp"):
+                self.timestamp = datetime.fromisoformat(r["timestamp"])
+
+    def load_snapshot(self, rows: Iterable[dict[str, Any]]) -> None:
+        """Заменить стакан полным снимком: уровни собираются в словари и сортируются один раз"""
+        bids: dict[float, float] = {}
+        asks: dict[float, float] = {}
+        for r in rows:
+            price = float(r["price"])
+            if OrderBookAction(int(r.get("action") or 0)) == OrderBookAction.ACTION_REMOVE:
+                bids.pop(price, None)
+                asks.pop(price, None)
+            else:
+                bids[price] = float(r.get("buy_size") or 0)
+                asks[price] = float(r.get("sell_size") or 0)
+            if r.get("timestamp"):
+                self.timestamp = datetime.fromisoformat(r["timestamp"])
+        self.bids.replace(bids)
+        self.asks.replace(asks)
+
+    def best_bid(self) -> Level | None:
+        return (self.bids.prices[-1], self.bids.sizes[-1]) if len(self.bids) else None
+
+    def best_ask(self) -> Level | None:
+        return (self.asks.prices[0], self.asks.sizes[0]) if len(self.asks) else None
+
+    def spread(self) -> float | None:
+        bid, ask = self.best_bid(), self.best_ask()
+        # Округление убирает двоичный «хвост» разности (10.1 - 10.0 = 0.0999...)
+        return round(ask[0] - bid[0], 10) if bid and ask else None
+
+    def mid(self) -> float | None:
+        bid, ask = self.best_bid(), self.best_ask()
+        return round((ask[0] + bid[0]) / 2, 10) if bid and ask else None
+
+    def depth(self, n: int | None = None) -> tuple[list[Level], list[Level]]:
+        """n лучших уровней: bids по убыванию цены, asks по возрастанию"""
+        return self.bids.highest(n), self.asks.lowest(n)
+
+    def summary(self, n: int | None = 10) -> dict[str, Any]:
+        """Лучшие цены, спред и n уровней с накопленным объёмом"""
+        bids, asks = self.depth(n)
+        return {
+            "symbol": self.symbol,
+            "timestamp": self.timestamp,
+            "best_bid": bids[0][0] if bids else None,
+            "best_ask": asks[0][0] if asks else None,
+            "spread": self.spread(),
+            "mid": self.mid(),
+            "bids": [
+                {"price": p, "size": s, "cumulative_size": c}
+                for (p, s), c in zip(bids, _cumulative(bids), strict=True)
+            ],
+            "asks": [
+                {"price": p, "size": s, "cumulative_size": c}
+                for (p, s), c in zip(asks, _cumulative(asks), strict=True)
+            ],
+        }
+
+    def to_rows(self, n: int | None = None) -> list[dict[str, Any]]:
+        """n лучших уровней каждой стороны в формате строк стакана Finam"""
+        bids, asks = self.depth(n)
+        timestamp = (self.timestamp or datetime.now(UTC)).isoformat()
+        rows = [
+            {"price": p, "sell_size": s, "buy_size": 0, "action": OrderBookAction.ACTION_ADD, "timestamp": timestamp}
+            for p, s in reversed(asks)
+        ]
+        rows += [
+            {"price": p, "sell_size": 0, "buy_size": s, "action": OrderBookAction.ACTION_ADD, "timestamp": timestamp}
+            for p, s in bids
+        ]
+        return rows
@@ -0,0 +1,102 @@
+"""
+Аналитика портфеля по свечам позиций
+
+Свечи инструментов выравниваются на общий календарь (объединение меток времени): пропуски
+заполняются последней известной ценой, строки до начала истории самого «молодого»
+инструмента отбрасываются. По матрице доходностей за один проход считается ковариационная
+матрица (вместе с бенчмарком, если он задан), а из неё — корреляции, беты и волатильность
+портфеля.
+"""
+
+from typing import Any
+
+import numpy as np
+
+from .bar_store import to_iso
+from .columnar import ColumnarBars
+
+
+def forward_fill(values: np.ndarray) -> np.ndarray:
+    """Заполнить NaN в каждом столбце последним известным значением выше"""
+    rows = np.arange(len(values))[:, None]
+    last = np.maximum.accumulate(np.where(np.isnan(values), 0, rows), axis=0)
+    return values[last, np.arange(values.shape[1])]
+
+
+def align(bars: dict[str, ColumnarBars]) -> tuple[np.ndarray, np.ndarray]:
+    """(метки времени, матрица цен закрытия T × N) на общем календаре, без строк с пропусками"""
+    calendar = np.unique(np.concatenate([b.ts for b in bars.values()]))
+    closes = np.full((len(calendar), len(bars)), np.nan)
+    for j, b in enumerate(bars.values()):
+        closes[np.searchsorted(calendar, b.ts), j] = b.close
+    closes = forward_fill(closes)
+    complete = ~np.isnan(closes).any(axis=1)
+    return calendar[complete], closes[complete]
+
+
+def _round(x: np.ndarray | float | None, digits: int = 6) -> Any:  # noqa: ANN401
+    if x is None:
+        return None
+    if np.ndim(x) == 0:
+        return None if np.isnan(x) else round(float(x), digits)
+    return np.where(np.isnan(x), None, np.round(x, digits)).tolist()
+
+
+def portfolio_risk(bars: dict[str, ColumnarBars], values: dict[str, float], ppy: float,
+                   benchmark: ColumnarBars | None = None) -> dict[str, Any]:
+    """
+    Риск портфеля по позициям стоимостью values (со знаком: шорт — отрицательная)
+
+    Веса — стоимость позиции к суммарной абсолютной стоимости (валовой экспозиции).
+    Волатильности и ковариации — в годовом выражении (ppy — свечей в году).
+    """
+    symbols = list(bars)
+    series = dict(bars)
+    if benchmark is not None:
+        series["__benchmark__"] = benchmark
+    ts, closes = align(series)
+    if len(ts) < 3:
+        raise ValueError("Недостаточно общих свечей для расчёта: нужно хотя бы три")
+
+    returns = np.diff(closes, axis=0) / closes[:-1]
+    cov = np.atleast_2d(np.cov(returns, rowvar=False, ddof=1)) * ppy
+    n = len(symbols)
+    asset_cov = cov[:n, :n]
+    std = np.sqrt(np.diag(cov))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        corr = cov / np.outer(std, std)
+
+    exposure = np.array([values[s] for s in symbols])
+    gross = np.abs(exposure).sum()
+    weights = exposure / gross if gross else np.zeros(n)
+    port_var = float(weights @ asset_cov @ weights)
+    marginal = asset_cov @ weights
+    with np.errstate(divide="ignore", invalid="ignore"):
+        beta_portfolio = marginal / port_var if port_var else np.full(n, np.nan)
+        risk_contribution = weights * marginal / port_var if port_var else np.full(n, np.nan)
+
+    portfolio_returns = returns[:, :n] @ weights
+    result = {
+        "observations": len(returns),
+        "start": to_iso(int(ts[0])),
+        "end": to_iso(int(ts[-1])),
+        "symbols": symbols,
+        "weights": _round(weights),
+        "volatility": _round(std[:n]),
+        "portfolio": {
+            "volatility": _round(np.sqrt(port_var)),
+            "var_95": _round(-np.percentile(portfolio_returns, 5)),
+            "gross_exposure": _round(gross, 2),
+            "net_exposure": _round(exposure.sum(), 2),
+        },
+        "beta_to_portfolio": _round(beta_portfolio),
+        "risk_contribution": _round(risk_contribution),
+        "correlation": _round(corr[:n, :n]),
+        "covariance": _round(asset_cov),
+    }
+    if benchmark is not None:
+        bench_var = cov[n, n]
+        bench_cov = cov[:n, n]
+        result["beta_to_benchmark"] = _round(bench_cov / bench_var if bench_var else np.full(n, np.nan))
+        result["portfolio"]["beta_to_benchmark"] = _round(float(weights @ bench_cov) / bench_var if bench_var else None)
+    return result
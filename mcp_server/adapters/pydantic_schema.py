@@ -1,7 +1,7 @@
 from __future__ import annotations
 from enum import IntEnum, StrEnum
 from decimal import Decimal
-from typing import List, Optional
+from typing import Dict, List, Literal, Optional
 from datetime import datetime
 from pydantic import BaseModel, Field
 
@@ -46,6 +46,72 @@ class BarsResponse(BaseModel):
     symbol: str = Field(..., description="Символ инструмента")
     bars: List[Bar] = Field(..., description="Список агрегированных свечей")
 
+class Indicator(StrEnum):
+    SMA = "sma"
+    EMA = "ema"
+    RSI = "rsi"
+    MACD = "macd"
+    ATR = "atr"
+    BOLLINGER = "bollinger"
+    VOLATILITY = "volatility"
+
+class IndicatorArgs(BaseModel):
+    symbol: str = Field(..., description="ticker@mic")
+    timeframe: TimeFrame
+    start: Optional[str] = Field(None, description="Начало периода ISO8601 c Z")
+    end: Optional[str] = Field(None, description="Окончание периода ISO8601 c Z")
+    indicator: Indicator = Field(..., description="Индикатор: sma, ema, rsi, macd, atr, bollinger, volatility")
+    params: Optional[Dict[str, float]] = Field(None, description="Параметры индикатора: period; для macd fast, slow, signal; для bollinger period, k; для volatility period, periods_per_year (по умолчанию по таймфрейму)")
+    tail: int = Field(20, ge=0, le=5000, description="Сколько последних значений ряда вернуть (0 — только сводка)")
+
+class Operand(BaseModel):
+    series: Optional[Literal["open", "high", "low", "close", "volume"]] = Field(None, description="Столбец свечей")
+    indicator: Optional[Indicator] = Field(None, description="Индикатор (см. get_indicator)")
+    params: Optional[Dict[str, float]] = Field(None, description="Параметры индикатора")
+    output: Optional[str] = Field(None, description="Ряд индикатора с несколькими рядами: macd/signal/histogram, middle/upper/lower")
+    value: Optional[float] = Field(None, description="Константа")
+
+class Comparison(StrEnum):
+    GT = "gt"
+    LT = "lt"
+    GE = "ge"
+    LE = "le"
+    CROSSES_ABOVE = "crosses_above"
+    CROSSES_BELOW = "crosses_below"
+
+class SignalRule(BaseModel):
+    left: Operand = Field(..., description="Левая часть условия")
+    op: Comparison = Field(..., description="gt, lt, ge, le, crosses_above (пересекает снизу вверх), crosses_below")
+    right: Operand = Field(..., description="Правая часть условия")
+
+class StrategySpec(BaseModel):
+    entry: List[SignalRule] = Field(..., min_length=1, description="Условия входа в позицию (должны выполняться все)")
+    exit: Optional[List[SignalRule]] = Field(None, description="Условия выхода (достаточно любого); если не заданы — позиция держится, пока выполняются условия входа")
+    side: Literal["long", "short"] = Field("long", description="Направление позиции")
+    fee_bps: float = Field(0.0, ge=0, description="Комиссия и проскальзывание за сделку, базисные пункты")
+    risk_free_rate: float = Field(0.0, description="Безрисковая ставка годовых для коэффициента Шарпа, доля")
+
+class BacktestArgs(BaseModel):
+    symbol: str = Field(..., description="ticker@mic")
+    timeframe: TimeFrame
+    start: str = Field(..., description="Начало периода ISO8601 c Z")
+    end: Optional[str] = Field(None, description="Окончание периода ISO8601 c Z")
+    strategy: StrategySpec = Field(..., description="Описание стратегии")
+    equity_points: int = Field(100, ge=0, le=1000, description="Сколько точек кривой капитала вернуть")
+
+class TechnicalSummaryArgs(BaseModel):
+    symbol: str = Field(..., description="ticker@mic")
+    timeframe: TimeFrame
+    start: Optional[str] = Field(None, description="Начало периода ISO8601 c Z")
+    end: Optional[str] = Field(None, description="Окончание периода ISO8601 c Z")
+
+class PortfolioAnalyticsArgs(BaseModel):
+    account_id: str = Field(..., description="ID счета")
+    timeframe: TimeFrame = Field(TimeFrame.TIME_FRAME_D, description="Таймфрейм свечей для доходностей")
+    start: Optional[str] = Field(None, description="Начало периода ISO8601 c Z (по умолчанию год назад)")
+    end: Optional[str] = Field(None, description="Окончание периода ISO8601 c Z")
+    benchmark: Optional[str] = Field(None, description="ticker@mic бенчмарка для бет, например IMOEX@MISX")
+
 class QuoteOption(BaseModel):
     open_interest: Optional[Decimal] = Field(None, description="Открытый интерес")
     implied_volatility: Optional[Decimal] = Field(None, description="Подразумеваемая волатильность")
@@ -111,11 +177,34 @@ class OrderBook(BaseModel):
 
 class OrderBookRequest(BaseModel):
     symbol: str = Field(..., description="Символ инструмента в формате ticker@mic")
+    depth: Optional[int] = Field(None, ge=1, le=50, description="Количество уровней по лучшим bid/ask (по умолчанию весь стакан)")
+
+class QuotesRequest(BaseModel):
+    symbols: List[str] = Field(..., min_length=1, max_length=100, description="Символы инструментов в формате ticker@mic")
+
+class OrderBooksRequest(BaseModel):
+    symbols: List[str] = Field(..., min_length=1, max_length=100, description="Символы инструментов в формате ticker@mic")
+    depth: int = Field(10, ge=1, le=50, description="Сколько лучших уровней учитывать в объеме bid/ask")
 
 class OrderBookResponse(BaseModel):
     symbol: str = Field(..., description="Символ инструмента")
     orderbook: OrderBook = Field(..., description="Текущий стакан")
 
+class OrderBookDepthLevel(BaseModel):
+    price: float = Field(..., description="Цена уровня")
+    size: float = Field(..., description="Объем на уровне")
+    cumulative_size: float = Field(..., description="Накопленный объем от лучшей цены до уровня включительно")
+
+class OrderBookSummary(BaseModel):
+    symbol: str = Field(..., description="Символ инструмента")
+    timestamp: Optional[datetime] = Field(None, description="Метка времени последнего обновления стакана")
+    best_bid: Optional[float] = Field(None, description="Лучшая цена покупки")
+    best_ask: Optional[float] = Field(None, description="Лучшая цена продажи")
+    spread: Optional[float] = Field(None, description="Спред между лучшими ценами")
+    mid: Optional[float] = Field(None, description="Середина спреда")
+    bids: List[OrderBookDepthLevel] = Field(..., description="Уровни спроса (bid), по убыванию цены")
+    asks: List[OrderBookDepthLevel] = Field(..., description="Уровни предложения (ask), по возрастанию цены")
+
 class GetQuoteArgs(BaseModel):
     symbol: str = Field(..., description="Символ в формате ticker@mic, например SBER@MISX")
 
@@ -281,6 +370,25 @@ class Asset(BaseModel):
 class Assets(BaseModel):
     assets: List[Asset] = Field(..., description="Список инструментов")
 
+class ResolveSymbolArgs(BaseModel):
+    query: str = Field(..., min_length=1, description="Название компании, тикер или ISIN, например «Сбербанк», «gazprom», SBER")
+    mic: Optional[str] = Field(None, description="Только инструменты этой биржи (mic), например MISX")
+    limit: int = Field(5, ge=1, le=50, description="Максимум вариантов")
+
+class SymbolMatch(BaseModel):
+    symbol: str = Field(..., description="ticker@mic")
+    ticker: str = Field(..., description="Тикер")
+    mic: str = Field(..., description="mic биржи")
+    isin: Optional[str] = Field(None, description="ISIN")
+    name: Optional[str] = Field(None, description="Наименование")
+    type: Optional[str] = Field(None, description="Тип инструмента")
+    score: float = Field(..., description="Оценка совпадения от 0 до 1 (1 — точное)")
+    match: str = Field(..., description="Способ совпадения: exact, prefix или fuzzy")
+
+class SymbolMatches(BaseModel):
+    query: str = Field(..., description="Исходный запрос")
+    matches: List[SymbolMatch] = Field(..., description="Подходящие инструменты по убыванию оценки")
+
 class GetAssetArgs(BaseModel):
     symbol: str = Field(..., description="ticker@mic")
     account_id: Optional[str] = Field(None, description="ID счета для специфики параметров, если нужен")
@@ -322,6 +430,15 @@ class AssetOptions(BaseModel):
     symbol: str = Field(..., description="ticker@mic")
     series: List[OptionSeries] = Field(..., description="Опционные серии")
 
+class OptionChainArgs(BaseModel):
+    symbol: str = Field(..., description="ticker@mic базового актива")
+    expirations: int = Field(3, ge=1, le=24, description="Сколько ближайших экспираций взять")
+    strike_range: float = Field(0.2, gt=0, le=1, description="Страйки в пределах этой доли от цены базового актива")
+    model: Literal["auto", "black_scholes", "black76"] = Field(
+        "auto", description="Модель: black76 для опционов на фьючерсы, black_scholes для акций; auto — по типу базового актива"
+    )
+    risk_free_rate: Optional[float] = Field(None, description="Безрисковая ставка, доля годовых")
+
 class InstrTradesLatestArgs(BaseModel):
     symbol: str = Field(..., description="ticker@mic")
     limit: Optional[int] = Field(None, ge=1, le=5000, description="Максимум последних принтов")
@@ -336,6 +453,30 @@ class InstrTradesLatest(BaseModel):
     symbol: str = Field(..., description="ticker@mic")
     trades: List[PrintTrade] = Field(..., description="Последние сделки")
 
+class TradeFlowArgs(BaseModel):
+    symbol: str = Field(..., description="ticker@mic")
+    window_seconds: Optional[float] = Field(None, gt=0, description="Окно в секундах до последней сделки (по умолчанию вся накопленная лента)")
+    bucket_seconds: float = Field(60, gt=0, description="Длительность интервала для объёма по времени, секунды")
+
+class TradeFlowBucket(BaseModel):
+    start: datetime = Field(..., description="Начало интервала")
+    volume: float = Field(..., description="Объем сделок")
+    buy_volume: float = Field(..., description="Объем покупок")
+    sell_volume: float = Field(..., description="Объем продаж")
+
+class TradeFlow(BaseModel):
+    symbol: str = Field(..., description="ticker@mic")
+    trades: int = Field(..., description="Количество сделок в окне")
+    first_timestamp: Optional[datetime] = Field(None, description="Время первой сделки окна")
+    last_timestamp: Optional[datetime] = Field(None, description="Время последней сделки окна")
+    last_price: Optional[float] = Field(None, description="Цена последней сделки")
+    volume: float = Field(..., description="Объем сделок")
+    vwap: Optional[float] = Field(None, description="Средневзвешенная по объему цена")
+    buy_volume: float = Field(..., description="Объем покупок")
+    sell_volume: float = Field(..., description="Объем продаж")
+    imbalance: Optional[float] = Field(None, description="Дисбаланс (покупки − продажи) / (покупки + продажи), от −1 до 1")
+    buckets: List[TradeFlowBucket] = Field(..., description="Объем по интервалам времени")
+
 class ClockResponse(BaseModel):
     timestamp: str
 
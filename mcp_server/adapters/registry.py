@@ -0,0 +1,189 @@
+"""
+Реестр клиентов Finam по токенам доступа
+
+Один MCP-процесс обслуживает много счетов: у каждого токена свой FinamAPIClient (кэш,
+лимиты запросов, стаканы и ленты — данные одного арендатора не попадают к другому), а пул
+соединений с API общий, поэтому новый арендатор не открывает своих TCP/TLS-соединений.
+Число клиентов ограничено: при переполнении вытесняется тот, к кому дольше всего не
+обращались, а клиенты без обращений дольше idle_ttl закрываются фоновой задачей. Клиент
+с токеном по умолчанию (FINAM_ACCESS_TOKEN) не вытесняется.
+
+Арендатор в статистике обозначается коротким хэшем токена — сами токены наружу не попадают.
+"""
+
+import asyncio
+import contextlib
+import functools
+import os
+import time
+from collections import OrderedDict
+from collections.abc import AsyncIterator, Callable, Mapping
+from dataclasses import asdict, dataclass, field
+from typing import Any
+
+import httpx
+
+from .finam_client import FinamAPIClient, http_pool, tenant_id
+
+
+def token_from_headers(headers: Mapping[str, str]) -> str | None:
+    """Токен Finam из заголовков HTTP-запроса: X-Finam-Token или Authorization (Bearer)"""
+    token = headers.get("x-finam-token") or headers.get("authorization") or ""
+    return token.removeprefix("Bearer ").strip() or None
+
+
+@dataclass
+class TenantStats:
+    calls: int = 0
+    errors: int = 0
+    inflight: int = 0
+    busy_seconds: float = 0.0
+    created_at: float = field(default_factory=time.time)
+    last_used: float = field(default_factory=time.monotonic)
+
+    def as_dict(self) -> dict[str, Any]:
+        d = asdict(self)
+        d["idle_seconds"] = round(time.monotonic() - d.pop("last_used"), 3)
+        d["busy_seconds"] = round(self.busy_seconds, 6)
+        return d
+
+
+@dataclass
+class _Tenant:
+    client: FinamAPIClient
+    stats: TenantStats = field(default_factory=TenantStats)
+    evicted: bool = False
+
+
+class ClientRegistry:
+    def __init__(self, max_clients: int | None = None, idle_ttl: float | None = None,
+                 http: httpx.AsyncClient | None = None, **client_kwargs: Any) -> None:  # noqa: ANN401
+        """
+        Args:
+            max_clients: Сколько клиентов держать одновременно (FINAM_REGISTRY_MAX_CLIENTS)
+            idle_ttl: Через сколько секунд без обращений закрывать клиента (FINAM_REGISTRY_IDLE_TTL, 0 — не закрывать)
+            http: Общий пул соединений (по умолчанию http_pool())
+            client_kwargs: Параметры FinamAPIClient для всех клиентов
+        """
+        self.max_clients = max_clients or int(os.getenv("FINAM_REGISTRY_MAX_CLIENTS", "64"))
+        self.idle_ttl = idle_ttl if idle_ttl is not None else float(os.getenv("FINAM_REGISTRY_IDLE_TTL", "900"))
+        self.http = http or http_pool(client_kwargs.get("base_url"), client_kwargs.pop("max_connections", None),
+                                      client_kwargs.pop("max_keepalive_connections", None))
+        self._client_kwargs = client_kwargs
+        self.default_token = os.getenv("FINAM_ACCESS_TOKEN", "")
+        self._tenants: OrderedDict[str, _Tenant] = OrderedDict()
+        self.evictions = 0
+        self._sweeper: asyncio.Task | None = None
+
+    @property
+    def default(self) -> FinamAPIClient:
+        """Клиент с токеном по умолчанию"""
+        return self.get(None)
+
+    def get(self, access_token: str | None) -> FinamAPIClient:
+        """Клиент для токена (None или пустой — токен по умолчанию); создаётся при первом обращении"""
+        return self._tenant(access_token or self.default_token).client
+
+    def _tenant(self, token: str) -> _Tenant:
+        tenant = self._tenants.get(token)
+        if tenant is None:
+            tenant = _Tenant(FinamAPIClient(access_token=token, http=self.http, **self._client_kwargs))
+            self._tenants[token] = tenant
+            self._evict_overflow()
+            self._start_sweeper()
+        else:
+            self._tenants.move_to_end(token)
+        tenant.stats.last_used = time.monotonic()
+        return tenant
+
+    @contextlib.asynccontextmanager
+    async def lease(self, access_token: str | None) -> AsyncIterator[FinamAPIClient]:
+        """Клиент на время одного вызова инструмента: считает вызовы, ошибки и время арендатора"""
+        tenant = self._tenant(access_token or self.default_token)
+        stats = tenant.stats
+        stats.inflight += 1
+        started = time.perf_counter()
+        try:
+            yield tenant.client
+        except Exception:
+            stats.errors += 1
+            raise
+        finally:
+            stats.inflight -= 1
+            stats.calls += 1
+            stats.busy_seconds += time.perf_counter() - started
+            stats.last_used = time.monotonic()
+            if tenant.evicted and not stats.inflight:
+                await tenant.client.aclose()
+
+    def _evict_overflow(self) -> None:
+        """Вытеснить давно не использованных клиентов сверх max_clients (только что созданный — никогда)"""
+        for token in list(self._tenants)[:-1]:
+            if len(self._tenants) <= self.max_clients:
+                break
+            if token != self.default_token:
+                self._evict(token)
+
+    def _evict(self, token: str) -> None:
+        tenant = self._tenants.pop(token)
+        tenant.evicted = True
+        self.evictions += 1
+        if not tenant.stats.inflight:
+            # Клиент не закрывает общий пул: остаётся остановить его фоновые задачи
+            self._in_loop(tenant.client.aclose)
+
+    def evict_idle(self) -> int:
+        """Закрыть клиентов без обращений дольше idle_ttl; возвращает, сколько закрыто"""
+        deadline = time.monotonic() - self.idle_ttl
+        idle = [token for token, tenant in self._tenants.items()
+                if token != self.default_token and not tenant.stats.inflight and tenant.stats.last_used < deadline]
+        for token in idle:
+            self._evict(token)
+        return len(idle)
+
+    @staticmethod
+    def _in_loop(fn: Callable[[], Any]) -> asyncio.Task | None:
+        """Запустить корутину fn() в текущем цикле событий (вне цикла — ничего не делать)"""
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return None
+        return loop.create_task(fn())
+
+    def _start_sweeper(self) -> None:
+        if self.idle_ttl > 0 and (self._sweeper is None or self._sweeper.done()):
+            self._sweeper = self._in_loop(self._sweep_forever)
+
+    async def _sweep_forever(self) -> None:
+        while True:
+            await asyncio.sleep(max(1.0, self.idle_ttl / 4))
+            self.evict_idle()
+
+    def snapshot(self) -> dict[str, Any]:
+        """Счётчики реестра и каждого арендатора (вместе со статистикой его клиента)"""
+        return {
+            "clients": len(self._tenants),
+            "max_clients": self.max_clients,
+            "evictions": self.evictions,
+            "tenants": {
+                tenant_id(token): {**tenant.stats.as_dict(), "client": tenant.client.stats()}
+                for token, tenant in self._tenants.items()
+            },
+        }
+
+    def register_tools(self, mcp: Any, token: Callable[[], str | None]) -> None:  # noqa: ANN401
+        """Инструменты FinamAPIClient, каждый вызов которых выполняет клиент арендатора token() внутри lease"""
+        self.default.register_tools(mcp, lambda: self.lease(token()))
+
+    async def aclose(self) -> None:
+        if self._sweeper is not None:
+            self._sweeper.cancel()
+        for token in list(self._tenants):
+            await self._tenants.pop(token).client.aclose()
+        await self.http.aclose()
+
+
+@functools.cache
+def shared_registry() -> ClientRegistry:
+    """Реестр процесса: один общий пул соединений для MCP-сервера и инструментов finam_tools"""
+    return ClientRegistry()
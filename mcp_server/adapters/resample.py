@@ -0,0 +1,103 @@
+"""
+Построение свечей старшего таймфрейма из свечей младшего (OHLCV-агрегация)
+
+Границы свечей выравниваются по местному времени биржи: дневные свечи
+начинаются в местную полночь, недельные — в понедельник, месячные и
+квартальные — в первый день месяца. Смещение местного времени от UTC берётся
+из уже загруженных свечей целевого таймфрейма (native_offset_ns), чтобы
+построенные свечи размечались так же, как свечи API; по умолчанию —
+FINAM_SESSION_UTC_OFFSET_HOURS (+3, Москва).
+"""
+
+import os
+
+import numpy as np
+
+from .bar_store import BAR_DTYPE, NS, TIMEFRAME_NS
+from .pydantic_schema import TimeFrame
+
+_DAY_NS = 86400 * NS
+# 1970-01-01 — четверг, первый понедельник после эпохи — 1970-01-05
+_MONDAY_SHIFT_NS = 4 * _DAY_NS
+
+# Из каких таймфреймов можно построить целевой (от более крупного к более мелкому)
+RESAMPLE_SOURCES: dict[TimeFrame, list[TimeFrame]] = {
+    TimeFrame.TIME_FRAME_H1: [TimeFrame.TIME_FRAME_M30, TimeFrame.TIME_FRAME_M15,
+                              TimeFrame.TIME_FRAME_M5, TimeFrame.TIME_FRAME_M1],
+    TimeFrame.TIME_FRAME_H2: [TimeFrame.TIME_FRAME_H1, TimeFrame.TIME_FRAME_M30, TimeFrame.TIME_FRAME_M15,
+                              TimeFrame.TIME_FRAME_M5, TimeFrame.TIME_FRAME_M1],
+    TimeFrame.TIME_FRAME_H4: [TimeFrame.TIME_FRAME_H2, TimeFrame.TIME_FRAME_H1, TimeFrame.TIME_FRAME_M30,
+                              TimeFrame.TIME_FRAME_M15, TimeFrame.TIME_FRAME_M5, TimeFrame.TIME_FRAME_M1],
+    TimeFrame.TIME_FRAME_H8: [TimeFrame.TIME_FRAME_H4, TimeFrame.TIME_FRAME_H2, TimeFrame.TIME_FRAME_H1,
+                              TimeFrame.TIME_FRAME_M30, TimeFrame.TIME_FRAME_M15, TimeFrame.TIME_FRAME_M5,
+                              TimeFrame.TIME_FRAME_M1],
+    TimeFrame.TIME_FRAME_D: [TimeFrame.TIME_FRAME_H1, TimeFrame.TIME_FRAME_M30, TimeFrame.TIME_FRAME_M15,
+                             TimeFrame.TIME_FRAME_M5, TimeFrame.TIME_FRAME_M1],
+    TimeFrame.TIME_FRAME_W: [TimeFrame.TIME_FRAME_D],
+    TimeFrame.TIME_FRAME_MN: [TimeFrame.TIME_FRAME_D],
+    TimeFrame.TIME_FRAME_QR: [TimeFrame.TIME_FRAME_MN, TimeFrame.TIME_FRAME_D],
+}
+
+
+def session_offset_ns() -> int:
+    """Смещение местного времени биржи от UTC по FINAM_SESSION_UTC_OFFSET_HOURS, нс"""
+    return int(float(os.getenv("FINAM_SESSION_UTC_OFFSET_HOURS", "3")) * 3600 * NS)
+
+
+def native_offset_ns(ts: int, timeframe: TimeFrame) -> int:
+    """
+    Смещение, при котором ts — начало свечи timeframe
+
+    По метке времени любой свечи API находится фаза, с которой API размечает свечи
+    таймфрейма: для внутридневных — остаток от длины свечи, для дневных и старше — время суток.
+    """
+    span = min(TIMEFRAME_NS[timeframe], _DAY_NS)
+    return -int(ts) % span
+
+
+def bucket_starts(ts: np.ndarray, timeframe: TimeFrame, offset_ns: int | None = None) -> np.ndarray:
+    """Время начала свечи таймфрейма timeframe, в которую попадает каждая метка ts (нс UTC)"""
+    if offset_ns is None:
+        offset_ns = session_offset_ns()
+    local = np.asarray(ts, dtype=np.int64) + offset_ns
+    if timeframe == TimeFrame.TIME_FRAME_W:
+        span = 7 * _DAY_NS
+        return (local - _MONDAY_SHIFT_NS) // span * span + _MONDAY_SHIFT_NS - offset_ns
+    if timeframe in (TimeFrame.TIME_FRAME_MN, TimeFrame.TIME_FRAME_QR):
+        months = local.astype("datetime64[ns]").astype("datetime64[M]").astype(np.int64)
+        if timeframe == TimeFrame.TIME_FRAME_QR:
+            months = months // 3 * 3
+        return months.astype("datetime64[M]").astype("datetime64[ns]").astype(np.int64) - offset_ns
+    span = TIMEFRAME_NS[timeframe]
+    return local // span * span - offset_ns
+
+
+def next_bucket_start(start: int, timeframe: TimeFrame, offset_ns: int | None = None) -> int:
+    """Начало свечи, следующей за свечой, начинающейся в start"""
+    if timeframe in (TimeFrame.TIME_FRAME_MN, TimeFrame.TIME_FRAME_QR):
+        # Сдвиг заведомо больше длины свечи, но меньше двух её длин
+        step = 32 * _DAY_NS if timeframe == TimeFrame.TIME_FRAME_MN else 93 * _DAY_NS
+        return int(bucket_starts(np.array([start + step]), timeframe, offset_ns)[0])
+    return start + TIMEFRAME_NS[timeframe]
+
+
+def resample(bars: np.ndarray, timeframe: TimeFrame, offset_ns: int | None = None) -> np.ndarray:
+    """
+    Агрегировать отсортированные по времени свечи BAR_DTYPE в свечи таймфрейма timeframe
+
+    open — первой свечи, high/low — экстремумы, close — последней свечи, volume — сумма.
+    """
+    if not len(bars):
+        return np.empty(0, dtype=BAR_DTYPE)
+    keys = bucket_starts(bars["ts"], timeframe, offset_ns)
+    starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+    ends = np.r_[starts[1:], len(bars)]
+
+    out = np.empty(len(starts), dtype=BAR_DTYPE)
+    out["ts"] = keys[starts]
+    out["open"] = bars["open"][starts]
+    out["high"] = np.maximum.reduceat(bars["high"], starts)
+    out["low"] = np.minimum.reduceat(bars["low"], starts)
+    out["close"] = bars["close"][ends - 1]
+    out["volume"] = np.add.reduceat(bars["volume"], starts)
+    return out
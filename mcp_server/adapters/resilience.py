@@ -0,0 +1,82 @@
+"""
+Таймауты, повторы и хеджирование запросов к Finam TradeAPI
+
+Таймауты задаются по классам эндпоинтов (FINAM_TIMEOUT_<CLASS>, секунды). Повторяются
+только идемпотентные GET-запросы — при сетевых ошибках и ответах 5xx, с экспоненциальной
+задержкой и случайным разбросом (full jitter). Заявки повторно не отправляются.
+
+Хеджирование (FINAM_HEDGE_REQUESTS=1): если GET не ответил за p95 своего класса,
+отправляется дубликат, и используется ответ, пришедший первым.
+"""
+
+import os
+import random
+from collections import deque
+from dataclasses import asdict, dataclass
+
+import numpy as np
+
+from .endpoints import EndpointClass
+
+DEFAULT_TIMEOUTS: dict[EndpointClass, float] = {
+    EndpointClass.QUOTES: 0.8,
+    EndpointClass.CLOCK: 1.0,
+    EndpointClass.ACCOUNT: 5.0,
+    EndpointClass.ORDERS: 10.0,
+    EndpointClass.SESSION: 10.0,
+    EndpointClass.REFERENCE: 10.0,
+    EndpointClass.BARS: 30.0,
+}
+
+# Ответы, после которых GET имеет смысл повторить
+RETRYABLE_STATUSES = frozenset({500, 502, 503, 504})
+
+
+def timeouts_from_env(overrides: dict[EndpointClass, float] | None = None) -> dict[EndpointClass, float]:
+    """Таймауты по классам эндпоинтов: значения по умолчанию, затем FINAM_TIMEOUT_<CLASS>, затем overrides"""
+    timeouts = dict(DEFAULT_TIMEOUTS)
+    for endpoint_class in EndpointClass:
+        env_value = os.getenv(f"FINAM_TIMEOUT_{endpoint_class.name}")
+        if env_value is not None:
+            timeouts[endpoint_class] = float(env_value)
+    timeouts.update(overrides or {})
+    return timeouts
+
+
+@dataclass
+class RetryPolicy:
+    retries: int = 2  # Повторов сверх первой попытки
+    backoff_base: float = 0.1  # Секунды
+    backoff_cap: float = 2.0
+
+    def delay(self, attempt: int) -> float:
+        """Задержка перед повтором номер attempt (с 0): равномерно в [0, min(cap, base * 2^attempt)]"""
+        return random.uniform(0, min(self.backoff_cap, self.backoff_base * 2 ** attempt))
+
+
+class LatencyTracker:
+    """Последние длительности запросов по классам эндпоинтов"""
+
+    def __init__(self, window: int = 256, min_samples: int = 20) -> None:
+        self.min_samples = min_samples
+        self._samples: dict[EndpointClass, deque[float]] = {cls: deque(maxlen=window) for cls in EndpointClass}
+
+    def record(self, endpoint_class: EndpointClass, seconds: float) -> None:
+        self._samples[endpoint_class].append(seconds)
+
+    def percentile(self, endpoint_class: EndpointClass, q: float) -> float | None:
+        """q-й перцентиль или None, пока замеров меньше min_samples"""
+        samples = self._samples[endpoint_class]
+        if len(samples) < self.min_samples:
+            return None
+        return float(np.percentile(samples, q))
+
+
+@dataclass
+class ResilienceStats:
+    retries: int = 0  # Повторных попыток GET
+    hedges: int = 0  # Отправлено хедж-дубликатов
+    hedge_wins: int = 0  # Дубликат ответил раньше основного запроса
+
+    def as_dict(self) -> dict[str, int]:
+        return asdict(self)
@@ -0,0 +1,235 @@
+"""
+Планировщик запросов с учётом лимитов Finam TradeAPI
+
+Каждый запрос берёт по токену из двух корзин: общей для токена доступа (FINAM_RATE_GLOBAL)
+и корзины своего класса эндпоинтов (FINAM_RATE_<CLASS>). Формат значения — "rate[:burst]",
+rate в запросах в секунду, 0 — без ограничения. Лимиты Finam действуют на токен, а корзины живут
+в процессе, поэтому при FINAM_MCP_WORKERS > 1 каждый воркер получает свою долю скорости и всплеска.
+
+Ожидающие запросы обслуживаются по приоритету: заявки раньше котировок, котировки раньше
+догрузки истории. На ответ 429 корзина класса замедляется вдвое и блокируется на Retry-After,
+а после успешных ответов скорость постепенно восстанавливается (AIMD).
+"""
+
+import asyncio
+import contextlib
+import heapq
+import itertools
+import os
+import time
+from collections.abc import Callable
+from dataclasses import asdict, dataclass
+from enum import IntEnum
+
+from .endpoints import EndpointClass
+
+
+class Priority(IntEnum):
+    CRITICAL = 0  # Выставление и отмена заявок
+    HIGH = 1  # Счёт, сессия, время сервера
+    NORMAL = 2  # Рыночные данные
+    LOW = 3  # Справочники
+    BULK = 4  # Догрузка истории свечей
+
+
+DEFAULT_PRIORITIES: dict[EndpointClass, Priority] = {
+    EndpointClass.ORDERS: Priority.CRITICAL,
+    EndpointClass.ACCOUNT: Priority.HIGH,
+    EndpointClass.SESSION: Priority.HIGH,
+    EndpointClass.CLOCK: Priority.HIGH,
+    EndpointClass.QUOTES: Priority.NORMAL,
+    EndpointClass.REFERENCE: Priority.LOW,
+    EndpointClass.BARS: Priority.BULK,
+}
+
+# (запросов в секунду, размер всплеска)
+DEFAULT_GLOBAL_BUDGET = (20.0, 40.0)
+DEFAULT_BUDGETS: dict[EndpointClass, tuple[float, float]] = {
+    EndpointClass.ORDERS: (5.0, 10.0),
+    EndpointClass.ACCOUNT: (5.0, 10.0),
+    EndpointClass.SESSION: (1.0, 5.0),
+    EndpointClass.CLOCK: (1.0, 5.0),
+    EndpointClass.QUOTES: (10.0, 30.0),
+    EndpointClass.REFERENCE: (5.0, 10.0),
+    EndpointClass.BARS: (5.0, 10.0),
+}
+
+
+def _budget_from_env(name: str, default: tuple[float, float]) -> tuple[float, float]:
+    value = os.getenv(name)
+    if not value:
+        return default
+    rate, _, burst = value.partition(":")
+    return float(rate), float(burst) if burst else max(float(rate), 1.0)
+
+
+def _worker_share(budget: tuple[float, float], workers: int) -> tuple[float, float]:
+    """Доля бюджета одного из workers воркеров (всплеск не меньше одного запроса)"""
+    rate, burst = budget
+    return rate / workers, max(burst / workers, 1.0)
+
+
+class TokenBucket:
+    """Корзина токенов с адаптивной скоростью"""
+
+    def __init__(self, rate: float, burst: float, clock: Callable[[], float] = time.monotonic) -> None:
+        self.base_rate = rate
+        self.rate = rate
+        self.burst = burst
+        self._clock = clock
+        self._tokens = burst
+        self._updated = clock()
+        self._blocked_until = 0.0
+
+    @property
+    def unlimited(self) -> bool:
+        return self.base_rate <= 0
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def wait_time(self, now: float) -> float:
+        """Через сколько секунд будет доступен токен (0 — уже доступен)"""
+        if self.unlimited:
+            return 0.0
+        if now < self._blocked_until:
+            return self._blocked_until - now
+        self._refill(now)
+        return 0.0 if self._tokens >= 1 else (1 - self._tokens) / self.rate
+
+    def take(self, now: float) -> None:
+        if not self.unlimited:
+            self._refill(now)
+            self._tokens -= 1
+
+    def slow_down(self, retry_after: float | None) -> None:
+        """Ответ 429: уменьшить скорость вдвое (не ниже 5% базовой) и подождать retry_after"""
+        if self.unlimited:
+            return
+        now = self._clock()
+        self.rate = max(self.rate / 2, self.base_rate * 0.05)
+        self._tokens = min(self._tokens, 0.0)
+        self._blocked_until = max(self._blocked_until, now + (retry_after or 1.0 / self.rate))
+
+    def recover(self) -> None:
+        """Успешный ответ: вернуть 5% базовой скорости"""
+        if self.rate < self.base_rate:
+            self.rate = min(self.base_rate, self.rate + self.base_rate * 0.05)
+
+
+@dataclass
+class SchedulerStats:
+    granted: int = 0  # Выдано разрешений
+    queued: int = 0  # Из них пришлось ждать в очереди
+    rate_limited: int = 0  # Получено ответов 429
+
+    def as_dict(self) -> dict[str, int]:
+        return asdict(self)
+
+
+class RequestScheduler:
+    """Очередь запросов с приоритетами поверх корзин токенов"""
+
+    def __init__(self, clock: Callable[[], float] = time.monotonic, workers: int | None = None) -> None:
+        """
+        Инициализация планировщика
+
+        Args:
+            clock: Источник времени в секундах
+            workers: Сколько процессов делят лимиты токена (FINAM_MCP_WORKERS)
+        """
+        self._clock = clock
+        workers = max(workers or int(os.getenv("FINAM_MCP_WORKERS", "1")), 1)
+        self.global_bucket = TokenBucket(
+            *_worker_share(_budget_from_env("FINAM_RATE_GLOBAL", DEFAULT_GLOBAL_BUDGET), workers), clock=clock,
+        )
+        self.buckets = {
+            endpoint_class: TokenBucket(
+                *_worker_share(
+                    _budget_from_env(f"FINAM_RATE_{endpoint_class.name}", DEFAULT_BUDGETS[endpoint_class]), workers,
+                ),
+                clock=clock,
+            )
+            for endpoint_class in EndpointClass
+        }
+        self._waiters: list[tuple[int, int, EndpointClass, asyncio.Future]] = []
+        self._seq = itertools.count()
+        self._wakeup = asyncio.Event()
+        self._pump_task: asyncio.Task | None = None
+        self.stats = SchedulerStats()
+
+    def _try_take(self, endpoint_class: EndpointClass) -> bool:
+        now = self._clock()
+        bucket = self.buckets[endpoint_class]
+        if self.global_bucket.wait_time(now) > 0 or bucket.wait_time(now) > 0:
+            return False
+        self.global_bucket.take(now)
+        bucket.take(now)
+        return True
+
+    async def acquire(self, endpoint_class: EndpointClass, priority: Priority | None = None) -> None:
+        """Дождаться разрешения на запрос к эндпоинту класса endpoint_class"""
+        priority = DEFAULT_PRIORITIES[endpoint_class] if priority is None else priority
+        if not self._waiters and self._try_take(endpoint_class):
+            self.stats.granted += 1
+            return
+
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._seq), endpoint_class, future))
+        self.stats.queued += 1
+        self._wakeup.set()
+        if self._pump_task is None or self._pump_task.done():
+            self._pump_task = asyncio.ensure_future(self._pump())
+        await future
+
+    async def _pump(self) -> None:
+        """Выдавать разрешения ожидающим в порядке приоритета, пока очередь не опустеет"""
+        while self._waiters:
+            self._wakeup.clear()
+            now = self._clock()
+            sleep_for = self.global_bucket.wait_time(now)
+            if sleep_for <= 0:
+                sleep_for = float("inf")
+                # Самый приоритетный запрос, у класса которого есть токен; остальные ждут своей корзины
+                for entry in sorted(self._waiters):
+                    _, _, endpoint_class, future = entry
+                    if future.done():  # Ожидающий отменён
+                        self._waiters.remove(entry)
+                        heapq.heapify(self._waiters)
+                        sleep_for = 0.0
+                        break
+                    wait = self.buckets[endpoint_class].wait_time(now)
+                    if wait <= 0:
+                        self._waiters.remove(entry)
+                        heapq.heapify(self._waiters)
+                        self._try_take(endpoint_class)
+                        self.stats.granted += 1
+                        future.set_result(None)
+                        sleep_for = 0.0
+                        break
+                    sleep_for = min(sleep_for, wait)
+            if sleep_for > 0:
+                # Новый запрос может оказаться приоритетнее или из свободного класса — просыпаемся и по нему
+                with contextlib.suppress(TimeoutError):
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=sleep_for)
+
+    @property
+    def waiting(self) -> int:
+        """Сколько запросов ждут разрешения"""
+        return len(self._waiters)
+
+    def on_rate_limited(self, endpoint_class: EndpointClass, retry_after: float | None) -> None:
+        """Ответ 429 от API"""
+        self.stats.rate_limited += 1
+        self.buckets[endpoint_class].slow_down(retry_after)
+
+    def on_success(self, endpoint_class: EndpointClass) -> None:
+        self.buckets[endpoint_class].recover()
+
+    def snapshot(self) -> dict:
+        return {
+            **self.stats.as_dict(),
+            "waiting": self.waiting,
+            "rates": {cls.value: round(bucket.rate, 3) for cls, bucket in self.buckets.items()},
+        }
@@ -0,0 +1,132 @@
+"""
+Торговые сессии инструментов и время сервера
+
+Пока торги по инструменту не идут, котировки, стакан и свечи не меняются, и их не нужно
+перезапрашивать каждую секунду. TradingCalendar хранит интервалы торговых сессий из
+/v1/assets/{symbol}/schedule и смещение часов относительно /v1/assets/clock и растягивает
+TTL кэша и период опроса вне сессии — до начала следующей сессии, но не дольше max_idle.
+Во время сессии и для инструментов без расписания используются базовые значения.
+"""
+
+import bisect
+import os
+import re
+from dataclasses import dataclass
+
+from .bar_store import NS, now_ns, to_ns
+
+_SYMBOL_IN_PATH = re.compile(r"^/v1/instruments/([^/]+)/")
+
+# Если загруженное расписание закончилось или не загрузилось, перезагружать его не чаще, нс
+_SCHEDULE_RETRY_NS = 60 * NS
+
+# Типы и статусы сессий, во время которых сделок нет
+_IDLE_MARKERS = ("CLOSED", "BREAK", "CLEARING", "HALT")
+
+
+def symbol_from_path(path: str) -> str | None:
+    """Символ инструмента из пути /v1/instruments/{symbol}/..."""
+    match = _SYMBOL_IN_PATH.match(path)
+    return match.group(1) if match else None
+
+
+def _session_bounds(session: dict) -> tuple[str | None, str | None]:
+    """Начало и конец сессии: interval.start_time/end_time (API) или open_time/close_time"""
+    interval = session.get("interval") or {}
+    return (interval.get("start_time") or session.get("open_time"),
+            interval.get("end_time") or session.get("close_time"))
+
+
+def trading_intervals(payload: dict) -> list[tuple[int, int]]:
+    """Ответ /v1/assets/{symbol}/schedule → отсортированные непересекающиеся интервалы торгов, нс UTC"""
+    intervals = []
+    for session in payload.get("sessions", []):
+        kind = f"{session.get('type', '')} {session.get('status', '')}".upper()
+        if any(marker in kind for marker in _IDLE_MARKERS):
+            continue
+        start, end = _session_bounds(session)
+        if start and end:
+            intervals.append((to_ns(start), to_ns(end)))
+    merged: list[tuple[int, int]] = []
+    for start, end in sorted(intervals):
+        if merged and start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+@dataclass
+class _Schedule:
+    starts: list[int]
+    ends: list[int]
+    loaded_ns: int
+    failed: bool = False  # API вернул ошибку — расписание неизвестно
+
+    @property
+    def horizon_ns(self) -> int:
+        """До какого момента расписание известно"""
+        return self.ends[-1] if self.ends else self.loaded_ns
+
+
+class TradingCalendar:
+    def __init__(self, max_idle: float | None = None, schedule_ttl: float | None = None) -> None:
+        # Вне сессии TTL растягивается не дольше max_idle секунд: расписание может измениться
+        self.max_idle = max_idle if max_idle is not None else float(os.getenv("FINAM_SESSION_MAX_IDLE", "900"))
+        # Как часто перезагружать расписание инструмента, секунды
+        self.schedule_ttl = schedule_ttl if schedule_ttl is not None \
+            else float(os.getenv("FINAM_SCHEDULE_TTL", "21600"))
+        self._schedules: dict[str, _Schedule] = {}
+        self.clock_offset_ns = 0  # Время сервера минус локальное
+
+    def now_ns(self) -> int:
+        """Текущее время сервера Finam (по локальным часам с поправкой)"""
+        return now_ns() + self.clock_offset_ns
+
+    def sync_clock(self, payload: dict, sent_ns: int, received_ns: int) -> None:
+        """Поправка часов по ответу /v1/assets/clock; время ответа сервера — середина запроса"""
+        server_ns = to_ns(payload["timestamp"])
+        self.clock_offset_ns = server_ns - (sent_ns + received_ns) // 2
+
+    def set_schedule(self, symbol: str, payload: dict) -> None:
+        """Запомнить расписание инструмента (ответ с ошибкой — «расписание неизвестно» до повторной загрузки)"""
+        failed = "error" in payload
+        intervals = trading_intervals(payload) if not failed else []
+        self._schedules[symbol] = _Schedule([s for s, _ in intervals], [e for _, e in intervals], self.now_ns(),
+                                            failed)
+
+    def needs_schedule(self, symbol: str) -> bool:
+        """Расписания нет, оно устарело, закончилось или не загрузилось"""
+        schedule = self._schedules.get(symbol)
+        if schedule is None:
+            return True
+        age = self.now_ns() - schedule.loaded_ns
+        expired = bool(schedule.ends) and self.now_ns() >= schedule.horizon_ns
+        return age > self.schedule_ttl * NS or ((expired or schedule.failed) and age >= _SCHEDULE_RETRY_NS)
+
+    def is_open(self, symbol: str, now: int | None = None) -> bool | None:
+        """Идут ли торги (None — расписание неизвестно)"""
+        schedule = self._schedules.get(symbol)
+        if schedule is None or not schedule.starts:
+            return None
+        now = self.now_ns() if now is None else now
+        i = bisect.bisect_right(schedule.starts, now) - 1
+        return i >= 0 and now < schedule.ends[i]
+
+    def idle_for(self, symbol: str, now: int | None = None) -> float:
+        """Сколько секунд ещё не будет торгов по инструменту (0 — торги идут или расписание неизвестно)"""
+        now = self.now_ns() if now is None else now
+        if self.is_open(symbol, now) is not False:
+            return 0.0
+        schedule = self._schedules[symbol]
+        if now >= schedule.horizon_ns:
+            return 0.0  # Дальше расписание не загружено — не полагаемся на него
+        i = bisect.bisect_right(schedule.starts, now)
+        next_open = schedule.starts[i] if i < len(schedule.starts) else schedule.horizon_ns
+        return (next_open - now) / NS
+
+    def stretch(self, symbol: str | None, base: float) -> float:
+        """TTL или период опроса base с учётом сессии: вне торгов — до открытия, но не больше max_idle"""
+        if symbol is None or base <= 0:
+            return base
+        return max(base, min(self.idle_for(symbol), self.max_idle))
@@ -0,0 +1,331 @@
+"""
+Подписки на рыночные данные через MCP-ресурсы
+
+Ресурсы: finam://quote/{symbol}, finam://orderbook/{symbol}, finam://trades/{symbol}.
+Клиент подписывается на ресурс (resources/subscribe). Поток — ресурс в рамках арендатора:
+его опрашивает клиент Finam с токеном подписчика (со своими лимитами запросов и статистикой),
+и пока у потока есть подписчики, для него работает ровно один опрос источника
+(FINAM_STREAM_INTERVAL, секунды), сколько бы сессий арендатора ни было подписано. Когда данные
+меняются, подписчики получают notifications/resources/updated и читают ресурс из памяти,
+без запроса к Finam.
+
+С общим backplane (FINAM_BACKPLANE, несколько воркеров) поток опрашивает один воркер —
+тот, кто держит аренду poll:<поток>; новые данные он публикует в канал stream:<поток>, и каждый
+воркер уведомляет своих подписчиков. Если опрашивающий воркер остановился, аренда истекает
+и опрос подхватывает другой воркер, у которого есть подписчики. В имени потока арендатор
+обозначен хэшем токена (tenant_id), сам токен в backplane не попадает.
+
+Источник задаётся FINAM_FEED:
+  api  — Finam TradeAPI (по умолчанию)
+  fake — синтетические данные, чтобы проверять подписки без сети и токена
+"""
+
+import asyncio
+import functools
+import itertools
+import logging
+import os
+import random
+from collections.abc import Callable, Hashable
+from dataclasses import asdict, dataclass
+from datetime import UTC, datetime
+from enum import StrEnum
+from typing import Any, Protocol
+
+from pydantic import AnyUrl
+
+from .backplane import WORKER_ID, Backplane, Handler
+from .codec import codec
+from .registry import ClientRegistry, tenant_id
+
+logger = logging.getLogger(__name__)
+
+URI_SCHEME = "finam://"
+
+
+class StreamKind(StrEnum):
+    QUOTE = "quote"
+    ORDERBOOK = "orderbook"
+    TRADES = "trades"
+
+
+def resource_uri(kind: StreamKind, symbol: str) -> str:
+    return f"{URI_SCHEME}{kind.value}/{symbol}"
+
+
+def parse_uri(uri: str) -> tuple[StreamKind, str]:
+    """finam://<kind>/<symbol> → (kind, symbol); ValueError для чужих URI"""
+    if not uri.startswith(URI_SCHEME):
+        raise ValueError(f"Неизвестный ресурс: {uri}")
+    kind, _, symbol = uri[len(URI_SCHEME):].partition("/")
+    if not symbol:
+        raise ValueError(f"В URI ресурса нет символа инструмента: {uri}")
+    return StreamKind(kind), symbol
+
+
+class MarketDataFeed(Protocol):
+    async def fetch(self, kind: StreamKind, symbol: str) -> dict[str, Any]: ...
+
+    def interval(self, symbol: str, base: float) -> float:
+        """Период опроса инструмента (base — FINAM_STREAM_INTERVAL)"""
+        ...
+
+
+# Источник данных для токена арендатора
+FeedFactory = Callable[[str], MarketDataFeed]
+
+
+class ApiFeed:
+    """
+    Опрос Finam TradeAPI клиентом арендатора из реестра (с его кэшем, склейкой запросов и лимитами)
+
+    Клиент берётся из реестра на каждый опрос: вытесненного клиента реестр создаст заново.
+    """
+
+    def __init__(self, registry: ClientRegistry, token: str, orderbook_depth: int | None = None) -> None:
+        self.registry = registry
+        self.token = token
+        self.orderbook_depth = orderbook_depth
+
+    async def fetch(self, kind: StreamKind, symbol: str) -> dict[str, Any]:
+        async with self.registry.lease(self.token) as api:
+            if kind == StreamKind.QUOTE:
+                return await api.get_quote(symbol)
+            if kind == StreamKind.ORDERBOOK:
+                return await api.get_orderbook(symbol, self.orderbook_depth)
+            return await api.get_instrument_trades_latest(symbol)
+
+    def interval(self, symbol: str, base: float) -> float:
+        # Вне торговой сессии данные не меняются — опрашиваем реже
+        return self.registry.get(self.token).stretch_for_session(symbol, base)
+
+
+class FakeFeed:
+    """Случайное блуждание цены по каждому инструменту в формате ответов API"""
+
+    def __init__(self, seed: int | None = None, start_price: float = 100.0, tick: float = 0.01) -> None:
+        self._random = random.Random(seed)
+        self.start_price = start_price
+        self.tick = tick
+        self._prices: dict[str, float] = {}
+        self._trade_ids = itertools.count(1)
+
+    def _step(self, symbol: str) -> float:
+        price = self._prices.get(symbol, self.start_price)
+        price = max(self.tick, round(price + self._random.randint(-3, 3) * self.tick, 6))
+        self._prices[symbol] = price
+        return price
+
+    async def fetch(self, kind: StreamKind, symbol: str) -> dict[str, Any]:
+        price = self._step(symbol)
+        now = datetime.now(UTC).isoformat()
+        if kind == StreamKind.QUOTE:
+            return {"symbol": symbol, "quote": {
+                "symbol": symbol, "timestamp": now,
+                "bid": str(round(price - self.tick, 6)), "bid_size": str(self._random.randint(1, 100)),
+                "ask": str(round(price + self.tick, 6)), "ask_size": str(self._random.randint(1, 100)),
+                "last": str(price), "last_size": str(self._random.randint(1, 10)),
+            }}
+        if kind == StreamKind.ORDERBOOK:
+            rows = []
+            for level in range(1, 11):
+                rows.append({"price": str(round(price + level * self.tick, 6)),
+                             "sell_size": str(self._random.randint(1, 100)), "buy_size": "0", "action": 2,
+                             "timestamp": now})
+                rows.append({"price": str(round(price - level * self.tick, 6)), "sell_size": "0",
+                             "buy_size": str(self._random.randint(1, 100)), "action": 2, "timestamp": now})
+            return {"symbol": symbol, "orderbook": {"rows": rows}}
+        trades = [
+            {"trade_id": str(next(self._trade_ids)), "timestamp": now, "price": str(price),
+             "size": str(self._random.randint(1, 10)), "side": self._random.choice(["buy", "sell"])}
+            for _ in range(self._random.randint(0, 3))
+        ]
+        return {"symbol": symbol, "trades": trades}
+
+    def interval(self, _symbol: str, base: float) -> float:
+        return base
+
+
+def feed_from_env(registry: ClientRegistry) -> FeedFactory:
+    """Фабрика источников по FINAM_FEED: для api — опрос клиентом арендатора, fake — один источник на всех"""
+    name = os.getenv("FINAM_FEED", "api")
+    if name == "fake":
+        feed = FakeFeed()
+        return lambda _token: feed
+    if name != "api":
+        raise RuntimeError(f"Неизвестный FINAM_FEED: {name}")
+    depth = os.getenv("FINAM_STREAM_ORDERBOOK_DEPTH")
+    return functools.partial(ApiFeed, registry, orderbook_depth=int(depth) if depth else None)
+
+
+@dataclass
+class StreamStats:
+    polls: int = 0  # Запросов к источнику
+    updates: int = 0  # Из них с изменившимися данными
+    notifications: int = 0  # Отправлено уведомлений подписчикам
+    errors: int = 0  # Ошибок опроса
+
+    def as_dict(self) -> dict[str, int]:
+        return asdict(self)
+
+
+class SubscriptionHub:
+    """
+    Подписки сессий на ресурсы и по одному опросу источника на поток (ресурс арендатора)
+
+    Подписчик — любой объект с методом send_resource_updated(uri) (ServerSession MCP).
+    Подписчик, которому не удалось отправить уведомление (соединение закрыто), удаляется.
+    """
+
+    def __init__(self, feeds: FeedFactory, interval: float | None = None, backplane: Backplane | None = None) -> None:
+        self.feeds = feeds
+        self.interval = interval if interval is not None else float(os.getenv("FINAM_STREAM_INTERVAL", "1"))
+        self.backplane = backplane
+        self.worker_id = WORKER_ID
+        # Поток — "<tenant_id>:<uri>"; по нему же называются аренда опроса и канал backplane
+        self._uris: dict[str, str] = {}
+        self._feeds: dict[str, MarketDataFeed] = {}
+        self._subscribers: dict[str, set[Hashable]] = {}
+        self._pollers: dict[str, asyncio.Task] = {}
+        self._latest: dict[str, dict[str, Any]] = {}
+        self._handlers: dict[str, Handler] = {}
+        self._leading: set[str] = set()
+        self._cleanup: set[asyncio.Task] = set()
+        self.stats = StreamStats()
+
+    @staticmethod
+    def stream_key(uri: str, token: str) -> str:
+        return f"{tenant_id(token)}:{uri}"
+
+    async def subscribe(self, uri: str, session: Hashable, token: str) -> None:
+        """Подписать сессию на ресурс; опрашивается он с токеном подписчика token"""
+        parse_uri(uri)
+        stream = self.stream_key(uri, token)
+        self._subscribers.setdefault(stream, set()).add(session)
+        if stream not in self._pollers:
+            self._uris[stream] = uri
+            self._feeds[stream] = self.feeds(token)
+            self._pollers[stream] = asyncio.create_task(self._poll(stream))
+            if self.backplane is not None:
+                handler = self._handlers[stream] = functools.partial(self._on_message, stream)
+                await self.backplane.subscribe(f"stream:{stream}", handler)
+
+    async def unsubscribe(self, uri: str, session: Hashable) -> None:
+        for stream, stream_uri in list(self._uris.items()):
+            subscribers = self._subscribers.get(stream)
+            if stream_uri != uri or subscribers is None:
+                continue
+            subscribers.discard(session)
+            if not subscribers:
+                self._stop(stream)
+
+    def _stop(self, stream: str) -> None:
+        self._subscribers.pop(stream, None)
+        self._latest.pop(stream, None)
+        self._uris.pop(stream, None)
+        self._feeds.pop(stream, None)
+        poller = self._pollers.pop(stream, None)
+        if poller is not None:
+            poller.cancel()
+        handler = self._handlers.pop(stream, None)
+        if handler is not None:
+            # _stop вызывается и из самого опроса, который уже отменён: отписка идёт отдельной задачей
+            task = asyncio.ensure_future(self._leave(stream, handler))
+            self._cleanup.add(task)
+            task.add_done_callback(self._cleanup.discard)
+
+    async def _leave(self, stream: str, handler: Handler) -> None:
+        try:
+            await self.backplane.unsubscribe(f"stream:{stream}", handler)
+            if stream in self._leading:
+                self._leading.discard(stream)
+                await self.backplane.release(f"poll:{stream}", self.worker_id)
+        except Exception:
+            logger.warning("Не удалось отписаться от %s в backplane", stream, exc_info=True)
+
+    async def read(self, uri: str, token: str) -> dict[str, Any]:
+        """Последние данные ресурса для арендатора; без подписки — разовый запрос к источнику"""
+        stream = self.stream_key(uri, token)
+        if stream in self._latest:
+            return self._latest[stream]
+        kind, symbol = parse_uri(uri)
+        return await self.feeds(token).fetch(kind, symbol)
+
+    async def _poll(self, stream: str) -> None:
+        uri, feed = self._uris[stream], self._feeds[stream]
+        kind, symbol = parse_uri(uri)
+        while True:
+            interval = feed.interval(symbol, self.interval)
+            if await self._lead(stream, interval):
+                self.stats.polls += 1
+                try:
+                    payload = await feed.fetch(kind, symbol)
+                except Exception:
+                    self.stats.errors += 1
+                    logger.exception("Ошибка опроса %s", uri)
+                else:
+                    if "error" in payload:
+                        self.stats.errors += 1
+                    elif payload != self._latest.get(stream):
+                        await self._publish(stream, payload)
+            await asyncio.sleep(interval)
+
+    async def _lead(self, stream: str, interval: float) -> bool:
+        """Опрашивать ли поток этому воркеру: без backplane — всегда, иначе — если аренда наша"""
+        if self.backplane is None:
+            return True
+        try:
+            leading = await self.backplane.claim(f"poll:{stream}", self.worker_id, 2 * interval + 1)
+        except Exception:
+            # Без backplane подписчики этого воркера получают данные от собственного опроса
+            self.stats.errors += 1
+            logger.warning("backplane недоступен, %s опрашивается локально", stream, exc_info=True)
+            leading = True
+        if leading:
+            self._leading.add(stream)
+        else:
+            self._leading.discard(stream)
+        return leading
+
+    async def _publish(self, stream: str, payload: dict[str, Any]) -> None:
+        if self.backplane is not None:
+            try:
+                await self.backplane.publish(f"stream:{stream}", codec.dumps(payload))
+                return
+            except Exception:
+                self.stats.errors += 1
+                logger.warning("Не удалось опубликовать %s, уведомляем только своих подписчиков", stream,
+                               exc_info=True)
+        await self._update(stream, payload)
+
+    async def _on_message(self, stream: str, message: bytes) -> None:
+        await self._update(stream, codec.loads(message))
+
+    async def _update(self, stream: str, payload: dict[str, Any]) -> None:
+        if stream not in self._subscribers or payload == self._latest.get(stream):
+            return
+        self.stats.updates += 1
+        self._latest[stream] = payload
+        await self._notify(stream)
+
+    async def _notify(self, stream: str) -> None:
+        uri = AnyUrl(self._uris[stream])
+        for session in list(self._subscribers.get(stream, ())):
+            try:
+                await session.send_resource_updated(uri)
+                self.stats.notifications += 1
+            except Exception:
+                logger.debug("Подписчик %s на %s отключился", session, uri)
+                self._subscribers[stream].discard(session)
+        if not self._subscribers.get(stream):
+            self._stop(stream)
+
+    def snapshot(self) -> dict[str, Any]:
+        return {**self.stats.as_dict(), "streams": sorted(self._pollers), "leading": sorted(self._leading),
+                "subscribers": sum(len(s) for s in self._subscribers.values())}
+
+    async def aclose(self) -> None:
+        for stream in list(self._pollers):
+            self._stop(stream)
+        # Отдать аренды опроса, чтобы другие воркеры подхватили потоки сразу, не дожидаясь их истечения
+        await asyncio.gather(*self._cleanup, return_exceptions=True)
@@ -0,0 +1,374 @@
+"""
+Индекс инструментов для поиска символа по названию, тикеру или ISIN
+
+Снимок /v1/assets загружается в память один раз и затем обновляется в фоне; он одинаков
+для всех токенов, поэтому индекс один на процесс (shared_catalog()). Для каждого
+инструмента индексируются: символ, тикер, ISIN, название и слова названия, их транслитерация
+(«Сбербанк» ↔ «sberbank») и синонимы из ALIASES («Норникель» → GMKN).
+
+Поиск:
+  1. точное совпадение символа, тикера, ISIN или синонима — словарь;
+  2. префикс — бинарный поиск по отсортированному списку термов;
+  3. нечёткое совпадение — по общим триграммам, только если первые два способа ничего не нашли.
+"""
+
+import asyncio
+import bisect
+import functools
+import json
+import os
+import re
+from collections import Counter, defaultdict
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+from typing import Any
+
+from finam_tracing import detached
+
+# Распространённые названия, которые не выводятся из наименования инструмента в /v1/assets
+ALIASES: dict[str, tuple[str, ...]] = {
+    "SBER": ("сбер", "сбербанк", "sber", "sberbank"),
+    "GAZP": ("газпром", "gazprom"),
+    "LKOH": ("лукойл", "lukoil"),
+    "GMKN": ("норникель", "норильский никель", "nornickel", "norilsk nickel"),
+    "ROSN": ("роснефть", "rosneft"),
+    "NVTK": ("новатэк", "novatek"),
+    "TATN": ("татнефть", "tatneft"),
+    "SNGS": ("сургутнефтегаз", "сургут", "surgutneftegas"),
+    "VTBR": ("втб", "vtb"),
+    "T": ("т-банк", "тинькофф", "tinkoff", "t-bank"),
+    "YDEX": ("яндекс", "yandex"),
+    "OZON": ("озон", "ozon"),
+    "MGNT": ("магнит", "magnit"),
+    "MTSS": ("мтс", "mts"),
+    "ALRS": ("алроса", "alrosa"),
+    "PLZL": ("полюс", "polyus"),
+    "CHMF": ("северсталь", "severstal"),
+    "NLMK": ("нлмк", "nlmk"),
+    "MAGN": ("ммк", "mmk"),
+    "AFLT": ("аэрофлот", "aeroflot"),
+    "MOEX": ("мосбиржа", "московская биржа", "moscow exchange"),
+    "PHOR": ("фосагро", "phosagro"),
+    "RUAL": ("русал", "rusal"),
+    "IRAO": ("интер рао", "inter rao"),
+    "HYDR": ("русгидро", "rushydro"),
+    "POSI": ("позитив", "positive technologies"),
+}
+
+# Слова, которые ничего не говорят об эмитенте
+STOP_WORDS = frozenset({"пао", "ао", "оао", "зао", "ап", "pjsc", "ojsc", "jsc", "plc", "ltd", "inc", "ag"})
+
+_TRANSLIT = str.maketrans({
+    "а": "a", "б": "b", "в": "v", "г": "g", "д": "d", "е": "e", "ё": "e", "ж": "zh", "з": "z", "и": "i",
+    "й": "y", "к": "k", "л": "l", "м": "m", "н": "n", "о": "o", "п": "p", "р": "r", "с": "s", "т": "t",
+    "у": "u", "ф": "f", "х": "kh", "ц": "ts", "ч": "ch", "ш": "sh", "щ": "sch", "ъ": "", "ы": "y", "ь": "",
+    "э": "e", "ю": "yu", "я": "ya",
+})
+_NON_WORD = re.compile(r"[^\w]+")
+
+
+def normalize(text: str) -> str:
+    """Нижний регистр, ё → е, без пунктуации и организационно-правовых форм"""
+    words = _NON_WORD.sub(" ", text.lower().replace("ё", "е")).split()
+    return " ".join(w for w in words if w not in STOP_WORDS)
+
+
+def translit(text: str) -> str:
+    return text.translate(_TRANSLIT)
+
+
+def _trigrams(term: str) -> set[str]:
+    padded = f"  {term} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def _aliases_from_env() -> dict[str, tuple[str, ...]]:
+    """ALIASES, дополненные JSON-файлом {"TICKER": ["синоним", ...]} из FINAM_SYMBOL_ALIASES"""
+    aliases = dict(ALIASES)
+    path = os.getenv("FINAM_SYMBOL_ALIASES")
+    if path:
+        with open(path, encoding="utf-8") as f:
+            for ticker, names in json.load(f).items():
+                aliases[ticker.upper()] = (*aliases.get(ticker.upper(), ()), *names)
+    return aliases
+
+
+@dataclass(frozen=True)
+class _Entry:
+    symbol: str
+    ticker: str
+    mic: str
+    isin: str | None
+    name: str | None
+    type: str | None
+
+    @classmethod
+    def from_asset(cls, asset: dict[str, Any]) -> "_Entry":
+        ticker = asset.get("ticker") or asset["symbol"].partition("@")[0]
+        mic = asset.get("mic") or asset["symbol"].partition("@")[2]
+        return cls(asset["symbol"], ticker, mic, asset.get("isin"), asset.get("name"), asset.get("type"))
+
+    def terms(self, aliases: dict[str, tuple[str, ...]]) -> tuple[set[str], set[str]]:
+        """(термы для точного совпадения, термы для префиксного и нечёткого поиска)"""
+        exact = {self.symbol.lower(), self.ticker.lower()}
+        if self.isin:
+            exact.add(self.isin.lower())
+        names = {normalize(a) for a in aliases.get(self.ticker.upper(), ())}
+        exact |= names
+        if self.name:
+            name = normalize(self.name)
+            names |= {name, translit(name), *name.split(), *translit(name).split()}
+        return exact, {t for t in names | exact if t}
+
+
+Terms = tuple[set[str], set[str]]
+
+
+@dataclass
+class IndexUpdate:
+    """Подготовленное обновление индекса (см. SymbolIndex.prepare)"""
+
+    entries: dict[str, _Entry]
+    changed: dict[str, Terms]  # Новые и изменившиеся инструменты с их термами
+    removed: set[str]
+    rebuilt: tuple | None = None  # Индекс, собранный заново, если изменилось слишком много
+
+
+class SymbolIndex:
+    """
+    Индекс инструментов
+
+    Обновление делится на prepare() — разбор снимка, его можно выполнять в отдельном потоке, —
+    и apply(), который либо правит индекс точечно (меняются только термы изменившихся
+    инструментов), либо, если изменилось больше rebuild_ratio записей, подменяет его собранным заново.
+    """
+
+    def __init__(self, preferred_mics: tuple[str, ...] = ("MISX",), rebuild_ratio: float = 0.1) -> None:
+        self.preferred_mics = preferred_mics
+        self.rebuild_ratio = rebuild_ratio
+        self.aliases = _aliases_from_env()
+        self._entries: dict[str, _Entry] = {}
+        self._terms: dict[str, Terms] = {}
+        self._exact: dict[str, set[str]] = {}  # точный терм → символы
+        self._term_symbols: dict[str, set[str]] = {}  # терм поиска → символы
+        self._trigrams: dict[str, set[str]] = {}  # триграмма → термы поиска
+        self._sorted: list[tuple[str, str]] = []  # (терм поиска, символ), по возрастанию
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def prepare(self, assets: list[dict[str, Any]]) -> IndexUpdate:
+        """Сравнить снимок /v1/assets с индексом; сам индекс не меняется"""
+        entries = {}
+        for asset in assets:
+            entry = _Entry.from_asset(asset)
+            entries[entry.symbol] = entry
+        changed = {s: e.terms(self.aliases) for s, e in entries.items() if self._entries.get(s) != e}
+        removed = {s for s in self._entries if s not in entries}
+        update = IndexUpdate(entries, changed, removed)
+        if len(changed) + len(removed) > len(self._entries) * self.rebuild_ratio:
+            update.rebuilt = self._build({**{s: self._terms[s] for s in entries if s not in changed}, **changed})
+        return update
+
+    @staticmethod
+    def _build(terms: dict[str, Terms]) -> tuple:
+        exact: dict[str, set[str]] = defaultdict(set)
+        term_symbols: dict[str, set[str]] = defaultdict(set)
+        for symbol, (exact_terms, search_terms) in terms.items():
+            for term in exact_terms:
+                exact[term].add(symbol)
+            for term in search_terms:
+                term_symbols[term].add(symbol)
+        trigrams: dict[str, set[str]] = defaultdict(set)
+        for term in term_symbols:
+            for gram in _trigrams(term):
+                trigrams[gram].add(term)
+        ordered = sorted((term, symbol) for term, symbols in term_symbols.items() for symbol in symbols)
+        return terms, dict(exact), dict(term_symbols), dict(trigrams), ordered
+
+    def apply(self, update: IndexUpdate) -> tuple[int, int]:
+        """Применить подготовленное обновление; возвращает (добавлено или изменено, удалено)"""
+        if update.rebuilt is not None:
+            self._terms, self._exact, self._term_symbols, self._trigrams, self._sorted = update.rebuilt
+        else:
+            for symbol in update.removed | update.changed.keys():
+                if symbol in self._terms:
+                    self._remove(symbol)
+            for symbol, terms in update.changed.items():
+                self._add(symbol, terms)
+        self._entries = update.entries
+        return len(update.changed), len(update.removed)
+
+    def update(self, assets: list[dict[str, Any]]) -> tuple[int, int]:
+        return self.apply(self.prepare(assets))
+
+    def _add(self, symbol: str, terms: Terms) -> None:
+        self._terms[symbol] = terms
+        exact_terms, search_terms = terms
+        for term in exact_terms:
+            self._exact.setdefault(term, set()).add(symbol)
+        for term in search_terms:
+            if term not in self._term_symbols:
+                self._term_symbols[term] = set()
+                for gram in _trigrams(term):
+                    self._trigrams.setdefault(gram, set()).add(term)
+            self._term_symbols[term].add(symbol)
+            bisect.insort(self._sorted, (term, symbol))
+
+    def _remove(self, symbol: str) -> None:
+        exact_terms, search_terms = self._terms.pop(symbol)
+        for term in exact_terms:
+            self._exact[term].discard(symbol)
+            if not self._exact[term]:
+                del self._exact[term]
+        for term in search_terms:
+            del self._sorted[bisect.bisect_left(self._sorted, (term, symbol))]
+            self._term_symbols[term].discard(symbol)
+            if not self._term_symbols[term]:
+                del self._term_symbols[term]
+                for gram in _trigrams(term):
+                    self._trigrams[gram].discard(term)
+
+    def _prefix(self, term: str, max_scan: int = 2000) -> dict[str, float]:
+        found: dict[str, float] = {}
+        i = bisect.bisect_left(self._sorted, (term, ""))
+        stop = min(i + max_scan, len(self._sorted))
+        while i < stop and self._sorted[i][0].startswith(term):
+            candidate, symbol = self._sorted[i]
+            # Чем ближе длина терма к запросу, тем выше оценка
+            found[symbol] = max(found.get(symbol, 0.0), 0.6 + 0.3 * len(term) / len(candidate))
+            i += 1
+        return found
+
+    def _fuzzy(self, term: str, cutoff: float = 0.3) -> dict[str, float]:
+        grams = _trigrams(term)
+        counts: Counter[str] = Counter()
+        for gram in grams:
+            counts.update(self._trigrams.get(gram, ()))
+        # Сходство Жаккара не больше common / len(grams): кандидаты с малым числом общих триграмм не проверяем
+        min_common = cutoff * len(grams)
+        found: dict[str, float] = {}
+        for candidate, common in counts.items():
+            if common < min_common:
+                continue
+            similarity = common / len(grams | _trigrams(candidate))
+            if similarity >= cutoff:
+                for symbol in self._term_symbols[candidate]:
+                    found[symbol] = max(found.get(symbol, 0.0), 0.6 * similarity)
+        return found
+
+    def _exact_matches(self, query: str, term: str) -> dict[str, float]:
+        """Точные совпадения запроса как есть, нормализованного и транслитерированного"""
+        variants = dict.fromkeys((query.strip().lower(), term, translit(term)))
+        return {symbol: 1.0 for variant in variants for symbol in self._exact.get(variant, ())}
+
+    def _prefix_matches(self, term: str) -> dict[str, float]:
+        """Префиксные совпадения нормализованного и транслитерированного запроса"""
+        found: dict[str, float] = {}
+        for variant in dict.fromkeys((term, translit(term))):
+            for symbol, score in self._prefix(variant).items():
+                found[symbol] = max(found.get(symbol, 0.0), score)
+        return found
+
+    def _describe(self, symbol: str, score: float, match: str) -> dict[str, Any]:
+        entry = self._entries[symbol]
+        return {
+            "symbol": symbol, "ticker": entry.ticker, "mic": entry.mic, "isin": entry.isin, "name": entry.name,
+            "type": entry.type, "score": round(score, 3), "match": match,
+        }
+
+    def resolve(self, query: str, limit: int = 5, mic: str | None = None) -> list[dict[str, Any]]:
+        """Подходящие инструменты по убыванию оценки (1 — точное совпадение)"""
+        term = normalize(query)
+        if not term:
+            return []
+        scores: dict[str, float] = {}
+        match: dict[str, str] = {}
+        for kind, found in (("exact", self._exact_matches(query, term)), ("prefix", self._prefix_matches(term))):
+            for symbol, score in found.items():
+                if score > scores.get(symbol, 0.0):
+                    scores[symbol], match[symbol] = score, kind
+        if not scores:
+            scores = self._fuzzy(translit(term))
+            match = dict.fromkeys(scores, "fuzzy")
+
+        if mic:
+            scores = {s: v for s, v in scores.items() if self._entries[s].mic.upper() == mic.upper()}
+
+        def rank(symbol: str) -> tuple:
+            entry = self._entries[symbol]
+            preferred = entry.mic in self.preferred_mics
+            return -scores[symbol], not preferred, len(entry.ticker), symbol
+
+        return [self._describe(s, scores[s], match[s]) for s in sorted(scores, key=rank)[:limit]]
+
+
+# Загрузка снимка /v1/assets: ответ API или словарь с ошибкой (FinamAPIClient.search_assets)
+FetchAssets = Callable[[], Awaitable[dict[str, Any]]]
+
+
+class SymbolCatalog:
+    """
+    Индекс инструментов процесса с загрузкой и фоновым обновлением
+
+    Клиенты арендаторов только читают index. Загрузку запускает сервер при старте (start)
+    или первый поиск (ready); параллельные поиски ждут одну загрузку. Снимок загружает клиент,
+    который её запустил: если его токен не подошёл и индекс пуст, следующий поиск пробует снова.
+    Фоновое обновление идёт через клиента последней удачной загрузки.
+    """
+
+    def __init__(self, index: SymbolIndex | None = None, refresh_interval: float | None = None) -> None:
+        """
+        Args:
+            index: Индекс инструментов (по умолчанию пустой SymbolIndex)
+            refresh_interval: Период фонового обновления, с (FINAM_SYMBOLS_REFRESH_INTERVAL, 0 — не обновлять)
+        """
+        self.index = index or SymbolIndex()
+        self.refresh_interval = (refresh_interval if refresh_interval is not None
+                                 else float(os.getenv("FINAM_SYMBOLS_REFRESH_INTERVAL", "21600")))
+        self._loaded: asyncio.Future | None = None
+        self._refresher: asyncio.Task | None = None
+        self._fetch: FetchAssets | None = None
+
+    async def refresh(self, fetch: FetchAssets) -> dict[str, Any]:
+        """Загрузить снимок /v1/assets в индекс; возвращает счётчики или словарь с ошибкой"""
+        d = await fetch()
+        if "error" in d:
+            return d
+        # Разбор снимка (и полная пересборка индекса) — в отдельном потоке, чтобы не блокировать цикл событий
+        update = await asyncio.to_thread(self.index.prepare, d.get("assets", []))
+        changed, removed = self.index.apply(update)
+        self._fetch = fetch
+        return {"assets": len(self.index), "changed": changed, "removed": removed}
+
+    def start(self, fetch: FetchAssets) -> None:
+        """Начать загрузку, если индекс пуст и не загружается, и фоновое обновление, если оно не идёт"""
+        if self._loaded is None or (self._loaded.done() and not len(self.index)):
+            self._loaded = asyncio.ensure_future(self.refresh(fetch))
+        if self._refresher is None and self.refresh_interval > 0:
+            self._fetch = self._fetch or fetch
+            self._refresher = asyncio.get_running_loop().create_task(self._refresh_forever(), context=detached())
+
+    async def ready(self, fetch: FetchAssets) -> dict[str, Any] | None:
+        """Дождаться загрузки индекса; словарь с ошибкой — если загрузить не удалось и индекс пуст"""
+        self.start(fetch)
+        loaded = await asyncio.shield(self._loaded)
+        return loaded if "error" in loaded and not len(self.index) else None
+
+    async def _refresh_forever(self) -> None:
+        while True:
+            await asyncio.sleep(self.refresh_interval)
+            await self.refresh(self._fetch)
+
+    async def aclose(self) -> None:
+        """Остановить загрузку и фоновое обновление"""
+        for task in (self._loaded, self._refresher):
+            if task is not None:
+                task.cancel()
+        self._loaded = self._refresher = None
+
+
+@functools.cache
+def shared_catalog() -> SymbolCatalog:
+    """Индекс инструментов процесса, общий для клиентов всех арендаторов"""
+    return SymbolCatalog()
@@ -0,0 +1,162 @@
+"""
+Лента сделок по инструменту
+
+Ответы /v1/instruments/{symbol}/trades/latest перекрываются: каждый опрос возвращает
+окно последних сделок. TradeTape склеивает их по trade_id в кольцевой буфер фиксированного
+размера (NumPy) и поддерживает суммы для VWAP и объёмов покупок/продаж по всему буферу
+инкрементально — при добавлении сделки и при вытеснении самой старой. Чтобы ошибка округления
+от вычитаний не накапливалась при долгом опросе, после каждых capacity вытеснений суммы
+пересчитываются по буферу заново.
+
+Показатели за окно времени и объёмы по интервалам считаются по буферу векторно.
+"""
+
+from collections import deque
+from typing import Any
+
+import numpy as np
+
+from .bar_store import NS, to_iso, to_ns
+
+TRADE_DTYPE = np.dtype([("ts", "i8"), ("price", "f8"), ("size", "f8"), ("side", "i1")])
+
+BUY, SELL, UNKNOWN = 1, -1, 0
+
+
+def _side(value: str | None) -> int:
+    """'buy' / 'SIDE_BUY' → BUY, 'sell' / 'SIDE_SELL' → SELL"""
+    value = (value or "").lower()
+    if "buy" in value:
+        return BUY
+    if "sell" in value:
+        return SELL
+    return UNKNOWN
+
+
+class TradeTape:
+    """Кольцевой буфер последних capacity сделок инструмента"""
+
+    def __init__(self, symbol: str, capacity: int = 10_000) -> None:
+        self.symbol = symbol
+        self.capacity = capacity
+        self._buf = np.zeros(capacity, dtype=TRADE_DTYPE)
+        self._head = 0  # Куда запишется следующая сделка
+        self._count = 0
+        self._ids: deque[str] = deque()
+        self._seen: set[str] = set()
+        # Суммы по всему буферу
+        self.notional = 0.0
+        self.volume = 0.0
+        self.buy_volume = 0.0
+        self.sell_volume = 0.0
+        self.duplicates = 0
+        self._evictions = 0  # Вытеснений с последнего пересчёта сумм
+
+    def __len__(self) -> int:
+        return self._count
+
+    def _account(self, row: np.void, sign: int) -> None:
+        size = float(row["size"]) * sign
+        self.notional += float(row["price"]) * size
+        self.volume += size
+        if row["side"] == BUY:
+            self.buy_volume += size
+        elif row["side"] == SELL:
+            self.sell_volume += size
+
+    def _recount(self) -> None:
+        """Пересчитать суммы по буферу"""
+        trades = self._buf[:self._count]
+        size = trades["size"]
+        self.notional = float((trades["price"] * size).sum())
+        self.volume = float(size.sum())
+        self.buy_volume = float(size[trades["side"] == BUY].sum())
+        self.sell_volume = float(size[trades["side"] == SELL].sum())
+        self._evictions = 0
+
+    def merge(self, trades: list[dict[str, Any]]) -> int:
+        """Добавить сделки, которых ещё нет в буфере (по trade_id); возвращает число новых"""
+        fresh = []
+        for t in trades:
+            trade_id = str(t["trade_id"])
+            if trade_id in self._seen:
+                self.duplicates += 1
+                continue
+            self._seen.add(trade_id)
+            fresh.append((to_ns(t["timestamp"]), float(t["price"]), float(t["size"]), _side(t.get("side")), trade_id))
+        fresh.sort()
+        for ts, price, size, side, trade_id in fresh:
+            if self._count == self.capacity:
+                self._account(self._buf[self._head], -1)
+                self._seen.discard(self._ids.popleft())
+                self._evictions += 1
+            else:
+                self._count += 1
+            self._buf[self._head] = (ts, price, size, side)
+            self._account(self._buf[self._head], 1)
+            self._ids.append(trade_id)
+            self._head = (self._head + 1) % self.capacity
+        if self._evictions >= self.capacity:
+            self._recount()
+        return len(fresh)
+
+    def trades(self) -> np.ndarray:
+        """Сделки буфера в порядке поступления (копия)"""
+        if self._count < self.capacity:
+            return self._buf[:self._count].copy()
+        return np.concatenate([self._buf[self._head:], self._buf[:self._head]])
+
+    def _window(self, window_s: float | None) -> np.ndarray:
+        trades = self.trades()
+        if window_s is None or not len(trades):
+            return trades
+        return trades[trades["ts"] >= trades["ts"].max() - int(window_s * NS)]
+
+    def flow(self, window_s: float | None = None, bucket_s: float = 60) -> dict[str, Any]:
+        """
+        VWAP, объёмы покупок и продаж, дисбаланс и объём по интервалам bucket_s
+
+        Без window_s показатели берутся из инкрементальных сумм по всему буферу,
+        с window_s — за последние window_s секунд до самой свежей сделки.
+        """
+        if window_s is None:
+            volume, notional, buy, sell = self.volume, self.notional, self.buy_volume, self.sell_volume
+            trades = self.trades()
+        else:
+            trades = self._window(window_s)
+            size = trades["size"]
+            volume = float(size.sum())
+            notional = float((trades["price"] * size).sum())
+            buy = float(size[trades["side"] == BUY].sum())
+            sell = float(size[trades["side"] == SELL].sum())
+
+        buckets = []
+        if len(trades):
+            bucket_ns = int(bucket_s * NS)
+            starts = trades["ts"] // bucket_ns * bucket_ns
+            keys, index = np.unique(starts, return_inverse=True)
+            size = trades["size"]
+            bucket_volume = np.bincount(index, weights=size, minlength=len(keys))
+            bucket_buy = np.bincount(index, weights=np.where(trades["side"] == BUY, size, 0), minlength=len(keys))
+            bucket_sell = np.bincount(index, weights=np.where(trades["side"] == SELL, size, 0), minlength=len(keys))
+            buckets = [
+                {"start": to_iso(int(k)), "volume": float(v), "buy_volume": float(b), "sell_volume": float(s)}
+                for k, v, b, s in zip(keys, bucket_volume, bucket_buy, bucket_sell, strict=True)
+            ]
+
+        # Сделки разных опросов могут прийти не по порядку: последняя — с наибольшим ts
+        # (при равных ts — добавленная позже)
+        last = trades[len(trades) - 1 - int(np.argmax(trades["ts"][::-1]))] if len(trades) else None
+        return {
+            "symbol": self.symbol,
+            "trades": len(trades),
+            "first_timestamp": to_iso(int(trades["ts"].min())) if len(trades) else None,
+            "last_timestamp": to_iso(int(trades["ts"].max())) if len(trades) else None,
+            "last_price": float(last["price"]) if last is not None else None,
+            "volume": volume,
+            "vwap": notional / volume if volume else None,
+            "buy_volume": buy,
+            "sell_volume": sell,
+            "imbalance": (buy - sell) / (buy + sell) if buy + sell else None,
+            "buckets": buckets,
+        }
@@ -0,0 +1,47 @@
+"""
+Водопад трасс из файлов FINAM_TRACE_FILE агента и MCP-сервера
+
+    python -m adapters.trace_view traces/spans.jsonl [--trace <trace_id>] [--last N]
+"""
+
+import argparse
+import sys
+from collections.abc import Iterable
+from typing import Any
+
+from finam_tracing import waterfall
+
+from .codec import codec
+
+
+def read_spans(paths: Iterable[str]) -> dict[str, list[dict[str, Any]]]:
+    """Спаны из файлов FileExporter, сгруппированные по trace_id в порядке появления трасс"""
+    traces: dict[str, list[dict[str, Any]]] = {}
+    for path in paths:
+        with open(path, "rb") as f:
+            for line in f:
+                if line.strip():
+                    span = codec.loads(line)
+                    traces.setdefault(span["trace_id"], []).append(span)
+    return traces
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Водопад трасс из файлов FINAM_TRACE_FILE")
+    parser.add_argument("files", nargs="+")
+    parser.add_argument("--trace", help="trace_id (по умолчанию — последние трассы)")
+    parser.add_argument("--last", type=int, default=1, help="сколько последних трасс показать")
+    args = parser.parse_args(argv)
+    traces = read_spans(args.files)
+    if args.trace:
+        selected = [traces[args.trace]] if args.trace in traces else []
+    else:
+        # Трасса упорядочена по началу самого раннего спана: агент и сервер пишут свои части в разное время
+        selected = sorted(traces.values(), key=lambda spans: min(s["start_ns"] for s in spans))[-args.last:]
+    if not selected:
+        sys.exit("Трассы не найдены")
+    print("\n\n".join(waterfall(spans) for spans in selected))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,15 @@
+"""
+Трассировщик процесса MCP-сервера
+
+Спаны, экспортёры и водопад — общий с агентом модуль finam_tracing.
+"""
+
+import functools
+
+from finam_tracing import Tracer, tracer_from_env
+
+
+@functools.cache
+def shared_tracer() -> Tracer:
+    """Трассировщик процесса MCP-сервера (FINAM_TRACE, FINAM_TRACE_FILE, FINAM_TRACE_SAMPLE_RATE)"""
+    return tracer_from_env("mcp")
@@ -0,0 +1,82 @@
+"""
+Бенчмарк: разбор ответа /bars в List[Bar] с Decimal против колоночного ColumnarBars
+
+Запуск (из каталога mcp_server):
+    python -m benchmarks.bench_bars --bars 100000
+"""
+
+import argparse
+import time
+import tracemalloc
+from collections.abc import Callable
+from datetime import UTC, datetime, timedelta
+from decimal import Decimal
+from typing import Any
+
+from adapters.columnar import ColumnarBars
+from adapters.pydantic_schema import Bar, BarsResponse
+
+
+def make_payload(n: int) -> dict:
+    """Синтетический ответ API с n минутными свечами"""
+    t0 = datetime(2020, 1, 1, tzinfo=UTC)
+    bars = []
+    for i in range(n):
+        price = 250 + (i % 500) / 100
+        bars.append({
+            "timestamp": (t0 + timedelta(minutes=i)).isoformat().replace("+00:00", "Z"),
+            "open": f"{price:.2f}",
+            "high": f"{price + 0.35:.2f}",
+            "low": f"{price - 0.4:.2f}",
+            "close": f"{price + 0.05:.2f}",
+            "volume": str(1000 + i % 977),
+        })
+    return {"symbol": "SBER@MISX", "bars": bars}
+
+
+def pydantic_path(d: dict) -> BarsResponse:
+    """Прежний путь _get_candles: одна модель Bar и шесть Decimal на свечу"""
+    bars = [
+        Bar(
+            timestamp=datetime.fromisoformat(b["timestamp"]),
+            open=Decimal(b["open"]),
+            high=Decimal(b["high"]),
+            low=Decimal(b["low"]),
+            close=Decimal(b["close"]),
+            volume=Decimal(b["volume"]),
+        )
+        for b in d["bars"]
+    ]
+    return BarsResponse(symbol=d["symbol"], bars=bars)
+
+
+def measure(name: str, fn: Callable[[], Any], repeat: int) -> None:
+    best = float("inf")
+    for _ in range(repeat):
+        t = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t)
+    tracemalloc.start()
+    result = fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    print(f"{name:<40} {best * 1000:10.1f} ms {peak / 2**20:10.1f} MiB peak")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--bars", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    payload = make_payload(args.bars)
+    print(f"{args.bars} свечей, лучшее из {args.repeat}")
+    measure("List[Bar] + Decimal (прежний путь)", lambda: pydantic_path(payload), args.repeat)
+    measure("ColumnarBars.from_payload", lambda: ColumnarBars.from_payload(payload, "SBER@MISX"), args.repeat)
+    columnar = ColumnarBars.from_payload(payload, "SBER@MISX")
+    measure("ColumnarBars.to_response (по запросу)", columnar.to_response, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
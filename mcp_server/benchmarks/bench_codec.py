@@ -0,0 +1,148 @@
+"""
+Микробенчмарк JSON-пути: разбор ответа Finam → pydantic-модель → текст для LLM
+
+Сравниваются прежний путь (json + сборка моделей поле за полем + to_json с отступами)
+и новый (codec + model_validate + компактный JSON) для котировки, стакана и 50k свечей.
+
+Запуск (из каталога mcp_server):
+    python -m benchmarks.bench_codec
+"""
+
+import argparse
+import json
+import time
+from collections.abc import Callable
+from datetime import datetime
+from decimal import Decimal
+from typing import Any
+
+import pydantic_core
+from adapters.codec import StdJsonCodec, codec, dumps_text
+from adapters.pydantic_schema import (
+    Bar,
+    BarsResponse,
+    OrderBook,
+    OrderBookAction,
+    OrderBookResponse,
+    OrderBookRow,
+    Quote,
+    QuoteOption,
+    QuoteResponse,
+)
+from benchmarks.bench_bars import make_payload as make_bars_payload
+
+QUOTE_FIELDS = ("ask", "ask_size", "bid", "bid_size", "last", "last_size", "volume", "turnover",
+                "open", "high", "low", "close", "change")
+
+
+def make_quote() -> dict:
+    q = {name: f"{300 + i * 0.01:.2f}" for i, name in enumerate(QUOTE_FIELDS)}
+    q.update(symbol="SBER@MISX", timestamp="2024-01-01T10:00:00.123456Z")
+    return {"symbol": "SBER@MISX", "quote": q}
+
+
+def make_orderbook(depth: int = 50) -> dict:
+    rows = [
+        {
+            "price": f"{300 + (i - depth) * 0.01:.2f}",
+            "sell_size": "0" if i < depth else str(10 + i),
+            "buy_size": str(10 + i) if i < depth else "0",
+            "action": 2,
+            "timestamp": "2024-01-01T10:00:00.123456Z",
+        }
+        for i in range(depth * 2)
+    ]
+    return {"symbol": "SBER@MISX", "orderbook": {"rows": rows}}
+
+
+def legacy_quote(d: dict) -> QuoteResponse:
+    q = d.get("quote", d)
+    opt = q.get("option")
+    return QuoteResponse(
+        symbol=d.get("symbol"),
+        quote=Quote(
+            symbol=q.get("symbol"),
+            timestamp=datetime.fromisoformat(q["timestamp"]),
+            **{name: Decimal(q[name]) if q.get(name) is not None else None for name in QUOTE_FIELDS},
+            option=QuoteOption(**{k: (Decimal(v) if v is not None else None) for k, v in opt.items()}) if opt else None,
+        ),
+    )
+
+
+def legacy_orderbook(d: dict) -> OrderBookResponse:
+    rows = [
+        OrderBookRow(
+            price=Decimal(r["price"]),
+            sell_size=Decimal(r["sell_size"]),
+            buy_size=Decimal(r["buy_size"]),
+            action=OrderBookAction(r["action"]),
+            mpid=r.get("mpid"),
+            timestamp=datetime.fromisoformat(r["timestamp"]),
+        )
+        for r in d["orderbook"]["rows"]
+    ]
+    return OrderBookResponse(symbol=d["symbol"], orderbook=OrderBook(rows=rows))
+
+
+def legacy_bars(d: dict) -> BarsResponse:
+    bars = [
+        Bar(
+            timestamp=datetime.fromisoformat(b["timestamp"]),
+            open=Decimal(b["open"]), high=Decimal(b["high"]), low=Decimal(b["low"]),
+            close=Decimal(b["close"]), volume=Decimal(b["volume"]),
+        )
+        for b in d["bars"]
+    ]
+    return BarsResponse(symbol=d["symbol"], bars=bars)
+
+
+def best_of(fn: Callable[[], Any], repeat: int, number: int) -> float:
+    """Лучшее среднее время одного вызова, мкс"""
+    best = float("inf")
+    for _ in range(repeat):
+        t = time.perf_counter()
+        for _ in range(number):
+            fn()
+        best = min(best, (time.perf_counter() - t) / number)
+    return best * 1e6
+
+
+def run_case(name: str, raw: bytes, legacy: Callable[[dict], Any], fast: Callable[[dict], Any],
+             repeat: int, number: int) -> None:
+    std = StdJsonCodec()
+    d = codec.loads(raw)
+    legacy_model, fast_model = legacy(d), fast(d)
+    rows = [
+        ("decode", lambda: std.loads(raw), lambda: codec.loads(raw)),
+        ("build model", lambda: legacy(d), lambda: fast(d)),
+        ("encode for LLM", lambda: pydantic_core.to_json(legacy_model, fallback=str, indent=2),
+         lambda: dumps_text(fast_model)),
+    ]
+    print(f"\n{name} ({len(raw) / 1024:.1f} KiB), мкс на вызов")
+    print(f"  {'этап':<16}{'прежний':>14}{'новый':>14}{'ускорение':>12}")
+    total_old = total_new = 0.0
+    for stage, old_fn, new_fn in rows:
+        old, new = best_of(old_fn, repeat, number), best_of(new_fn, repeat, number)
+        total_old += old
+        total_new += new
+        print(f"  {stage:<16}{old:>14.1f}{new:>14.1f}{old / new:>11.1f}x")
+    print(f"  {'итого':<16}{total_old:>14.1f}{total_new:>14.1f}{total_old / total_new:>11.1f}x")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--bars", type=int, default=50_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"codec: {codec.name}")
+    run_case("quote", json.dumps(make_quote()).encode(), legacy_quote, QuoteResponse.model_validate,
+             args.repeat, 2000)
+    run_case("orderbook 2x50", json.dumps(make_orderbook()).encode(), legacy_orderbook,
+             OrderBookResponse.model_validate, args.repeat, 200)
+    run_case(f"bars {args.bars}", json.dumps(make_bars_payload(args.bars)).encode(), legacy_bars,
+             BarsResponse.model_validate, args.repeat, 1)
+
+
+if __name__ == "__main__":
+    main()
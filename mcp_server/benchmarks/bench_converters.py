@@ -0,0 +1,141 @@
+"""
+Микробенчмарк сборки моделей MCP-инструментов из ответов Finam
+
+Для котировки, стакана, последних сделок и списка инструментов сравнивается CPU на вызов:
+  поле за полем  — прежний путь (Decimal(...) по каждому полю, затем конструкторы моделей);
+  construct      — поля приводятся в Python, экземпляр собирается model_construct без валидации;
+  model_validate — один проход pydantic-core;
+  converter      — converter(model): первая сборка из ответа и повторная (ответ из кэша).
+
+Запуск (из каталога mcp_server):
+    python -m benchmarks.bench_converters
+"""
+
+import argparse
+from collections.abc import Callable
+from datetime import datetime
+from decimal import Decimal
+from typing import Any
+
+from adapters.converters import ModelConverter, converter
+from adapters.pydantic_schema import (
+    Asset,
+    Assets,
+    LatestTradesResponse,
+    OrderBook,
+    OrderBookAction,
+    OrderBookResponse,
+    OrderBookRow,
+    Quote,
+    QuoteResponse,
+    Trade,
+    TradeSide,
+)
+from benchmarks.bench_codec import QUOTE_FIELDS, best_of, legacy_orderbook, legacy_quote, make_orderbook, make_quote
+
+
+def make_trades(n: int = 100) -> dict:
+    trades = [
+        {"trade_id": str(1_000_000 + i), "mpid": "MOEX", "timestamp": "2024-01-01T10:00:00.123456Z",
+         "price": f"{300 + (i % 50) * 0.01:.2f}", "size": str(1 + i % 30), "side": "buy" if i % 2 else "sell"}
+        for i in range(n)
+    ]
+    return {"symbol": "SBER@MISX", "trades": trades}
+
+
+def make_assets(n: int = 2000) -> dict:
+    assets = [
+        {"symbol": f"T{i}@MISX", "id": str(i), "ticker": f"T{i}", "mic": "MISX", "isin": f"RU000A{i:06d}",
+         "type": "EQUITIES", "name": f"Компания {i}"}
+        for i in range(n)
+    ]
+    return {"assets": assets}
+
+
+def legacy_trades(d: dict) -> LatestTradesResponse:
+    trades = [
+        Trade(trade_id=t["trade_id"], mpid=t.get("mpid"), timestamp=datetime.fromisoformat(t["timestamp"]),
+              price=Decimal(t["price"]), size=Decimal(t["size"]), side=TradeSide(t["side"]))
+        for t in d["trades"]
+    ]
+    return LatestTradesResponse(symbol=d["symbol"], trades=trades)
+
+
+def legacy_assets(d: dict) -> Assets:
+    return Assets(assets=[Asset(**a) for a in d["assets"]])
+
+
+def construct_quote(d: dict) -> QuoteResponse:
+    q = d["quote"]
+    quote = Quote.model_construct(
+        symbol=q["symbol"], timestamp=datetime.fromisoformat(q["timestamp"]),
+        **{name: Decimal(q[name]) if q.get(name) is not None else None for name in QUOTE_FIELDS},
+    )
+    return QuoteResponse.model_construct(symbol=d["symbol"], quote=quote)
+
+
+def construct_orderbook(d: dict) -> OrderBookResponse:
+    rows = [
+        OrderBookRow.model_construct(
+            price=Decimal(r["price"]), sell_size=Decimal(r["sell_size"]), buy_size=Decimal(r["buy_size"]),
+            action=OrderBookAction(r["action"]), mpid=r.get("mpid"), timestamp=datetime.fromisoformat(r["timestamp"]),
+        )
+        for r in d["orderbook"]["rows"]
+    ]
+    return OrderBookResponse.model_construct(symbol=d["symbol"], orderbook=OrderBook.model_construct(rows=rows))
+
+
+def construct_trades(d: dict) -> LatestTradesResponse:
+    trades = [
+        Trade.model_construct(trade_id=t["trade_id"], mpid=t.get("mpid"),
+                              timestamp=datetime.fromisoformat(t["timestamp"]),
+                              price=Decimal(t["price"]), size=Decimal(t["size"]), side=TradeSide(t["side"]))
+        for t in d["trades"]
+    ]
+    return LatestTradesResponse.model_construct(symbol=d["symbol"], trades=trades)
+
+
+def construct_assets(d: dict) -> Assets:
+    return Assets.model_construct(assets=[Asset.model_construct(**a) for a in d["assets"]])
+
+
+def run_case(name: str, payload: dict, model: type, legacy: Callable[[dict], Any],
+             construct: Callable[[dict], Any], repeat: int, number: int) -> None:
+    convert = converter(model)
+    expected = model.model_validate(payload).model_dump_json()
+    for fn in (legacy, construct, convert):
+        assert fn(payload).model_dump_json() == expected, f"{name}: {fn} собирает другую модель"
+
+    # Каждый раз новый объект ответа: доверенный путь не срабатывает, в памяти одна прежняя модель
+    fresh = ModelConverter(model, memo_entries=1)
+
+    def first() -> Any:  # noqa: ANN401
+        return fresh(dict(payload))
+
+    timings = [
+        ("поле за полем", best_of(lambda: legacy(payload), repeat, number)),
+        ("construct", best_of(lambda: construct(payload), repeat, number)),
+        ("model_validate", best_of(lambda: model.model_validate(payload), repeat, number)),
+        ("converter", best_of(first, repeat, number)),
+        ("converter, кэш", best_of(lambda: convert(payload), repeat, number)),
+    ]
+    base = timings[0][1]
+    print(f"\n{name}, мкс на вызов")
+    for label, us in timings:
+        print(f"  {label:<16}{us:>12.1f}{base / us:>11.1f}x")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    run_case("quote", make_quote(), QuoteResponse, legacy_quote, construct_quote, args.repeat, 5000)
+    run_case("orderbook 2x50", make_orderbook(), OrderBookResponse, legacy_orderbook, construct_orderbook,
+             args.repeat, 300)
+    run_case("trades 100", make_trades(), LatestTradesResponse, legacy_trades, construct_trades, args.repeat, 300)
+    run_case("assets 2000", make_assets(), Assets, legacy_assets, construct_assets, args.repeat, 10)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,286 @@
+"""
+Трассировка запросов: от узлов графа агента через MCP-инструменты до запросов к Finam TradeAPI
+
+Общий модуль агента и MCP-сервера (только стандартная библиотека; orjson — если установлен):
+сервер импортирует его напрямую (трассировщик процесса — adapters.tracing), агент получает
+копию при сборке образа (additional_contexts в docker-compose.yml).
+
+Спан — именованный интервал времени с родителем и атрибутами. Текущий спан хранится в
+contextvars, поэтому вложенность следует за await и задачами asyncio. Между процессами
+контекст передаётся заголовком W3C traceparent (00-<trace_id>-<span_id>-<флаги>): агент
+добавляет его к запросам MCP, сервер продолжает трассу в спане вызова инструмента.
+
+Корневой спан процесса (первый спан трассы здесь) собирает законченные спаны своей трассы
+и отдаёт их экспортёрам одним пакетом, когда заканчивается сам. FINAM_TRACE задаёт экспортёры:
+  (пусто) — трассировка выключена, спаны не создаются (по умолчанию)
+  console — водопад трассы в stdout
+  file    — строки JSON в FINAM_TRACE_FILE (traces/spans.jsonl)
+  console,file — оба
+FINAM_TRACE_SAMPLE_RATE — доля записываемых трасс; решение принимает корень трассы и
+передаёт его флагом traceparent, поэтому трасса записывается целиком или не записывается.
+
+Агент и сервер могут писать в один файл; водопад трассы по файлам обоих сервисов:
+    python -m adapters.trace_view traces/spans.jsonl [--trace <trace_id>] [--last N]
+"""
+
+import contextlib
+import contextvars
+import json
+import logging
+import os
+import random
+import secrets
+import sys
+import time
+from collections.abc import Iterable, Iterator
+from dataclasses import asdict, dataclass, field
+from typing import Any, Protocol
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson необязателен
+    orjson = None
+
+logger = logging.getLogger(__name__)
+
+TRACEPARENT = "traceparent"
+
+WATERFALL_WIDTH = 40
+
+
+@dataclass
+class Span:
+    name: str
+    trace_id: str
+    span_id: str
+    parent_id: str | None
+    service: str
+    sampled: bool = True
+    start_ns: int = field(default_factory=time.time_ns)
+    end_ns: int | None = None
+    attributes: dict[str, Any] = field(default_factory=dict)
+    error: str | None = None
+
+    def set(self, **attributes: Any) -> None:  # noqa: ANN401
+        self.attributes.update(attributes)
+
+    @property
+    def traceparent(self) -> str:
+        return f"00-{self.trace_id}-{self.span_id}-{'01' if self.sampled else '00'}"
+
+    def as_dict(self) -> dict[str, Any]:
+        d = asdict(self)
+        del d["sampled"]
+        return d
+
+
+_current: contextvars.ContextVar[Span | None] = contextvars.ContextVar("finam_span", default=None)
+
+
+def current_span() -> Span | None:
+    return _current.get()
+
+
+def annotate(**attributes: Any) -> None:  # noqa: ANN401
+    """Добавить атрибуты текущему спану (без спана — ничего не делать)"""
+    span = _current.get()
+    if span is not None:
+        span.set(**attributes)
+
+
+def inject(headers: dict[str, str] | None = None) -> dict[str, str]:
+    """Заголовки запроса с traceparent текущего спана"""
+    headers = dict(headers or {})
+    span = _current.get()
+    if span is not None:
+        headers[TRACEPARENT] = span.traceparent
+    return headers
+
+
+def detached() -> contextvars.Context:
+    """
+    Копия текущего контекста без спана — для фоновых задач, которые переживают запрос
+
+    Иначе их спаны попадут в трассу запроса, который их случайно запустил.
+    """
+    context = contextvars.copy_context()
+    context.run(_current.set, None)
+    return context
+
+
+def parse_traceparent(value: str | None) -> tuple[str, str, bool] | None:
+    """(trace_id, span_id родителя, sampled) из заголовка traceparent или None"""
+    parts = (value or "").strip().split("-")
+    if len(parts) != 4 or len(parts[1]) != 32 or len(parts[2]) != 16:
+        return None
+    try:
+        flags = int(parts[3], 16)
+        int(parts[1], 16), int(parts[2], 16)
+    except ValueError:
+        return None
+    return parts[1], parts[2], bool(flags & 1)
+
+
+class Exporter(Protocol):
+    def export(self, spans: list[Span]) -> None: ...
+
+
+class ConsoleExporter:
+    """Водопад каждой законченной трассы в stdout"""
+
+    def __init__(self, stream: Any = None) -> None:  # noqa: ANN401
+        self.stream = stream
+
+    def export(self, spans: list[Span]) -> None:
+        stream = self.stream or sys.stdout
+        stream.write(waterfall([s.as_dict() for s in spans]) + "\n")
+        stream.flush()
+
+
+def _dumps(obj: dict[str, Any]) -> bytes:
+    """Спан в JSON; значения атрибутов, которых JSON не знает (Decimal, enum), — строками"""
+    if orjson is not None:
+        return orjson.dumps(obj, default=str)
+    return json.dumps(obj, ensure_ascii=False, default=str).encode()
+
+
+class FileExporter:
+    """Спаны строками JSON; файл можно делить между процессами (запись одним вызовом write)"""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+
+    def export(self, spans: list[Span]) -> None:
+        with open(self.path, "ab") as f:
+            f.write(b"".join(_dumps(s.as_dict()) + b"\n" for s in spans))
+
+
+class Tracer:
+    def __init__(self, service: str, exporters: list[Exporter] | None = None, sample_rate: float = 1.0) -> None:
+        """
+        Args:
+            service: Имя сервиса в спанах
+            exporters: Куда отдавать законченные трассы; без экспортёров трассировка выключена
+            sample_rate: Доля трасс, которые начинаются здесь и записываются
+        """
+        self.service = service
+        self.exporters = exporters or []
+        self.sample_rate = sample_rate
+        # trace_id → законченные спаны, которые ждут конца корня трассы в этом процессе
+        self._pending: dict[str, list[Span]] = {}
+        self._roots: dict[str, int] = {}
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.exporters)
+
+    @contextlib.contextmanager
+    def span(self, name: str, traceparent: str | None = None, root: bool = False,
+             **attributes: Any) -> Iterator[Span | None]:  # noqa: ANN401
+        """
+        Спан name внутри текущего
+
+        Без текущего спана родитель берётся из traceparent; если нет и его, спан начинает
+        новую трассу только при root=True (точки входа: HTTP-обработчик, вызов инструмента),
+        а иначе не создаётся — фоновые опросы не порождают трасс. Отдаёт None, если спан не создан.
+        """
+        parent = _current.get() if self.exporters else None
+        if parent is not None:
+            trace_id, parent_id, sampled = parent.trace_id, parent.span_id, parent.sampled
+        elif not self.exporters:
+            yield None
+            return
+        elif (remote := parse_traceparent(traceparent)) is not None:
+            trace_id, parent_id, sampled = remote
+        elif root:
+            trace_id, parent_id, sampled = secrets.token_hex(16), None, random.random() < self.sample_rate
+        else:
+            yield None
+            return
+
+        span = Span(name, trace_id, secrets.token_hex(8), parent_id, self.service, sampled, attributes=attributes)
+        local_root = parent is None
+        if local_root:
+            self._roots[trace_id] = self._roots.get(trace_id, 0) + 1
+        token = _current.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.error = type(e).__name__
+            raise
+        finally:
+            _current.reset(token)
+            span.end_ns = time.time_ns()
+            self._finish(span, local_root)
+
+    def _finish(self, span: Span, local_root: bool) -> None:
+        if local_root:
+            self._roots[span.trace_id] -= 1
+        if not span.sampled:
+            if local_root and not self._roots[span.trace_id]:
+                del self._roots[span.trace_id]
+            return
+        self._pending.setdefault(span.trace_id, []).append(span)
+        if self._roots.get(span.trace_id):
+            return
+        # Корень закончился (или спан пережил его, как задача, запущенная запросом) — трассу можно отдавать
+        self._roots.pop(span.trace_id, None)
+        spans = self._pending.pop(span.trace_id)
+        for exporter in self.exporters:
+            try:
+                exporter.export(spans)
+            except Exception:
+                logger.warning("Не удалось выгрузить трассу %s", span.trace_id, exc_info=True)
+
+
+def tracer_from_env(service: str) -> Tracer:
+    exporters: list[Exporter] = []
+    for kind in filter(None, (k.strip() for k in os.getenv("FINAM_TRACE", "").split(","))):
+        if kind == "console":
+            exporters.append(ConsoleExporter())
+        elif kind == "file":
+            exporters.append(FileExporter(os.getenv("FINAM_TRACE_FILE", "traces/spans.jsonl")))
+        else:
+            raise RuntimeError(f"Неизвестный экспортёр FINAM_TRACE: {kind}")
+    return Tracer(service, exporters, float(os.getenv("FINAM_TRACE_SAMPLE_RATE", "1")))
+
+
+def _format_attributes(span: dict[str, Any]) -> str:
+    text = " ".join(f"{k}={v}" for k, v in span["attributes"].items())
+    return f"{text} error={span['error']}".strip() if span.get("error") else text
+
+
+def waterfall(spans: Iterable[dict[str, Any]], width: int = WATERFALL_WIDTH) -> str:
+    """
+    Трасса текстом: дерево спанов, начало и длительность (мс) и полоса на общей шкале времени
+
+    Спаны, чей родитель не попал в выборку (например, запрос агента без спанов агента),
+    показываются как корни.
+    """
+    spans = sorted(spans, key=lambda s: s["start_ns"])
+    if not spans:
+        return ""
+    ids = {s["span_id"] for s in spans}
+    children: dict[str | None, list[dict[str, Any]]] = {}
+    for s in spans:
+        children.setdefault(s["parent_id"] if s["parent_id"] in ids else None, []).append(s)
+    t0 = spans[0]["start_ns"]
+    total = max(max(s["end_ns"] or s["start_ns"] for s in spans) - t0, 1)
+    lines = [f"trace {spans[0]['trace_id']}  {total / 1e6:.1f} мс"]
+
+    def walk(span: dict[str, Any], depth: int) -> None:
+        start = span["start_ns"] - t0
+        duration = (span["end_ns"] or span["start_ns"]) - span["start_ns"]
+        left = min(int(start / total * width), width - 1)
+        right = max(left + 1, round((start + duration) / total * width))
+        bar = (" " * left + "█" * (right - left)).ljust(width)
+        label = ("  " * depth + span["name"])[:56].ljust(56)
+        lines.append(f"{label} {start / 1e6:>9.1f} {duration / 1e6:>9.1f} |{bar}| "
+                     f"{span['service']} {_format_attributes(span)}".rstrip())
+        for child in children.get(span["span_id"], ()):
+            walk(child, depth + 1)
+
+    for span in children[None]:
+        walk(span, 0)
+    return "\n".join(lines)
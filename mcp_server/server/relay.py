@@ -0,0 +1,193 @@
+"""
+Сообщения MCP-сессий SSE между воркерами
+
+Сессия SSE живёт в памяти воркера, который принял GET /sse, а POST /messages/?session_id=...
+балансировщик (или uvicorn --workers) может отдать другому воркеру. Такой воркер не отвечает
+404, а публикует сообщение в канал mcp:messages общего backplane; воркер-владелец сессии
+передаёт его в свою сессию. Так подписки и вызовы инструментов работают при любом
+распределении запросов по воркерам.
+
+Заголовки с токеном в backplane не попадают: в канал уходят только Content-Type, traceparent
+и хэш арендатора (tenant_id). Владелец запоминает заголовки GET /sse своих сессий (их
+идентификатор он видит в событии endpoint потока SSE), доставляет сообщение с ними и
+отбрасывает его, если арендатор POST-запроса не совпадает с арендатором сессии.
+
+Сообщение передаётся сессии штатным SseServerTransport.handle_post_message — relay не
+обращается к внутреннему состоянию транспорта mcp.
+
+Воркер, получивший сообщение чужой сессии, не знает, жива ли она: он отвечает 202, а
+сообщение для закрытой сессии отбрасывается.
+"""
+
+import logging
+import re
+from dataclasses import asdict, dataclass
+from typing import Any
+
+import anyio
+from adapters.backplane import Backplane
+from adapters.codec import codec
+from adapters.registry import tenant_id, token_from_headers
+from finam_tracing import TRACEPARENT
+from mcp import types
+from mcp.server.sse import SseServerTransport
+from mcp.server.transport_security import TransportSecurityMiddleware, TransportSecuritySettings
+from pydantic import ValidationError
+from starlette.applications import Starlette
+from starlette.datastructures import Headers
+from starlette.requests import Request
+from starlette.responses import Response
+from starlette.routing import Mount, Route
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = "mcp:messages"
+
+# Заголовки POST-запроса, которые передаются владельцу сессии
+FORWARDED_HEADERS = ("content-type", TRACEPARENT)
+
+# Идентификатор сессии в событии endpoint потока SSE (UUID.hex)
+_ENDPOINT_SESSION = re.compile(rb"session_id=([0-9a-f]{32})")
+_SESSION_ID = re.compile(r"[0-9a-f]{32}")
+
+
+def _tenant(headers: Headers) -> str:
+    return tenant_id(token_from_headers(headers) or "")
+
+
+@dataclass(frozen=True)
+class _Session:
+    headers: list[tuple[bytes, bytes]]  # Заголовки GET /sse
+    tenant: str
+
+
+@dataclass
+class RelayStats:
+    forwarded: int = 0  # Сообщений чужих сессий отправлено в backplane
+    delivered: int = 0  # Сообщений из backplane передано своим сессиям
+    rejected: int = 0  # Сообщений с чужим арендатором или для закрытых сессий
+
+    def as_dict(self) -> dict[str, int]:
+        return asdict(self)
+
+
+class SessionRelay:
+    """ASGI-обработчики GET /sse и POST-сообщений SSE поверх SseServerTransport"""
+
+    def __init__(self, transport: SseServerTransport, backplane: Backplane,
+                 security_settings: TransportSecuritySettings | None = None) -> None:
+        self.transport = transport
+        self.backplane = backplane
+        self.security = TransportSecurityMiddleware(security_settings)
+        self.stats = RelayStats()
+        self._sessions: dict[str, _Session] = {}  # Открытые на этом воркере
+
+    @classmethod
+    def install(cls, app: Starlette, backplane: Backplane, sse_path: str = "/sse",
+                security_settings: TransportSecuritySettings | None = None) -> "SessionRelay":
+        """Обернуть маршруты SSE приложения FastMCP.sse_app()"""
+        relay = None
+        for route in app.routes:
+            transport = getattr(route.app, "__self__", None) if isinstance(route, Mount) else None
+            if isinstance(transport, SseServerTransport):
+                relay = cls(transport, backplane, security_settings)
+                route.app = relay
+        stream = next((r for r in app.routes if isinstance(r, Route) and r.path == sse_path), None)
+        if relay is None or stream is None:
+            raise RuntimeError("В приложении нет маршрутов SSE")
+        stream.app = relay.track(stream.app)
+        return relay
+
+    async def start(self) -> None:
+        await self.backplane.subscribe(CHANNEL, self._deliver)
+
+    async def stop(self) -> None:
+        await self.backplane.unsubscribe(CHANNEL, self._deliver)
+
+    def track(self, app: ASGIApp) -> ASGIApp:
+        """Обёртка GET /sse: запоминает заголовки сессии, пока открыт её поток"""
+
+        async def stream(scope: Scope, receive: Receive, send: Send) -> None:
+            session_id = None
+
+            async def sniff(message: Message) -> None:
+                nonlocal session_id
+                if session_id is None and message["type"] == "http.response.body":
+                    match = _ENDPOINT_SESSION.search(message.get("body", b""))
+                    if match:
+                        session_id = match.group(1).decode()
+                        self._sessions[session_id] = _Session(list(scope["headers"]), _tenant(Headers(scope=scope)))
+                await send(message)
+
+            try:
+                await app(scope, receive, sniff)
+            finally:
+                if session_id is not None:
+                    self._sessions.pop(session_id, None)
+
+        return stream
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        request = Request(scope, receive)
+        session_id = request.query_params.get("session_id")
+        # Свои сессии и ошибки в session_id обрабатывает транспорт
+        if session_id in self._sessions or not _SESSION_ID.fullmatch(session_id or ""):
+            return await self.transport.handle_post_message(scope, receive, send)
+
+        error_response = await self.security.validate_request(request, is_post=True)
+        if error_response:
+            return await error_response(scope, receive, send)
+        body = await request.body()
+        try:
+            types.JSONRPCMessage.model_validate_json(body)
+        except ValidationError:
+            return await Response("Could not parse message", status_code=400)(scope, receive, send)
+
+        await self.backplane.publish(CHANNEL, codec.dumps({
+            "session_id": session_id,
+            "tenant": _tenant(request.headers),
+            "headers": {name: request.headers[name] for name in FORWARDED_HEADERS if name in request.headers},
+            "body": body.decode(),
+        }))
+        self.stats.forwarded += 1
+        return await Response("Accepted", status_code=202)(scope, receive, send)
+
+    async def _deliver(self, message: bytes) -> None:
+        data: dict[str, Any] = codec.loads(message)
+        session = self._sessions.get(data["session_id"])
+        if session is None:
+            return
+        if session.tenant != data["tenant"]:
+            logger.warning("Сообщение для сессии %s пришло от другого арендатора", data["session_id"])
+            self.stats.rejected += 1
+            return
+
+        # Инструменты читают токен арендатора из заголовков запроса (см. request_token в server.py)
+        forwarded = {name.encode("latin-1"): value.encode("latin-1") for name, value in data["headers"].items()}
+        headers = [(k, v) for k, v in session.headers if k not in forwarded] + list(forwarded.items())
+        scope = {
+            "type": "http", "method": "POST", "path": "/", "headers": headers,
+            "query_string": f"session_id={data['session_id']}".encode(),
+        }
+        body = data["body"].encode()
+        status = None
+
+        # ASGI требует корутины, даже если им нечего ждать
+        async def receive() -> Message:  # noqa: RUF029
+            return {"type": "http.request", "body": body, "more_body": False}
+
+        async def send(message: Message) -> None:  # noqa: RUF029
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+
+        try:
+            await self.transport.handle_post_message(scope, receive, send)
+        except (anyio.ClosedResourceError, anyio.BrokenResourceError):
+            status = None  # Сессия закрылась до доставки
+        if status == 202:
+            self.stats.delivered += 1
+        else:
+            logger.debug("Сессия %s не приняла сообщение: %s", data["session_id"], status)
+            self.stats.rejected += 1
@@ -1,31 +1,237 @@
-import json, logging, time
-import sys
+import contextlib
+import os
+from collections.abc import AsyncIterator, Iterator, Mapping
 from typing import Any
+from mcp import types
 from mcp.server.fastmcp import FastMCP
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import Response
 from tools import call_tool, list_tools
-from adapters import FinamAPIClient
+from adapters.backplane import MemoryBackplane, shared_backplane
+from adapters.codec import dumps_text
+from adapters.metrics import METRICS, Family, configure_logging, ratio
+from adapters.registry import shared_registry, tenant_id, token_from_headers
+from adapters.streaming import StreamKind, SubscriptionHub, feed_from_env, resource_uri
+from adapters.symbols import shared_catalog
+from adapters.tracing import shared_tracer
+from finam_tracing import TRACEPARENT
+from server.relay import SessionRelay
 
-logging.basicConfig(
-    level=logging.DEBUG,
-    format="%(asctime)s %(levelname)s %(name)s %(message)s",
-    handlers=[logging.StreamHandler(sys.stdout)],
-)
-tool_logger = logging.getLogger("mcp.tools")
-uvicorn_error = logging.getLogger("uvicorn.error")
-uvicorn_access = logging.getLogger("uvicorn.access")
-logging.getLogger("mcp").setLevel(logging.DEBUG)
-logging.getLogger("mcp.server.lowlevel").setLevel(logging.DEBUG)
-uvicorn_error.setLevel(logging.INFO)
-uvicorn_access.setLevel(logging.INFO)
+# Уровень и выборка логов: FINAM_LOG_LEVEL, FINAM_LOG_SAMPLE_RATE (см. adapters.metrics)
+configure_logging()
 
 server = FastMCP(
     name="finam_mcp",
     host="0.0.0.0",
-    port=8010
+    port=8010,
+    log_level=os.getenv("FINAM_LOG_LEVEL", "INFO").upper(),
+    # /mcp не хранит сессий: вызов инструмента может обслужить любой воркер
+    stateless_http=True,
 )
 
-api = FinamAPIClient()
-api.register_tools(server)
+lowlevel = server._mcp_server
+
+
+def request_headers() -> Mapping[str, str]:
+    """Заголовки HTTP-запроса текущего MCP-вызова"""
+    try:
+        request = lowlevel.request_context.request
+    except LookupError:
+        return {}
+    return request.headers if request is not None else {}
+
+
+def request_header(name: str) -> str | None:
+    return request_headers().get(name)
+
+
+def request_token() -> str | None:
+    """Токен Finam из заголовков HTTP-запроса текущего MCP-вызова (X-Finam-Token или Authorization)"""
+    return token_from_headers(request_headers())
+
+
+# Клиенты по токенам арендаторов с общим пулом соединений; без токена — FINAM_ACCESS_TOKEN
+registry = shared_registry()
+
+
+def tenant_token() -> str:
+    """Токен арендатора текущего MCP-вызова (без заголовков — токен по умолчанию)"""
+    return request_token() or registry.default_token
+
+
+registry.register_tools(server, request_token)
+
+# Вызов инструмента — корень трассы сервера (FINAM_TRACE); родительский спан агента приходит
+# в заголовке traceparent или в _meta запроса, внутри — спаны кэша и запросов к Finam
+tracer = shared_tracer()
+_call_tool = lowlevel.request_handlers[types.CallToolRequest]
+
+
+async def traced_call_tool(req: types.CallToolRequest) -> types.ServerResult:
+    meta = req.params.meta
+    traceparent = request_header(TRACEPARENT) or (getattr(meta, TRACEPARENT, None) if meta is not None else None)
+    with tracer.span(f"tool {req.params.name}", traceparent, root=True) as span:
+        if span is not None:
+            span.set(tenant=tenant_id(tenant_token()))
+        result = await _call_tool(req)
+        # Исключение инструмента FastMCP возвращает как результат с isError
+        if span is not None and getattr(result.root, "isError", False):
+            span.error = span.error or "tool"
+        return result
+
+
+lowlevel.request_handlers[types.CallToolRequest] = traced_call_tool
+
+# Общий кэш и шина воркеров (FINAM_BACKPLANE); без неё сервер работает одним процессом
+backplane = shared_backplane()
+
+# Подписки на котировки, стакан и ленту сделок: один опрос источника на ресурс арендатора (на все
+# воркеры, если есть backplane) его же клиентом, изменения приходят подписчикам как
+# notifications/resources/updated
+hub = SubscriptionHub(feed_from_env(registry), backplane=backplane)
+
+
+@server.resource("finam://quote/{symbol}", name="quote_stream", title="Котировка (подписка)",
+                 description="Последняя котировка инструмента; поддерживает resources/subscribe",
+                 mime_type="application/json")
+async def quote_resource(symbol: str) -> str:
+    return dumps_text(await hub.read(resource_uri(StreamKind.QUOTE, symbol), tenant_token()))
+
+
+@server.resource("finam://orderbook/{symbol}", name="orderbook_stream", title="Стакан (подписка)",
+                 description="Текущий стакан инструмента; поддерживает resources/subscribe",
+                 mime_type="application/json")
+async def orderbook_resource(symbol: str) -> str:
+    return dumps_text(await hub.read(resource_uri(StreamKind.ORDERBOOK, symbol), tenant_token()))
+
+
+@server.resource("finam://trades/{symbol}", name="trades_stream", title="Лента сделок (подписка)",
+                 description="Последние сделки по инструменту; поддерживает resources/subscribe",
+                 mime_type="application/json")
+async def trades_resource(symbol: str) -> str:
+    return dumps_text(await hub.read(resource_uri(StreamKind.TRADES, symbol), tenant_token()))
+
+
+@lowlevel.subscribe_resource()
+async def subscribe(uri: Any) -> None:
+    await hub.subscribe(str(uri), lowlevel.request_context.session, tenant_token())
+
+
+@lowlevel.unsubscribe_resource()
+async def unsubscribe(uri: Any) -> None:
+    await hub.unsubscribe(str(uri), lowlevel.request_context.session)
+
+
+# FastMCP объявляет resources.subscribe=False, даже когда обработчик подписки зарегистрирован
+_get_capabilities = lowlevel.get_capabilities
+
+
+def get_capabilities(*args: Any, **kwargs: Any) -> Any:
+    capabilities = _get_capabilities(*args, **kwargs)
+    if capabilities.resources is not None:
+        capabilities.resources.subscribe = True
+    return capabilities
+
+
+lowlevel.get_capabilities = get_capabilities
+
+
+@server.custom_route("/metrics", methods=["GET"])
+async def metrics(_: Request) -> Response:
+    """Метрики процесса в формате Prometheus"""
+    return Response(METRICS.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+@METRICS.collector
+def runtime_metrics() -> Iterator[Family]:
+    """Счётчики реестра клиентов, кэшей, подписок и backplane на момент запроса /metrics"""
+    snapshot = registry.snapshot()
+    tenants = snapshot["tenants"]
+    yield "finam_registry_clients", "gauge", "Клиенты арендаторов в реестре", [({}, snapshot["clients"])]
+    yield "finam_registry_evictions_total", "counter", "Вытесненные клиенты арендаторов", [({}, snapshot["evictions"])]
+    for key, kind, name, text in (
+        ("calls", "counter", "finam_tenant_calls_total", "Вызовы инструментов арендатора"),
+        ("errors", "counter", "finam_tenant_errors_total", "Вызовы инструментов арендатора с исключением"),
+        ("inflight", "gauge", "finam_tenant_inflight", "Выполняющиеся вызовы арендатора"),
+        ("busy_seconds", "counter", "finam_tenant_busy_seconds_total", "Суммарное время вызовов арендатора"),
+    ):
+        yield name, kind, text, [({"tenant": tenant}, stats[key]) for tenant, stats in tenants.items()]
+
+    caches = {tenant: stats["client"]["cache"] for tenant, stats in tenants.items()}
+    results = (("hit", "hits"), ("miss", "misses"))
+    requests = [({"tier": "local", "tenant": tenant, "result": result}, cache[key])
+                for tenant, cache in caches.items() for result, key in results]
+    hits = sum(cache["hits"] for cache in caches.values())
+    ratios = [({"tier": "local"}, ratio(hits, sum(cache["misses"] for cache in caches.values())))]
+    if backplane is not None:
+        shared = backplane.snapshot()
+        requests += [({"tier": "shared", "tenant": "", "result": result}, shared[key]) for result, key in results]
+        ratios.append(({"tier": "shared"}, ratio(shared["hits"], shared["misses"])))
+        yield "finam_backplane_errors_total", "counter", "Ошибки обращений к backplane", [({}, shared["errors"])]
+        yield "finam_backplane_messages_total", "counter", "Сообщения каналов backplane", [
+            ({"direction": "published"}, shared["published"]), ({"direction": "received"}, shared["received"])]
+    yield "finam_cache_requests_total", "counter", "Обращения к кэшу ответов Finam", requests
+    yield "finam_cache_hit_ratio", "gauge", "Доля попаданий в кэш ответов Finam", ratios
+    yield "finam_coalesced_requests_total", "counter", "Запросы, дождавшиеся одинакового запроса в полёте", [
+        ({"tenant": tenant}, stats["client"]["coalescing"]["coalesced"]) for tenant, stats in tenants.items()]
+
+    streams = hub.snapshot()
+    yield "finam_stream_events_total", "counter", "События подписок на ресурсы", [
+        ({"event": event}, streams[event]) for event in ("polls", "updates", "notifications", "errors")]
+    yield "finam_stream_subscribers", "gauge", "Подписчики ресурсов этого воркера", [({}, streams["subscribers"])]
+    yield "finam_streams", "gauge", "Ресурсы с подписчиками", [
+        ({"role": "subscribed"}, len(streams["streams"])), ({"role": "polling"}, len(streams["leading"]))]
+
+
+def create_app() -> Starlette:
+    """
+    ASGI-приложение сервера
+
+    /sse и /messages/ — сессии с подписками на ресурсы (сообщения чужих сессий передаются через backplane),
+    /mcp — streamable HTTP без состояния для вызовов инструментов.
+    """
+    app = server.sse_app(mount_path="/")
+    app.router.routes.extend(route for route in server.streamable_http_app().routes
+                             if getattr(route, "path", None) == server.settings.streamable_http_path)
+    relay = None
+    if backplane is not None:
+        relay = SessionRelay.install(app, backplane, server.settings.sse_path, server.settings.transport_security)
+        METRICS.collector(lambda: [("finam_relay_messages_total", "counter", "Сообщения SSE-сессий между воркерами", [
+            ({"direction": direction}, count) for direction, count in relay.stats.as_dict().items()])])
+
+    @contextlib.asynccontextmanager
+    async def lifespan(_: Starlette) -> AsyncIterator[None]:
+        async with server.session_manager.run():
+            if relay is not None:
+                await relay.start()
+            # Индекс инструментов общий для арендаторов; первый resolve_symbol дождётся этой загрузки
+            symbols = shared_catalog()
+            symbols.start(registry.default.search_assets)
+            try:
+                yield
+            finally:
+                if relay is not None:
+                    await relay.stop()
+                await symbols.aclose()
+                await hub.aclose()
+                await registry.aclose()
+                if backplane is not None:
+                    await backplane.aclose()
+
+    app.router.lifespan_context = lifespan
+    return app
+
+
+app = create_app()
 
 if __name__ == "__main__":
-    server.run(transport="sse", mount_path="/")
+    import uvicorn
+
+    # FINAM_MCP_WORKERS > 1 — несколько процессов на одном порту; кэш и подписки они делят через backplane,
+    # а накопленные ленты сделок у каждого свои (см. FINAM_MCP_WORKERS в .env.example)
+    workers = int(os.getenv("FINAM_MCP_WORKERS", "1"))
+    if workers > 1 and (backplane is None or isinstance(backplane, MemoryBackplane)):
+        raise RuntimeError("Для FINAM_MCP_WORKERS > 1 нужен общий backplane: FINAM_BACKPLANE=redis://...")
+    uvicorn.run("server.server:app" if workers > 1 else app, host=server.settings.host, port=server.settings.port,
+                workers=workers, log_level=server.settings.log_level.lower())
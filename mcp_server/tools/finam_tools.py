@@ -1,12 +1,13 @@
 import logging
-import os, json
+import json
 from mcp import types
-from adapters import FinamAPIClient
+from adapters.metrics import track_tool
+from adapters.registry import shared_registry
 
 
-def get_client(access_token) -> FinamAPIClient:
-    _client = FinamAPIClient(os.getenv("FINAM_ACCESS_TOKEN"))
-    return _client
+def get_client(access_token: str | None):
+    """Клиент для токена на время вызова: async with get_client(token) as client (без токена — FINAM_ACCESS_TOKEN)"""
+    return shared_registry().lease(access_token)
 
 
 def list_tools() -> list[types.Tool]:
@@ -143,55 +144,59 @@ def list_tools() -> list[types.Tool]:
         ),
     ]
 
-def call_tool(name: str, arguments: dict):
+async def call_tool(name: str, arguments: dict):
     try:
-        client = get_client(arguments['FINAM_ACCESS_TOKEN'])
-
-        if name == "finam_get_quote":
-            data = client.get_quote(arguments["symbol"])
-
-        elif name == "finam_get_orderbook":
-            data = client.get_orderbook(arguments["symbol"], arguments.get("depth", 10))
-
-        elif name == "finam_get_candles":
-            data = client.get_candles(
-                arguments["symbol"],
-                arguments.get("timeframe", "D"),
-                arguments.get("start"),
-                arguments.get("end"),
-            )
-
-        elif name == "finam_get_account":
-            data = client.get_account(arguments["account_id"])
-
-        elif name == "finam_get_orders":
-            data = client.get_orders(arguments["account_id"])
-
-        elif name == "finam_get_order":
-            data = client.get_order(arguments["account_id"], arguments["order_id"])
-
-        elif name == "finam_create_order":
-            data = client.create_order(arguments["account_id"], arguments["order_data"])
-
-        elif name == "finam_cancel_order":
-            data = client.cancel_order(arguments["account_id"], arguments["order_id"])
-
-        elif name == "finam_get_trades":
-            data = client.get_trades(
-                arguments["account_id"],
-                arguments.get("start"),
-                arguments.get("end"),
-            )
-
-        elif name == "finam_get_positions":
-            data = client.get_positions(arguments["account_id"])
-
-        elif name == "finam_get_session_details":
-            data = client.get_session_details()
-
-        else:
-            raise ValueError(f"Unknown tool: {name}")
-        logging.info(24242)
-        return [types.TextContent(type="text", text=json.dumps(data, indent=2))]
-    except Exception as e:
-        print(e.args, e)
+        with track_tool(name) as call:
+            async with get_client(arguments.get('FINAM_ACCESS_TOKEN')) as client:
+
+                if name == "finam_get_quote":
+                    data = await client.get_quote(arguments["symbol"])
+
+                elif name == "finam_get_orderbook":
+                    data = await client.get_orderbook(arguments["symbol"], arguments.get("depth", 10))
+
+                elif name == "finam_get_candles":
+                    data = await client.get_candles(
+                        arguments["symbol"],
+                        arguments.get("timeframe", "D"),
+                        arguments.get("start"),
+                        arguments.get("end"),
+                    )
+
+                elif name == "finam_get_account":
+                    data = await client.get_account(arguments["account_id"])
+
+                elif name == "finam_get_orders":
+                    data = await client.get_orders(arguments["account_id"])
+
+                elif name == "finam_get_order":
+                    data = await client.get_order(arguments["account_id"], arguments["order_id"])
+
+                elif name == "finam_create_order":
+                    data = await client.create_order(arguments["account_id"], arguments["order_data"])
+
+                elif name == "finam_cancel_order":
+                    data = await client.cancel_order(arguments["account_id"], arguments["order_id"])
+
+                elif name == "finam_get_trades":
+                    data = await client.get_trades(
+                        arguments["account_id"],
+                        arguments.get("start"),
+                        arguments.get("end"),
+                    )
+
+                elif name == "finam_get_positions":
+                    data = await client.get_positions(arguments["account_id"])
+
+                elif name == "finam_get_session_details":
+                    data = await client.get_session_details()
+
+                else:
+                    raise ValueError(f"Unknown tool: {name}")
+            if isinstance(data, dict) and "error" in data:
+                call.error = "api"
+            text = json.dumps(data, indent=2)
+            call.size = len(text)
+        return [types.TextContent(type="text", text=text)]
+    except Exception:
+        logging.exception("Ошибка инструмента %s", name)
@@ -0,0 +1,81 @@
+"""Тесты векторного бэктеста"""
+
+import numpy as np
+import pytest
+from adapters.backtest import max_drawdown, positions, run_backtest
+from adapters.bar_store import NS
+from adapters.columnar import ColumnarBars
+from adapters.pydantic_schema import StrategySpec, TimeFrame
+
+DAY = 86_400 * NS
+
+
+def bars(close: list[float]) -> ColumnarBars:
+    c = np.array(close, dtype=np.float64)
+    return ColumnarBars("X", np.arange(len(c), dtype=np.int64) * DAY, c, c, c, c, np.ones(len(c)))
+
+
+def spec(entry: list[dict], exit_: list[dict] | None = None, **kwargs: object) -> StrategySpec:
+    return StrategySpec(entry=entry, exit=exit_, **kwargs)
+
+
+def above(value: float) -> dict:
+    return {"left": {"series": "close"}, "op": "gt", "right": {"value": value}}
+
+
+def below(value: float) -> dict:
+    return {"left": {"series": "close"}, "op": "lt", "right": {"value": value}}
+
+
+def naive_returns(close: list[float], position: list[float], fee_bps: float) -> list[float]:
+    """Цикл по свечам: позиция на закрытии свечи i даёт доходность свечи i+1"""
+    out, prev = [], 0.0
+    for i in range(len(close) - 1):
+        fee = abs(position[i] - prev) * fee_bps / 10_000
+        out.append(position[i] * (close[i + 1] / close[i] - 1) - fee)
+        prev = position[i]
+    return out
+
+
+def test_positions_hold_until_exit() -> None:
+    entry = np.array([0, 1, 0, 0, 1, 0], dtype=bool)
+    exit_ = np.array([0, 0, 0, 1, 1, 0], dtype=bool)
+    assert positions(entry, exit_).tolist() == [0, 1, 1, 0, 0, 0]
+    assert positions(entry, None).tolist() == entry.astype(float).tolist()
+
+
+def test_returns_match_bar_loop_without_lookahead() -> None:
+    close = [10, 11, 12, 9, 8, 12, 13, 10, 11]
+    result = run_backtest(bars(close), spec([above(10.5)], [below(9.5)], fee_bps=10), TimeFrame.TIME_FRAME_D,
+                          equity_points=0)
+    position = [0, 1, 1, 0, 0, 1, 1, 1, 1]  # Вход по закрытию выше 10.5, выход по закрытию ниже 9.5
+    expected = np.prod([1 + r for r in naive_returns(close, position, 10)]) - 1
+    assert result["metrics"]["total_return"] == pytest.approx(expected)
+    assert result["metrics"]["trades"] == 3
+    assert result["equity_curve"]["rows"] == []
+
+
+def test_short_side_and_buy_and_hold() -> None:
+    close = [10, 9, 8, 7]
+    result = run_backtest(bars(close), spec([above(0)], side="short"), TimeFrame.TIME_FRAME_D)
+    assert result["metrics"]["total_return"] == pytest.approx((1 + 0.1) * (1 + 1 / 9) * (1 + 1 / 8) - 1)
+    assert result["metrics"]["buy_and_hold_return"] == pytest.approx(-0.3)
+    assert result["metrics"]["exposure"] == 1.0
+    assert len(result["equity_curve"]["rows"]) == 3
+
+
+def test_indicator_operands_and_crossings() -> None:
+    close = [10.0] * 5 + [11, 12, 13, 12, 11, 10, 9, 8, 9, 10]
+    sma3 = {"indicator": "sma", "params": {"period": 3}}
+    rule = {"left": {"series": "close"}, "op": "crosses_above", "right": sma3}
+    result = run_backtest(bars(close), spec([rule]), TimeFrame.TIME_FRAME_D)
+    # Пересечения снизу вверх — только свечи 5 и 13: позиция держится по одной свече
+    assert result["metrics"]["trades"] == 4
+    with pytest.raises(ValueError, match="ровно одно"):
+        run_backtest(bars(close), spec([{"left": {"series": "close", "value": 1}, "op": "gt",
+                                        "right": {"value": 0}}]), TimeFrame.TIME_FRAME_D)
+
+
+def test_max_drawdown() -> None:
+    assert max_drawdown(np.array([1.0, 1.2, 0.9, 1.3, 0.65])) == pytest.approx(0.5)
+    assert max_drawdown(np.array([])) == 0.0
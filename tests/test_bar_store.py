@@ -0,0 +1,66 @@
+"""Тесты локального хранилища свечей"""
+
+import numpy as np
+from adapters.bar_store import (
+    BAR_DTYPE,
+    NS,
+    BarStore,
+    merge_intervals,
+    split_interval,
+    subtract_intervals,
+    to_iso,
+    to_ns,
+)
+from adapters.pydantic_schema import TimeFrame
+
+M1 = TimeFrame.TIME_FRAME_M1
+MINUTE = 60 * NS
+
+
+def bars(*minutes: int, close: float = 1.0) -> np.ndarray:
+    arr = np.zeros(len(minutes), dtype=BAR_DTYPE)
+    arr["ts"] = [m * MINUTE for m in minutes]
+    arr["close"] = close
+    return arr
+
+
+def test_iso_round_trip() -> None:
+    ns = to_ns("2024-03-01T10:15:30.250000Z")
+    assert to_iso(ns) == "2024-03-01T10:15:30.250000Z"
+    assert to_ns("2024-03-01T13:15:30+03:00") == to_ns("2024-03-01T10:15:30Z")
+
+
+def test_interval_helpers() -> None:
+    assert merge_intervals([(5, 10), (0, 3), (3, 4), (9, 12), (20, 20)]) == [(0, 4), (5, 12)]
+    assert subtract_intervals(0, 20, [(2, 5), (8, 10)]) == [(0, 2), (5, 8), (10, 20)]
+    assert subtract_intervals(3, 9, [(0, 10)]) == []
+    assert split_interval(0, 10, 4) == [(0, 4), (4, 8), (8, 10)]
+
+
+def test_write_read_and_coverage(tmp_path) -> None:  # noqa: ANN001
+    store = BarStore(str(tmp_path))
+    store.write("SBER@MISX", M1, bars(0, 1, 2), 0, 3 * MINUTE)
+    store.write("SBER@MISX", M1, bars(10, 11), 10 * MINUTE, 12 * MINUTE)
+
+    assert store.coverage("SBER@MISX", M1) == [(0, 3 * MINUTE), (10 * MINUTE, 12 * MINUTE)]
+    assert store.missing("SBER@MISX", M1, 0, 12 * MINUTE) == [(3 * MINUTE, 10 * MINUTE)]
+    assert list(store.read("SBER@MISX", M1, MINUTE, 11 * MINUTE)["ts"] // MINUTE) == [1, 2, 10]
+
+
+def test_out_of_order_write_merges_and_replaces_duplicates(tmp_path) -> None:  # noqa: ANN001
+    store = BarStore(str(tmp_path))
+    store.write("X", M1, bars(5, 6, 7), 5 * MINUTE, 8 * MINUTE)
+    store.write("X", M1, bars(3, 4, 5, close=2.0), 3 * MINUTE, 6 * MINUTE)
+
+    stored = store.read("X", M1, 0, 100 * MINUTE)
+    assert list(stored["ts"] // MINUTE) == [3, 4, 5, 6, 7]
+    # При повторной загрузке свечи остаётся новая версия
+    assert stored["close"][2] == 2.0
+    assert store.coverage("X", M1) == [(3 * MINUTE, 8 * MINUTE)]
+
+
+def test_empty_interval_is_still_covered(tmp_path) -> None:  # noqa: ANN001
+    store = BarStore(str(tmp_path))
+    store.write("X", M1, bars(), 0, 60 * MINUTE)
+    assert store.missing("X", M1, 0, 60 * MINUTE) == []
+    assert len(store.read("X", M1, 0, 60 * MINUTE)) == 0
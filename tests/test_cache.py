@@ -0,0 +1,59 @@
+"""Тесты кэша ответов с TTL и вытеснением LRU"""
+
+from adapters.cache import DEFAULT_TTLS, TTLCache, ttls_from_env
+from adapters.endpoints import EndpointClass
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_entry_expires_after_ttl() -> None:
+    clock = FakeClock()
+    cache = TTLCache(clock=clock)
+    cache.set("k", 1, ttl=5)
+    clock.now = 4.9
+    assert cache.get("k") == 1
+    clock.now = 5.0
+    assert cache.get("k") is None
+    assert cache.stats.expirations == 1
+    assert len(cache) == 0
+
+
+def test_zero_ttl_is_not_stored() -> None:
+    cache = TTLCache()
+    cache.set("k", 1, ttl=0)
+    assert cache.get("k", "miss") == "miss"
+
+
+def test_lru_eviction_keeps_recently_used() -> None:
+    cache = TTLCache(max_entries=2)
+    cache.set("a", 1, ttl=60)
+    cache.set("b", 2, ttl=60)
+    assert cache.get("a") == 1
+    cache.set("c", 3, ttl=60)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert cache.stats.evictions == 1
+
+
+def test_invalidate_by_predicate() -> None:
+    cache = TTLCache()
+    for key in ("/v1/accounts/1", "/v1/accounts/2", "/v1/assets"):
+        cache.set(key, key, ttl=60)
+    assert cache.invalidate(lambda k: k.startswith("/v1/accounts")) == 2
+    assert len(cache) == 1
+    assert cache.invalidate() == 1
+
+
+def test_ttls_from_env(monkeypatch) -> None:  # noqa: ANN001
+    monkeypatch.setenv("FINAM_CACHE_TTL_QUOTES", "2.5")
+    ttls = ttls_from_env({EndpointClass.BARS: 7})
+    assert ttls[EndpointClass.QUOTES] == 2.5
+    assert ttls[EndpointClass.BARS] == 7
+    assert ttls[EndpointClass.REFERENCE] == DEFAULT_TTLS[EndpointClass.REFERENCE]
@@ -0,0 +1,125 @@
+"""Тесты схлопывания одинаковых одновременных запросов: SingleFlight и GET-запросы FinamAPIClient"""
+
+import asyncio
+
+import httpx
+import pytest
+from adapters.coalescing import SingleFlight, request_key
+from adapters.endpoints import EndpointClass
+from adapters.finam_client import FinamAPIClient
+
+
+def test_request_key_ignores_param_order() -> None:
+    assert request_key("get", "/v1/x", {"b": 1, "a": 2}) == request_key("GET", "/v1/x", {"a": 2, "b": 1})
+    assert request_key("GET", "/v1/x") != request_key("GET", "/v1/y")
+
+
+def test_concurrent_calls_share_one_request() -> None:
+    calls = 0
+
+    async def fetch() -> dict:
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return {"n": calls}
+
+    async def main() -> list:
+        flights = SingleFlight()
+        results = await asyncio.gather(*(flights.do("k", fetch) for _ in range(5)))
+        assert flights.stats.executed == 1
+        assert flights.stats.coalesced == 4
+        assert flights.inflight == 0
+        return results
+
+    results = asyncio.run(main())
+    assert calls == 1
+    assert all(r == {"n": 1} for r in results)
+
+
+def test_sequential_calls_are_not_coalesced() -> None:
+    async def main() -> SingleFlight:
+        flights = SingleFlight()
+        await flights.do("k", lambda: asyncio.sleep(0, result=1))
+        await flights.do("k", lambda: asyncio.sleep(0, result=2))
+        return flights
+
+    assert asyncio.run(main()).stats.executed == 2
+
+
+def test_cancelled_waiter_does_not_cancel_shared_request() -> None:
+    async def main() -> int:
+        flights = SingleFlight()
+        release = asyncio.Event()
+
+        async def fetch() -> int:
+            await release.wait()
+            return 42
+
+        first = asyncio.ensure_future(flights.do("k", fetch))
+        second = asyncio.ensure_future(flights.do("k", fetch))
+        await asyncio.sleep(0)
+        first.cancel()
+        release.set()
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        return await second
+
+    assert asyncio.run(main()) == 42
+
+
+def test_errors_propagate_to_all_waiters() -> None:
+    async def fail() -> None:
+        await asyncio.sleep(0)
+        raise RuntimeError("boom")
+
+    async def main() -> list:
+        flights = SingleFlight()
+        return await asyncio.gather(*(flights.do("k", fail) for _ in range(3)), return_exceptions=True)
+
+    assert all(isinstance(r, RuntimeError) for r in asyncio.run(main()))
+
+
+@pytest.fixture
+def unlimited_rates(monkeypatch) -> None:  # noqa: ANN001
+    monkeypatch.setenv("FINAM_RATE_GLOBAL", "0")
+    for endpoint_class in EndpointClass:
+        monkeypatch.setenv(f"FINAM_RATE_{endpoint_class.name}", "0")
+
+
+def client_calls(calls: list[tuple[str, str, dict | None]]) -> tuple[list[dict], list[str]]:
+    """Выполнить вызовы execute_request одновременно; возвращает ответы и запросы, ушедшие в сеть"""
+    sent: list[str] = []
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        sent.append(f"{request.method} {request.url.path}?{request.url.query.decode()}")
+        await asyncio.sleep(0.01)
+        return httpx.Response(200, json={"n": len(sent)})
+
+    async def main() -> list[dict]:
+        http = httpx.AsyncClient(base_url="https://api.test", transport=httpx.MockTransport(handler))
+        # Без кэша: одинаковые ответы могут дать только схлопнутые запросы
+        client = FinamAPIClient(access_token="t", http=http, cache_ttls=dict.fromkeys(EndpointClass, 0.0))
+        results = await asyncio.gather(*(client.execute_request(method, path, params=params)
+                                         for method, path, params in calls))
+        assert client._flights.inflight == 0
+        await http.aclose()
+        return results
+
+    return asyncio.run(main()), sent
+
+
+@pytest.mark.usefixtures("unlimited_rates")
+def test_client_coalesces_identical_gets() -> None:
+    quote = ("GET", "/v1/instruments/SBER@MISX/quotes/latest", None)
+    results, sent = client_calls([quote] * 5)
+    assert len(sent) == 1
+    assert all(r is results[0] for r in results)
+
+
+@pytest.mark.usefixtures("unlimited_rates")
+def test_client_does_not_coalesce_different_or_unsafe_requests() -> None:
+    bars = "/v1/instruments/SBER@MISX/bars"
+    orders = "/v1/accounts/1/orders"
+    _, sent = client_calls([("GET", bars, {"timeframe": "TIME_FRAME_D"}), ("GET", bars, {"timeframe": "TIME_FRAME_H1"}),
+                            ("POST", orders, None), ("POST", orders, None)])
+    assert len(sent) == 4
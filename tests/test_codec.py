@@ -0,0 +1,81 @@
+"""Тесты JSON-кодеков"""
+
+from datetime import UTC, datetime
+from decimal import Decimal
+from enum import Enum
+
+import pytest
+from adapters import codec as codec_module
+from adapters.codec import OrjsonCodec, StdJsonCodec, dumps_text, get_codec, to_content
+from adapters.pydantic_schema import TimeFrame
+from pydantic import BaseModel
+
+CODECS = [StdJsonCodec()]
+if codec_module.orjson is not None:
+    CODECS.append(OrjsonCodec())
+
+
+class Side(Enum):
+    BUY = "buy"
+
+
+class Quote(BaseModel):
+    symbol: str
+    last: Decimal
+
+
+def test_get_codec_by_name(monkeypatch) -> None:  # noqa: ANN001
+    assert get_codec("json").name == "json"
+    monkeypatch.setenv("FINAM_JSON_CODEC", "json")
+    assert get_codec().name == "json"
+    monkeypatch.setenv("FINAM_JSON_CODEC", "auto")
+    assert get_codec().name == ("json" if codec_module.orjson is None else "orjson")
+
+
+def test_get_codec_without_orjson(monkeypatch) -> None:  # noqa: ANN001
+    monkeypatch.setattr(codec_module, "orjson", None)
+    assert get_codec("auto").name == "json"
+    with pytest.raises(RuntimeError):
+        get_codec("orjson")
+
+
+@pytest.mark.parametrize("codec", CODECS, ids=lambda c: c.name)
+def test_round_trip(codec) -> None:  # noqa: ANN001
+    obj = {
+        "price": Decimal("301.25"),
+        "time": datetime(2024, 3, 1, 10, 0, tzinfo=UTC),
+        "side": Side.BUY,
+        "timeframe": TimeFrame.TIME_FRAME_D,
+        "quote": Quote(symbol="SBER@MISX", last=Decimal("0.1")),
+        "name": "Сбербанк",
+    }
+    data = codec.dumps(obj)
+    assert isinstance(data, bytes)
+    # Decimal — строкой без потери точности, кириллица не экранируется
+    assert "Сбербанк".encode() in data
+    loaded = codec.loads(data)
+    # orjson пишет datetime сам (+00:00), стандартный json — через pydantic-core (Z)
+    assert datetime.fromisoformat(loaded.pop("time")) == obj["time"]
+    assert loaded == {
+        "price": "301.25",
+        "side": "buy",
+        "timeframe": TimeFrame.TIME_FRAME_D.value,
+        "quote": {"symbol": "SBER@MISX", "last": "0.1"},
+        "name": "Сбербанк",
+    }
+    assert codec.loads(data.decode()) == codec.loads(data)
+
+
+def test_codecs_agree() -> None:
+    obj = {"a": [1, 2.5, None, True], "b": {"c": Decimal("1e-8")}}
+    assert len({c.dumps(obj) for c in CODECS}) == 1
+
+
+def test_to_content() -> None:
+    assert to_content(None) == []
+    assert to_content("готово")[0].text == "готово"
+    content = to_content({"price": Decimal("1.5")})
+    assert len(content) == 1
+    assert content[0].type == "text"
+    assert content[0].text == '{"price":"1.5"}'
+    assert dumps_text(Quote(symbol="S", last=Decimal(2))) == '{"symbol":"S","last":"2"}'
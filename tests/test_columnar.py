@@ -0,0 +1,63 @@
+"""Тесты колоночного представления свечей"""
+
+from decimal import Decimal
+
+import numpy as np
+from adapters.columnar import ColumnarBars
+
+
+def payload(*bars: tuple[str, float]) -> dict:
+    return {"symbol": "SBER@MISX", "bars": [
+        {"timestamp": ts, "open": str(close - 1), "high": str(close + 1), "low": str(close - 2),
+         "close": str(close), "volume": "10"}
+        for ts, close in bars
+    ]}
+
+
+def test_payload_round_trip() -> None:
+    d = payload(("2024-03-01T10:00:00Z", 300.5), ("2024-03-01T10:01:00Z", 301.25))
+    bars = ColumnarBars.from_payload(d, "IGNORED")
+    assert bars.symbol == "SBER@MISX"
+    assert bars.ts.dtype == np.int64
+    assert bars.close.tolist() == [300.5, 301.25]
+    back = bars.to_payload()
+    assert [b["timestamp"] for b in back["bars"]] == ["2024-03-01T10:00:00Z", "2024-03-01T10:01:00Z"]
+    assert ColumnarBars.from_payload(back, "SBER@MISX").close.tolist() == bars.close.tolist()
+
+    response = bars.to_response()
+    assert response.bars[1].close == Decimal("301.25")
+    assert response.bars[0].timestamp.isoformat() == "2024-03-01T10:00:00+00:00"
+
+
+def test_payload_is_sorted_and_deduplicated() -> None:
+    d = payload(("2024-03-01T10:01:00Z", 2), ("2024-03-01T13:00:00+03:00", 1), ("2024-03-01T10:01:00Z", 3))
+    bars = ColumnarBars.from_payload(d, "SBER@MISX")
+    # Метки с offset приводятся к UTC, при повторе остаётся последняя свеча
+    assert bars.iso_timestamps() == ["2024-03-01T10:00:00Z", "2024-03-01T10:01:00Z"]
+    assert bars.close.tolist() == [1, 3]
+
+
+def test_empty_payload() -> None:
+    bars = ColumnarBars.from_payload({}, "SBER@MISX")
+    assert len(bars) == 0
+    assert bars.to_payload() == {"symbol": "SBER@MISX", "bars": []}
+    assert len(ColumnarBars.concat("SBER@MISX", [])) == 0
+
+
+def test_concat_removes_boundary_duplicates() -> None:
+    first = ColumnarBars.from_payload(payload(("2024-03-01T10:00:00Z", 1), ("2024-03-01T10:01:00Z", 2)), "S")
+    second = ColumnarBars.from_payload(payload(("2024-03-01T10:01:00Z", 5), ("2024-03-01T10:02:00Z", 6)), "S")
+    bars = ColumnarBars.concat("SBER@MISX", [second, first])
+    assert bars.iso_timestamps() == ["2024-03-01T10:00:00Z", "2024-03-01T10:01:00Z", "2024-03-01T10:02:00Z"]
+    # Повтор на границе берётся из последнего куска в списке
+    assert bars.close.tolist() == [1, 2, 6]
+    assert bars.symbol == "SBER@MISX"
+
+
+def test_tail_is_view() -> None:
+    bars = ColumnarBars.from_payload(payload(*((f"2024-03-01T10:0{m}:00Z", m) for m in range(5))), "S")
+    tail = bars.tail(2)
+    assert tail.close.tolist() == [3, 4]
+    assert np.shares_memory(tail.close, bars.close)
+    assert len(bars.tail(10)) == 5
+    assert len(bars.tail(0)) == 0
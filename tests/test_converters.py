@@ -0,0 +1,67 @@
+"""Тесты сборки моделей из ответов Finam"""
+
+from decimal import Decimal
+
+from adapters.cache import TTLCache
+from adapters.converters import ModelConverter, converter
+from pydantic import BaseModel
+
+
+class Price(BaseModel):
+    symbol: str
+    last: Decimal
+
+
+def payload(last: str = "1.5") -> dict:
+    return {"symbol": "SBER@MISX", "last": last}
+
+
+def test_same_payload_returns_cached_model() -> None:
+    convert = ModelConverter(Price)
+    d = payload()
+    shaped = []
+    first = convert(d, lambda d: shaped.append(d) or d)
+    assert first.last == Decimal("1.5")
+    assert convert(d, lambda d: shaped.append(d) or d) is first
+    # shape вызывается только при первой сборке
+    assert shaped == [d]
+
+
+def test_new_payload_is_validated_again() -> None:
+    convert = ModelConverter(Price)
+    first = convert(payload())
+    second = convert(payload())
+    assert second is not first
+    assert second == first
+    assert convert(payload("2")).last == Decimal(2)
+
+
+def test_memo_is_bounded() -> None:
+    convert = ModelConverter(Price, memo_entries=2)
+    payloads = [payload(str(i)) for i in range(3)]
+    models = [convert(d) for d in payloads]
+    assert len(convert._memo) == 2
+    assert convert(payloads[2]) is models[2]
+    # Самая старая модель вытеснена
+    assert convert(payloads[0]) is not models[0]
+
+
+def test_memo_expires() -> None:
+    now = [0.0]
+    convert = ModelConverter(Price, memo_ttl=60)
+    convert._memo = TTLCache(max_entries=8, clock=lambda: now[0])
+    d = payload()
+    first = convert(d)
+    now[0] = 59
+    assert convert(d) is first
+    now[0] = 61
+    assert convert(d) is not first
+
+
+def test_memo_disabled_for_private_models() -> None:
+    convert = converter(Price, memo_ttl=0)
+    d = payload()
+    assert convert(d) is not convert(d)
+    assert len(convert._memo) == 0
+    assert converter(Price, memo_ttl=0) is convert
+    assert converter(Price) is not convert
@@ -0,0 +1,216 @@
+"""Тесты FinamAPIClient поверх подменённой сети: свечи кусками, пакетные котировки и стаканы, память индикаторов"""
+
+import asyncio
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+import httpx
+import pytest
+from adapters.backplane import MemoryBackplane
+from adapters.bar_store import CHUNK_SPAN_NS, NS, to_iso, to_ns
+from adapters.columnar import ColumnarBars
+from adapters.endpoints import EndpointClass
+from adapters.finam_client import FinamAPIClient
+from adapters.pydantic_schema import Indicator, TimeFrame
+
+D = TimeFrame.TIME_FRAME_D
+DAY = 86400 * NS
+
+
+def not_found() -> httpx.Response:
+    """Ответ на фоновые запросы клиента (расписание торгов, время сервера)"""
+    return httpx.Response(404, json={"message": "not found"})
+
+
+@pytest.fixture(autouse=True)
+def unlimited_rates(monkeypatch) -> None:  # noqa: ANN001
+    monkeypatch.setenv("FINAM_RATE_GLOBAL", "0")
+    monkeypatch.setenv("FINAM_BAR_STORE", "0")
+    for endpoint_class in EndpointClass:
+        monkeypatch.setenv(f"FINAM_RATE_{endpoint_class.name}", "0")
+
+
+def run(handler: Callable[[httpx.Request], Awaitable[httpx.Response] | httpx.Response],
+        call: Callable[[FinamAPIClient], object], **kwargs: Any) -> object:  # noqa: ANN401
+    """Выполнить call(client) с клиентом, сеть которого отвечает handler"""
+
+    async def main() -> object:
+        http = httpx.AsyncClient(base_url="https://api.test", transport=httpx.MockTransport(handler))
+        client = FinamAPIClient(access_token="t", http=http, **kwargs)
+        try:
+            return await call(client)
+        finally:
+            await http.aclose()
+
+    return asyncio.run(main())
+
+
+def daily_bars(request: httpx.Request) -> httpx.Response:
+    """Дневные свечи интервала запроса, обе границы включительно и в обратном порядке"""
+    if not request.url.path.endswith("/bars"):
+        return not_found()
+    start = to_ns(request.url.params["interval.start_time"])
+    end = to_ns(request.url.params["interval.end_time"])
+    days = range(start // DAY, end // DAY + 1)
+    bars = [{"timestamp": to_iso(day * DAY), "open": day, "high": day, "low": day, "close": day, "volume": 1}
+            for day in reversed(days)]
+    return httpx.Response(200, json={"symbol": "SBER@MISX", "bars": bars})
+
+
+def test_long_interval_is_split_and_stitched() -> None:
+    requests: list[httpx.Request] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.path.endswith("/bars"):
+            requests.append(request)
+        return daily_bars(request)
+
+    start, end = 0, 2 * CHUNK_SPAN_NS[D] + 10 * DAY
+    bars = run(handler, lambda client: client._fetch_candles("SBER@MISX", D, to_iso(start), to_iso(end)))
+    assert isinstance(bars, ColumnarBars)
+    assert len(requests) == 3
+    # Свечи на границах кусков приходят дважды, в результате — по одной и по возрастанию времени
+    expected = list(range(start // DAY, end // DAY + 1))
+    assert bars.ts.tolist() == [day * DAY for day in expected]
+    assert bars.close.tolist() == expected
+
+
+def test_short_interval_is_one_request() -> None:
+    requests: list[httpx.Request] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.path.endswith("/bars"):
+            requests.append(request)
+        return daily_bars(request)
+
+    bars = run(handler, lambda client: client._fetch_candles("SBER@MISX", D, to_iso(0), to_iso(5 * DAY)))
+    assert len(requests) == 1
+    assert bars.close.tolist() == [0, 1, 2, 3, 4, 5]
+
+
+def test_failed_chunk_fails_whole_interval() -> None:
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.path.endswith("/bars") and to_ns(request.url.params["interval.start_time"]) > 0:
+            return httpx.Response(404, json={"message": "not found"})
+        return daily_bars(request)
+
+    result = run(handler, lambda client: client._fetch_candles("SBER@MISX", D, to_iso(0),
+                                                               to_iso(2 * CHUNK_SPAN_NS[D])))
+    # Склеенный ряд с дырой выглядел бы как полный — вместо него возвращается ошибка куска
+    assert isinstance(result, dict)
+    assert "error" in result
+
+
+def instrument(request: httpx.Request) -> str:
+    return request.url.path.split("/")[3]
+
+
+def test_get_quotes_deduplicates_and_reports_errors() -> None:
+    def handler(request: httpx.Request) -> httpx.Response:
+        symbol = instrument(request)
+        if symbol == "BAD@MISX" or not request.url.path.startswith("/v1/instruments/"):
+            return httpx.Response(404, json={"message": "unknown instrument"})
+        return httpx.Response(200, json={"symbol": symbol, "quote": {"last": "1.5", "bid": "1.4", "ask": "1.6"}})
+
+    result = run(handler, lambda client: client.get_quotes(["SBER@MISX", "BAD@MISX", "GAZP@MISX", "SBER@MISX"]))
+    columns = result["columns"]
+    rows = {row[0]: dict(zip(columns, row, strict=True)) for row in result["rows"]}
+    # Повтор инструмента даёт одну строку, порядок — как в запросе
+    assert [row[0] for row in result["rows"]] == ["SBER@MISX", "BAD@MISX", "GAZP@MISX"]
+    assert rows["SBER@MISX"]["last"] == "1.5"
+    assert rows["SBER@MISX"]["error"] is None
+    # Ошибка одного инструмента не роняет пакет — она в его строке
+    assert rows["BAD@MISX"]["last"] is None
+    assert rows["BAD@MISX"]["error"]
+    assert rows["GAZP@MISX"]["ask"] == "1.6"
+
+
+def test_batch_respects_concurrency_cap() -> None:
+    inflight = peak = 0
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        nonlocal inflight, peak
+        if not request.url.path.startswith("/v1/instruments/"):
+            return not_found()
+        inflight += 1
+        peak = max(peak, inflight)
+        await asyncio.sleep(0.01)
+        inflight -= 1
+        return httpx.Response(200, json={"symbol": instrument(request), "quote": {"last": "1"}})
+
+    symbols = [f"S{i}@MISX" for i in range(7)]
+    result = run(handler, lambda client: client.get_quotes(symbols), batch_concurrency=2)
+    assert len(result["rows"]) == 7
+    assert peak == 2
+
+
+def test_get_orderbooks_summarizes_and_reports_errors() -> None:
+    def level(price: float, buy: float = 0, sell: float = 0) -> dict:
+        return {"price": str(price), "buy_size": str(buy), "sell_size": str(sell)}
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        if instrument(request) == "BAD@MISX" or not request.url.path.startswith("/v1/instruments/"):
+            return httpx.Response(404, json={"message": "unknown instrument"})
+        rows = [level(99.9, buy=1), level(100, buy=2), level(100.2, sell=3), level(100.3, sell=4)]
+        return httpx.Response(200, json={"symbol": instrument(request), "orderbook": {"rows": rows}})
+
+    result = run(handler, lambda client: client.get_orderbooks(["SBER@MISX", "BAD@MISX", "SBER@MISX"], depth=1))
+    rows = [dict(zip(result["columns"], row, strict=True)) for row in result["rows"]]
+    assert [row["symbol"] for row in rows] == ["SBER@MISX", "BAD@MISX"]
+    sber, bad = rows
+    assert (sber["best_bid"], sber["best_ask"], sber["bid_volume"], sber["ask_volume"]) == (100, 100.2, 2, 3)
+    assert sber["spread"] == pytest.approx(0.2)
+    assert sber["error"] is None
+    assert bad["best_bid"] is None
+    assert bad["error"]
+
+
+def test_indicator_follows_forming_last_bar() -> None:
+    closes = [100.0, 101, 99, 102, 103, 101, 104, 105, 103, 106]
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        if not request.url.path.endswith("/bars"):
+            return not_found()
+        bars = [{"timestamp": to_iso(i * DAY), "open": c, "high": c, "low": c, "close": c, "volume": 1}
+                for i, c in enumerate(closes)]
+        return httpx.Response(200, json={"symbol": "SBER@MISX", "bars": bars})
+
+    async def sma(client: FinamAPIClient) -> list[float]:
+        values = []
+        for last_close in (106, 106, 96):
+            # Незавершённая дневная свеча меняет close, не меняя времени открытия
+            closes[-1] = last_close
+            d = await client.get_indicator("SBER@MISX", D, Indicator.SMA, {"period": 2}, tail=1)
+            values.append(d["rows"][-1][1])
+        assert len(client._indicator_memo) == 2
+        return values
+
+    assert run(handler, sma, cache_ttls=dict.fromkeys(EndpointClass, 0.0)) == [104.5, 104.5, 99.5]
+
+
+def test_shared_cache_is_scoped_to_tenant() -> None:
+    tokens: list[str] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        if not request.url.path.endswith("/quotes/latest"):
+            return not_found()
+        tokens.append(request.headers["authorization"])
+        if request.headers["authorization"] == "expired":
+            return httpx.Response(401, json={"message": "unauthenticated"})
+        return httpx.Response(200, json={"symbol": "SBER@MISX", "token": request.headers["authorization"]})
+
+    async def main() -> list[dict]:
+        http = httpx.AsyncClient(base_url="https://api.test", transport=httpx.MockTransport(handler))
+        backplane = MemoryBackplane()
+        # Каждый клиент — как отдельный воркер: свой локальный кэш, общий backplane
+        workers = [FinamAPIClient(access_token=token, http=http, backplane=backplane)
+                   for token in ("a", "b", "expired", "a")]
+        results = [await worker.get_quote("SBER@MISX") for worker in workers]
+        await http.aclose()
+        return results
+
+    results = asyncio.run(main())
+    # Чужой ответ из общего кэша не достаётся: b и expired идут в API со своим токеном
+    assert tokens == ["a", "b", "expired"]
+    assert [r.get("token") for r in results] == ["a", "b", None, "a"]
+    assert "error" in results[2]
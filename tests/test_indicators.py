@@ -0,0 +1,108 @@
+"""Тесты индикаторов: векторные расчёты против наивных циклов"""
+
+import math
+
+import numpy as np
+import pytest
+from adapters.columnar import ColumnarBars
+from adapters.indicators import atr, bollinger, ema, ewm, macd, rsi, sma, volatility
+
+N = 600  # Больше блока ewm при α = 2/21, чтобы проверить склейку блоков
+
+
+def series(seed: int = 0) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, N)))
+    spread = np.abs(rng.normal(0, 0.5, N))
+    return close + spread, close - spread, close
+
+
+def naive_sma(x: list[float], period: int) -> list[float]:
+    return [math.nan if i < period - 1 else sum(x[i - period + 1:i + 1]) / period for i in range(len(x))]
+
+
+def naive_smooth(x: list[float], period: int, alpha: float) -> list[float]:
+    out = [math.nan] * len(x)
+    prev = sum(x[:period]) / period
+    out[period - 1] = prev
+    for i in range(period, len(x)):
+        prev = (1 - alpha) * prev + alpha * x[i]
+        out[i] = prev
+    return out
+
+
+def naive_rsi(close: list[float], period: int) -> list[float]:
+    gains = [max(b - a, 0.0) for a, b in zip(close, close[1:], strict=False)]
+    losses = [max(a - b, 0.0) for a, b in zip(close, close[1:], strict=False)]
+    gain, loss = naive_smooth(gains, period, 1 / period), naive_smooth(losses, period, 1 / period)
+    return [math.nan] + [math.nan if math.isnan(g) else 100.0 if lo == 0 else 100 - 100 / (1 + g / lo)
+                         for g, lo in zip(gain, loss, strict=True)]
+
+
+def naive_atr(high: list[float], low: list[float], close: list[float], period: int) -> list[float]:
+    true_range = [max(high[i], close[i - 1]) - min(low[i], close[i - 1]) for i in range(1, len(close))]
+    return [math.nan, *naive_smooth(true_range, period, 1 / period)]
+
+
+def naive_std(x: list[float], ddof: int = 0) -> float:
+    mean = sum(x) / len(x)
+    return math.sqrt(sum((v - mean) ** 2 for v in x) / (len(x) - ddof))
+
+
+def close_to(actual: np.ndarray, expected: list[float]) -> None:
+    np.testing.assert_allclose(actual, np.array(expected), rtol=1e-9, atol=1e-9, equal_nan=True)
+
+
+def test_ewm_matches_recurrence() -> None:
+    x = np.random.default_rng(1).normal(size=N)
+    for alpha in (0.01, 0.1, 2 / 21, 0.5, 1.0):
+        expected, prev = [], 3.0
+        for v in x:
+            prev = (1 - alpha) * prev + alpha * v
+            expected.append(prev)
+        close_to(ewm(x, alpha, 3.0), expected)
+
+
+def test_moving_averages() -> None:
+    _, _, close = series()
+    x = close.tolist()
+    close_to(sma(close, 20), naive_sma(x, 20))
+    close_to(ema(close, 20), naive_smooth(x, 20, 2 / 21))
+    fast, slow = naive_smooth(x, 12, 2 / 13), naive_smooth(x, 26, 2 / 27)
+    line = [f - s for f, s in zip(fast, slow, strict=True)]
+    signal = [math.nan] * 25 + naive_smooth(line[25:], 9, 0.2)
+    macd_line, signal_line, histogram = macd(close)
+    close_to(macd_line, line)
+    close_to(signal_line, signal)
+    close_to(histogram, [m - s for m, s in zip(line, signal, strict=True)])
+
+
+def test_rsi_and_atr() -> None:
+    high, low, close = series(2)
+    close_to(rsi(close, 14), naive_rsi(close.tolist(), 14))
+    close_to(atr(high, low, close, 14), naive_atr(high.tolist(), low.tolist(), close.tolist(), 14))
+    assert rsi(np.arange(1.0, 30.0), 14)[-1] == 100.0
+
+
+def test_bollinger_and_volatility() -> None:
+    _, _, close = series(3)
+    x = close.tolist()
+    std = [math.nan] * 19 + [naive_std(x[i - 19:i + 1]) for i in range(19, N)]
+    mid, upper, lower = bollinger(close, 20, 2.0)
+    close_to(mid, naive_sma(x, 20))
+    close_to(upper, [m + 2 * s for m, s in zip(naive_sma(x, 20), std, strict=True)])
+    close_to(lower, [m - 2 * s for m, s in zip(naive_sma(x, 20), std, strict=True)])
+    returns = [math.log(b / a) for a, b in zip(x, x[1:], strict=False)]
+    expected = [math.nan] * 20 + [naive_std(returns[i - 20:i], ddof=1) * math.sqrt(252) for i in range(20, N)]
+    close_to(volatility(close, 20, 252.0), expected)
+
+
+@pytest.mark.parametrize("fn", [lambda c: sma(c, 20), lambda c: ema(c, 20), lambda c: rsi(c, 14)])
+def test_short_series_is_nan(fn) -> None:  # noqa: ANN001
+    assert np.isnan(fn(np.arange(1.0, 10.0))).all()
+
+
+def test_iso_timestamps() -> None:
+    ts = np.array([0, 86_400 * 10**9], dtype=np.int64)
+    bars = ColumnarBars("X", ts, *(np.ones(2) for _ in range(5)))
+    assert bars.iso_timestamps() == ["1970-01-01T00:00:00Z", "1970-01-02T00:00:00Z"]
@@ -0,0 +1,37 @@
+"""Тесты метрик в формате Prometheus"""
+
+import pytest
+from adapters.metrics import MetricsRegistry
+
+
+def test_render_counters_gauges_and_histograms() -> None:
+    metrics = MetricsRegistry()
+    calls = metrics.counter("calls_total", "Вызовы", ("tool",))
+    inflight = metrics.gauge("inflight", "В работе")
+    latency = metrics.histogram("latency_seconds", "Время", buckets=(1.0, 0.1))
+    calls.inc(("get_quote",))
+    calls.inc(("get_quote",), 2)
+    inflight.inc()
+    inflight.dec()
+    inflight.set((), 5)
+    latency.observe((), 0.05)
+    latency.observe((), 0.5)
+    metrics.collector(lambda: [("extra", "gauge", "Из сборщика", [({"kind": 'a"b'}, 1.5)])])
+
+    text = metrics.render()
+    assert 'calls_total{tool="get_quote"} 3' in text
+    assert "inflight 5" in text
+    assert latency.buckets == (0.1, 1.0)
+    assert 'latency_seconds_bucket{le="0.1"} 1' in text
+    assert 'latency_seconds_bucket{le="+Inf"} 2' in text
+    assert "latency_seconds_count 2" in text
+    assert 'extra{kind="a\\"b"} 1.5' in text
+    assert calls.get(("get_quote",)) == 3
+    assert latency.count() == 2
+
+
+def test_duplicate_metric_is_rejected() -> None:
+    metrics = MetricsRegistry()
+    metrics.counter("x", "")
+    with pytest.raises(ValueError, match="уже зарегистрирована"):
+        metrics.gauge("x", "")
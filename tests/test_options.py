@@ -0,0 +1,75 @@
+"""Тесты опционной аналитики"""
+
+import math
+
+import numpy as np
+from adapters.options import black_price, expiry_ns, greeks, implied_vol, norm_cdf, number, parse_chain
+
+
+def grid() -> tuple[np.ndarray, ...]:
+    strike, t, vol, is_call = (a.ravel() for a in np.meshgrid(
+        np.linspace(60, 140, 9), [0.02, 0.25, 1.0, 3.0], [0.05, 0.2, 0.6, 1.5], [True, False], indexing="ij"))
+    forward = np.full(len(strike), 100.0)
+    return forward, strike, t, vol, np.exp(-0.1 * t), is_call
+
+
+def test_norm_cdf_matches_erf() -> None:
+    x = np.linspace(-8, 8, 161)
+    expected = [0.5 * (1 + math.erf(v / math.sqrt(2))) for v in x]
+    np.testing.assert_allclose(norm_cdf(x), expected, atol=1e-7)
+
+
+def test_put_call_parity() -> None:
+    forward, strike, t, vol, discount, _ = grid()
+    call = black_price(forward, strike, t, vol, discount, np.ones(len(t), bool))
+    put = black_price(forward, strike, t, vol, discount, np.zeros(len(t), bool))
+    np.testing.assert_allclose(call - put, discount * (forward - strike), atol=1e-6)
+
+
+def test_implied_vol_round_trip() -> None:
+    forward, strike, t, vol, discount, is_call = grid()
+    price = black_price(forward, strike, t, vol, discount, is_call)
+    # Цены, неотличимые от внутренней стоимости, волатильность не определяют
+    intrinsic = discount * np.maximum(np.where(is_call, forward - strike, strike - forward), 0.0)
+    usable = price - intrinsic > 1e-6 * forward
+    recovered = implied_vol(price, forward, strike, t, discount, is_call)
+    np.testing.assert_allclose(recovered[usable], vol[usable], rtol=1e-4)
+
+
+def test_implied_vol_outside_arbitrage_bounds_is_nan() -> None:
+    one = np.ones(3)
+    price = np.array([0.5, 150.0, 10.0])  # Ниже внутренней стоимости, выше форварда, истёкший срок
+    iv = implied_vol(price, 100 * one, np.array([90.0, 90.0, 90.0]), np.array([1.0, 1.0, 0.0]), one,
+                     np.ones(3, bool))
+    assert np.isnan(iv).all()
+
+
+def test_greeks_match_finite_differences() -> None:
+    strike, t, vol, rate, spot = np.array([95.0, 105.0]), np.array([0.5, 0.5]), np.array([0.3, 0.3]), 0.08, 100.0
+    is_call = np.array([True, False])
+
+    def price(s: float, v: np.ndarray = vol, r: float = rate) -> np.ndarray:
+        return black_price(s * np.exp(r * t), strike, t, v, np.exp(-r * t), is_call)
+
+    g = greeks(spot, spot * np.exp(rate * t), strike, t, vol, rate, is_call, futures=False)
+    h = 1e-3
+    np.testing.assert_allclose(g["delta"], (price(spot + h) - price(spot - h)) / (2 * h), atol=1e-5)
+    np.testing.assert_allclose(g["gamma"], (price(spot + h) - 2 * price(spot) + price(spot - h)) / h ** 2, atol=1e-3)
+    np.testing.assert_allclose(g["vega"], (price(spot, vol + h) - price(spot, vol - h)) / (2 * h) / 100, atol=1e-5)
+    np.testing.assert_allclose(g["rho"], (price(spot, r=rate + h) - price(spot, r=rate - h)) / (2 * h) / 100,
+                               atol=1e-5)
+
+
+def test_parse_chain() -> None:
+    payload = {"options": [
+        {"symbol": "SR100CL", "type": "TYPE_CALL", "strike": {"value": "100"}, "expiration_last_day": "2026-12-17"},
+        {"symbol": "SR100PX", "type": "TYPE_PUT", "strike": "100", "expiration_date": {"year": 2026, "month": 12,
+                                                                                     "day": 17}},
+        {"symbol": "BAD", "type": "TYPE_CALL", "strike": None, "expiration_last_day": "2026-12-17"},
+    ]}
+    series = parse_chain(payload)
+    assert [(s["symbol"], s["strike"], s["is_call"]) for s in series] == [("SR100CL", 100.0, True),
+                                                                         ("SR100PX", 100.0, False)]
+    assert series[0]["expiration"] == series[1]["expiration"] == expiry_ns("2026-12-17T15:50:00Z")
+    assert number({"value": "1.5"}) == 1.5
+    assert number("n/a") is None
@@ -0,0 +1,67 @@
+"""Тесты локального стакана"""
+
+from adapters.orderbook import Ladder, LocalOrderBook
+from adapters.pydantic_schema import OrderBookAction
+
+
+def row(price: float, buy: float = 0, sell: float = 0, action: OrderBookAction = OrderBookAction.ACTION_ADD) -> dict:
+    return {"price": str(price), "buy_size": str(buy), "sell_size": str(sell), "action": int(action)}
+
+
+def test_ladder_keeps_prices_sorted() -> None:
+    ladder = Ladder()
+    for price, size in ((10.2, 1), (10.0, 2), (10.1, 3), (10.1, 4)):
+        ladder.set(price, size)
+    assert ladder.lowest() == [(10.0, 2), (10.1, 4), (10.2, 1)]
+    assert ladder.highest(2) == [(10.2, 1), (10.1, 4)]
+    ladder.set(10.0, 0)
+    ladder.remove(10.5)  # Нет такого уровня
+    assert ladder.lowest() == [(10.1, 4), (10.2, 1)]
+
+
+def test_snapshot_replaces_book() -> None:
+    book = LocalOrderBook("SBER@MISX")
+    book.load_snapshot([row(99.0, buy=5), row(101.0, sell=7)])
+    book.load_snapshot([row(102.0, sell=3), row(100.0, buy=2), row(101.0, sell=1), row(99.5, buy=4)])
+    assert book.best_bid() == (100.0, 2)
+    assert book.best_ask() == (101.0, 1)
+    assert book.spread() == 1.0
+    assert book.mid() == 100.5
+    assert book.depth() == ([(100.0, 2), (99.5, 4)], [(101.0, 1), (102.0, 3)])
+
+
+def test_snapshot_matches_incremental_apply() -> None:
+    rows = [row(100 + i * 0.1, buy=i) for i in range(10)] + [row(101 + i * 0.1, sell=i + 1) for i in range(10)]
+    rows.append(row(100.3, action=OrderBookAction.ACTION_REMOVE))
+    snapshot, incremental = LocalOrderBook("X"), LocalOrderBook("X")
+    snapshot.load_snapshot(rows)
+    incremental.apply(rows)
+    assert snapshot.depth() == incremental.depth()
+
+
+def test_deltas_update_and_remove_levels() -> None:
+    book = LocalOrderBook("X")
+    book.load_snapshot([row(100, buy=1), row(99, buy=2), row(101, sell=3)])
+    book.apply([
+        row(100, buy=5, action=OrderBookAction.ACTION_UPDATE),
+        row(99, action=OrderBookAction.ACTION_REMOVE),
+        row(100.5, sell=1),
+    ])
+    assert book.depth() == ([(100.0, 5)], [(100.5, 1), (101.0, 3)])
+
+
+def test_summary_cumulative_sizes() -> None:
+    book = LocalOrderBook("X")
+    book.load_snapshot([row(100, buy=1), row(99, buy=2), row(98, buy=3), row(101, sell=4), row(102, sell=5)])
+    summary = book.summary(2)
+    assert [level["cumulative_size"] for level in summary["bids"]] == [1, 3]
+    assert [level["cumulative_size"] for level in summary["asks"]] == [4, 9]
+    assert (summary["best_bid"], summary["best_ask"]) == (100, 101)
+
+
+def test_to_rows_round_trip() -> None:
+    book = LocalOrderBook("X")
+    book.load_snapshot([row(100, buy=1), row(101, sell=2)])
+    copy = LocalOrderBook("X")
+    copy.load_snapshot(book.to_rows())
+    assert copy.depth() == book.depth()
@@ -0,0 +1,53 @@
+"""Тесты аналитики портфеля"""
+
+import numpy as np
+import pytest
+from adapters.bar_store import NS
+from adapters.columnar import ColumnarBars
+from adapters.portfolio import align, forward_fill, portfolio_risk
+
+DAY = 86_400 * NS
+
+
+def bars(symbol: str, close: np.ndarray, days: np.ndarray | None = None) -> ColumnarBars:
+    days = np.arange(len(close)) if days is None else days
+    return ColumnarBars(symbol, days.astype(np.int64) * DAY, close, close, close, close, np.ones(len(close)))
+
+
+def prices(seed: int, n: int = 300) -> np.ndarray:
+    return 100 * np.cumprod(1 + np.random.default_rng(seed).normal(0, 0.01, n))
+
+
+def test_align_forward_fills_and_drops_leading_gaps() -> None:
+    a = bars("A", np.array([1.0, 2.0, 3.0, 4.0]))
+    b = bars("B", np.array([10.0, 30.0]), days=np.array([1, 3]))
+    ts, closes = align({"A": a, "B": b})
+    assert (ts // DAY).tolist() == [1, 2, 3]
+    assert closes.tolist() == [[2.0, 10.0], [3.0, 10.0], [4.0, 30.0]]
+    assert np.isnan(forward_fill(np.array([[np.nan], [1.0]])))[0, 0]
+
+
+def test_portfolio_risk_matches_naive_formulas() -> None:
+    closes = {"A": prices(1), "B": prices(2), "C": prices(3)}
+    bench = prices(4)
+    values = {"A": 500.0, "B": -300.0, "C": 200.0}
+    result = portfolio_risk({s: bars(s, c) for s, c in closes.items()}, values, ppy=252,
+                            benchmark=bars("IMOEX", bench))
+
+    returns = {s: np.diff(c) / c[:-1] for s, c in closes.items()}
+    weights = {s: v / 1000.0 for s, v in values.items()}
+    portfolio = sum(weights[s] * returns[s] for s in closes)
+    bench_returns = np.diff(bench) / bench[:-1]
+    assert result["weights"] == [0.5, -0.3, 0.2]
+    assert result["volatility"][0] == pytest.approx(returns["A"].std(ddof=1) * np.sqrt(252), abs=1e-6)
+    assert result["portfolio"]["volatility"] == pytest.approx(portfolio.std(ddof=1) * np.sqrt(252), abs=1e-6)
+    assert result["correlation"][0][1] == pytest.approx(np.corrcoef(returns["A"], returns["B"])[0, 1], abs=1e-6)
+    assert sum(result["risk_contribution"]) == pytest.approx(1.0, abs=1e-5)
+    beta = np.cov(portfolio, bench_returns)[0, 1] / bench_returns.var(ddof=1)
+    assert result["portfolio"]["beta_to_benchmark"] == pytest.approx(beta, abs=1e-6)
+    assert (result["portfolio"]["gross_exposure"], result["portfolio"]["net_exposure"]) == (1000.0, 400.0)
+
+
+def test_portfolio_risk_needs_common_history() -> None:
+    with pytest.raises(ValueError, match="три"):
+        portfolio_risk({"A": bars("A", np.array([1.0, 2.0]))}, {"A": 1.0}, ppy=252)
@@ -0,0 +1,144 @@
+"""Тесты реестра клиентов по токенам арендаторов"""
+
+import asyncio
+
+import httpx
+import pytest
+from adapters.endpoints import EndpointClass
+from adapters.registry import ClientRegistry, tenant_id, token_from_headers
+from mcp.server.fastmcp import FastMCP
+
+
+@pytest.fixture(autouse=True)
+def environment(monkeypatch) -> None:  # noqa: ANN001
+    monkeypatch.setenv("FINAM_ACCESS_TOKEN", "default-token")
+    monkeypatch.setenv("FINAM_BAR_STORE", "0")
+    monkeypatch.setenv("FINAM_RATE_GLOBAL", "0")
+    for endpoint_class in EndpointClass:
+        monkeypatch.setenv(f"FINAM_RATE_{endpoint_class.name}", "0")
+
+
+def registry(max_clients: int = 2, handler: httpx.MockTransport | None = None) -> ClientRegistry:
+    transport = handler or httpx.MockTransport(lambda _: httpx.Response(404, json={"message": "not found"}))
+    return ClientRegistry(max_clients=max_clients, idle_ttl=0,
+                          http=httpx.AsyncClient(base_url="https://api.test", transport=transport))
+
+
+def test_token_from_headers() -> None:
+    assert token_from_headers({"x-finam-token": "a", "authorization": "Bearer b"}) == "a"
+    assert token_from_headers({"authorization": "Bearer b"}) == "b"
+    assert token_from_headers({"authorization": "Bearer "}) is None
+    assert tenant_id("") == "default"
+    assert tenant_id("a") != tenant_id("b")
+
+
+def test_least_recently_used_client_is_evicted() -> None:
+    reg = registry()
+    a = reg.get("a")
+    reg.get("b")
+    assert reg.get("a") is a
+    reg.get("c")
+    # b не использовался дольше всех
+    assert set(reg._tenants) == {"a", "c"}
+    assert reg.evictions == 1
+    assert reg.get("b") is not None
+    assert set(reg._tenants) == {"c", "b"}
+
+
+def test_default_client_is_pinned() -> None:
+    reg = registry(max_clients=1)
+    default = reg.default
+    assert reg.get(None) is default
+    assert reg.get("") is default
+    reg.get("a")
+    b = reg.get("b")
+    assert reg.default is default
+    # Новый клиент не вытесняется сразу, даже если место занято клиентом по умолчанию
+    assert reg.get("b") is b
+    assert set(reg._tenants) == {"default-token", "b"}
+
+
+def test_evict_idle() -> None:
+    reg = registry(max_clients=8)
+    reg.idle_ttl = 10
+    assert reg.default is not None
+    reg.get("a")
+    reg.get("b")
+    for tenant in reg._tenants.values():
+        tenant.stats.last_used -= 20
+    reg.get("b")
+    # Клиент по умолчанию не закрывается, даже если простаивает
+    assert reg.evict_idle() == 1
+    assert set(reg._tenants) == {"default-token", "b"}
+
+
+def test_evicted_client_is_closed_after_its_calls() -> None:
+    async def main() -> None:
+        reg = registry(max_clients=1)
+        closed: list[str] = []
+        async with reg.lease("a") as a:
+            a.aclose = lambda: closed.append("a") or asyncio.sleep(0)
+            reg.get("b")
+            reg.get("c")
+            await asyncio.sleep(0)
+            # Вытеснен во время вызова — закрывается, когда вызов закончится
+            assert "a" not in reg._tenants
+            assert closed == []
+        assert closed == ["a"]
+        await reg.aclose()
+
+    asyncio.run(main())
+
+
+def test_snapshot_counts_leases() -> None:
+    async def main() -> dict:
+        reg = registry()
+        async with reg.lease("a"):
+            assert reg.snapshot()["tenants"][tenant_id("a")]["inflight"] == 1
+        with pytest.raises(RuntimeError):
+            async with reg.lease("a"):
+                raise RuntimeError
+        async with reg.lease(None):
+            pass
+        snapshot = reg.snapshot()
+        await reg.aclose()
+        return snapshot
+
+    snapshot = asyncio.run(main())
+    assert snapshot["clients"] == 2
+    assert snapshot["max_clients"] == 2
+    tenant = snapshot["tenants"][tenant_id("a")]
+    assert (tenant["calls"], tenant["errors"], tenant["inflight"]) == (2, 1, 0)
+    assert snapshot["tenants"][tenant_id("default-token")]["calls"] == 1
+    # Сами токены в статистику не попадают
+    assert "default-token" not in repr(snapshot)
+    assert "cache" in tenant["client"]
+
+
+def test_tools_run_with_tenant_client() -> None:
+    tokens: list[str] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        if not request.url.path.endswith("/quotes/latest"):
+            return httpx.Response(404, json={"message": "not found"})
+        tokens.append(request.headers["authorization"])
+        quote = {"last": "1.5", "timestamp": "2024-03-01T10:00:00Z"}
+        return httpx.Response(200, json={"symbol": "SBER@MISX", "quote": quote})
+
+    async def main() -> dict:
+        reg = registry(handler=httpx.MockTransport(handler))
+        mcp = FastMCP(name="test")
+        token = ["a"]
+        reg.register_tools(mcp, lambda: token[0])
+        await mcp.call_tool("get_quote", {"args": {"symbol": "SBER@MISX"}})
+        token[0] = None
+        await mcp.call_tool("get_quote", {"args": {"symbol": "SBER@MISX"}})
+        snapshot = reg.snapshot()
+        await reg.aclose()
+        return snapshot
+
+    snapshot = asyncio.run(main())
+    assert tokens == ["a", "default-token"]
+    # Один вызов инструмента — одна аренда клиента
+    assert snapshot["tenants"][tenant_id("a")]["calls"] == 1
+    assert snapshot["tenants"][tenant_id("default-token")]["calls"] == 1
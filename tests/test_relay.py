@@ -0,0 +1,113 @@
+"""Тесты передачи сообщений SSE-сессий между воркерами"""
+
+import asyncio
+import json
+from typing import Any
+
+import httpx
+from adapters.backplane import MemoryBackplane
+from adapters.registry import token_from_headers
+from mcp.server.fastmcp import Context, FastMCP
+from server.relay import SessionRelay
+from starlette.applications import Starlette
+
+HOST = "relay.test"
+
+
+def worker(backplane: MemoryBackplane) -> tuple[Starlette, SessionRelay]:
+    """Воркер с инструментом, возвращающим токен из заголовков запроса"""
+    mcp = FastMCP("relay-test")
+
+    @mcp.tool()
+    def whoami(ctx: Context) -> str:
+        return token_from_headers(ctx.request_context.request.headers) or ""
+
+    app = mcp.sse_app(mount_path="/")
+    return app, SessionRelay.install(app, backplane)
+
+
+class Stream:
+    """GET /sse, выполненный напрямую через ASGI: события читаются по мере поступления"""
+
+    def __init__(self, app: Starlette, token: str) -> None:
+        self.events: asyncio.Queue[tuple[str, str]] = asyncio.Queue()
+        self._closed = asyncio.Event()
+        self._buffer = ""
+        scope = {
+            "type": "http", "method": "GET", "path": "/sse", "raw_path": b"/sse", "query_string": b"",
+            "root_path": "", "scheme": "http", "http_version": "1.1", "server": (HOST, 80), "client": ("1.2.3.4", 1),
+            "headers": [(b"host", HOST.encode()), (b"authorization", f"Bearer {token}".encode())],
+        }
+        self.task = asyncio.create_task(app(scope, self._receive, self._send))
+
+    async def _receive(self) -> dict[str, Any]:
+        await self._closed.wait()
+        return {"type": "http.disconnect"}
+
+    async def _send(self, message: dict[str, Any]) -> None:
+        if message["type"] != "http.response.body":
+            return
+        self._buffer += message.get("body", b"").decode().replace("\r\n", "\n")
+        *events, self._buffer = self._buffer.split("\n\n")
+        for event in events:
+            fields = dict(line.split(": ", 1) for line in event.splitlines() if ": " in line)
+            if "data" in fields:
+                self.events.put_nowait((fields.get("event", "message"), fields["data"]))
+
+    async def next(self, timeout: float = 2.0) -> tuple[str, str]:
+        return await asyncio.wait_for(self.events.get(), timeout)
+
+    async def close(self) -> None:
+        self._closed.set()
+        await asyncio.wait_for(self.task, 2.0)
+
+
+def test_messages_reach_session_on_other_worker_without_tokens() -> None:
+    async def main() -> None:
+        backplane = MemoryBackplane()
+        published: list[bytes] = []
+        publish = backplane.publish
+
+        async def record(channel: str, message: bytes) -> None:
+            published.append(message)
+            await publish(channel, message)
+
+        backplane.publish = record
+        owner_app, owner = worker(backplane)
+        other_app, other = worker(backplane)
+        await owner.start()
+        await other.start()
+
+        stream = Stream(owner_app, "token-a")
+        event, endpoint = await stream.next()
+        assert event == "endpoint"
+
+        async def post(token: str, message: dict[str, Any]) -> int:
+            async with httpx.AsyncClient(transport=httpx.ASGITransport(app=other_app), base_url=f"http://{HOST}") as c:
+                response = await c.post(endpoint, json=message, headers={"Authorization": f"Bearer {token}"})
+            return response.status_code
+
+        assert await post("token-a", {"jsonrpc": "2.0", "id": 1, "method": "initialize", "params": {
+            "protocolVersion": "2025-06-18", "capabilities": {}, "clientInfo": {"name": "t", "version": "1"}}}) == 202
+        assert json.loads((await stream.next())[1])["id"] == 1
+        await post("token-a", {"jsonrpc": "2.0", "method": "notifications/initialized"})
+        await post("token-a", {"jsonrpc": "2.0", "id": 2, "method": "tools/call",
+                               "params": {"name": "whoami", "arguments": {}}})
+        result = json.loads((await stream.next())[1])
+        # Токен дошёл до инструмента из заголовков сессии, а не через backplane
+        assert (result["id"], result["result"]["content"][0]["text"]) == (2, "token-a")
+        assert published and not any(b"token-a" in message for message in published)
+        assert other.stats.forwarded == 3
+        assert owner.stats.delivered == 3
+
+        # Сообщение в чужую сессию от другого арендатора отбрасывается
+        assert await post("token-b", {"jsonrpc": "2.0", "id": 3, "method": "tools/list"}) == 202
+        assert owner.stats.rejected == 1
+        assert stream.events.empty()
+
+        await stream.close()
+        assert owner._sessions == {}
+        await owner.stop()
+        await other.stop()
+
+    asyncio.run(main())
@@ -0,0 +1,92 @@
+"""Тесты построения свечей старшего таймфрейма из младшего"""
+
+import asyncio
+
+import numpy as np
+from adapters.bar_store import BAR_DTYPE, NS, to_iso, to_ns
+from adapters.finam_client import FinamAPIClient
+from adapters.pydantic_schema import TimeFrame
+from adapters.resample import bucket_starts, native_offset_ns, next_bucket_start, resample
+
+HOUR = 3600 * NS
+MSK = 3 * HOUR
+
+
+def ts(*values: str) -> np.ndarray:
+    return np.array([to_ns(v) for v in values])
+
+
+def test_daily_buckets_start_at_local_midnight() -> None:
+    starts = bucket_starts(ts("2024-03-01T20:59:00Z", "2024-03-01T21:00:00Z"), TimeFrame.TIME_FRAME_D, MSK)
+    assert [to_iso(int(s)) for s in starts] == ["2024-02-29T21:00:00Z", "2024-03-01T21:00:00Z"]
+
+
+def test_weekly_and_monthly_buckets() -> None:
+    # 2024-03-06 — среда, неделя начинается в понедельник 2024-03-04
+    week, quarter = (int(bucket_starts(ts(value), timeframe, 0)[0]) for value, timeframe in (
+        ("2024-03-06T12:00:00Z", TimeFrame.TIME_FRAME_W), ("2024-05-20T12:00:00Z", TimeFrame.TIME_FRAME_QR),
+    ))
+    assert to_iso(week) == "2024-03-04T00:00:00Z"
+    assert to_iso(quarter) == "2024-04-01T00:00:00Z"
+    start = to_ns("2024-01-01T00:00:00Z")
+    assert to_iso(next_bucket_start(start, TimeFrame.TIME_FRAME_MN, 0)) == "2024-02-01T00:00:00Z"
+
+
+def test_native_offset_matches_api_stamps() -> None:
+    assert native_offset_ns(to_ns("2024-03-01T21:00:00Z"), TimeFrame.TIME_FRAME_D) == MSK
+    assert native_offset_ns(to_ns("2024-03-01T00:00:00Z"), TimeFrame.TIME_FRAME_D) == 0
+    assert native_offset_ns(to_ns("2024-03-01T07:00:00Z"), TimeFrame.TIME_FRAME_H2) == HOUR
+
+
+def test_resample_ohlcv() -> None:
+    bars = np.zeros(4, dtype=BAR_DTYPE)
+    bars["ts"] = ts("2024-03-01T10:00:00Z", "2024-03-01T10:30:00Z", "2024-03-01T11:00:00Z", "2024-03-01T11:30:00Z")
+    bars["open"] = [1, 2, 3, 4]
+    bars["high"] = [5, 6, 7, 8]
+    bars["low"] = [0.5, 0.1, 2, 3]
+    bars["close"] = [2, 3, 4, 5]
+    bars["volume"] = [10, 20, 30, 40]
+
+    out = resample(bars, TimeFrame.TIME_FRAME_H1, 0)
+    assert [to_iso(int(t)) for t in out["ts"]] == ["2024-03-01T10:00:00Z", "2024-03-01T11:00:00Z"]
+    assert list(out["open"]) == [1, 3]
+    assert list(out["high"]) == [6, 8]
+    assert list(out["low"]) == [0.1, 2]
+    assert list(out["close"]) == [3, 5]
+    assert list(out["volume"]) == [30, 70]
+
+
+def minute_bars(start: str, count: int) -> np.ndarray:
+    bars = np.zeros(count, dtype=BAR_DTYPE)
+    bars["ts"] = to_ns(start) + np.arange(count) * 60 * NS
+    bars["open"] = bars["high"] = bars["low"] = bars["close"] = np.arange(count, dtype=float)
+    bars["volume"] = 1
+    return bars
+
+
+def test_client_fills_gaps_from_finer_bars_with_native_stamps(tmp_path, monkeypatch) -> None:  # noqa: ANN001
+    def no_fetch(*args: object, **kwargs: object) -> None:
+        raise AssertionError("свечи должны строиться из хранилища")
+
+    async def main() -> np.ndarray:
+        client = FinamAPIClient(access_token="t", bar_store_dir=str(tmp_path))
+        monkeypatch.setattr(client, "_fetch_candles", no_fetch)
+        store = client.bar_store
+        symbol, h4 = "SBER@MISX", TimeFrame.TIME_FRAME_H4
+        # API размечает H4 от 01:00Z; в хранилище уже есть одна такая свеча
+        native = np.zeros(1, dtype=BAR_DTYPE)
+        native["ts"] = to_ns("2024-03-01T01:00:00Z")
+        store.write(symbol, h4, native, to_ns("2024-03-01T01:00:00Z"), to_ns("2024-03-01T05:00:00Z"))
+        store.write(symbol, TimeFrame.TIME_FRAME_M1, minute_bars("2024-03-01T05:00:00Z", 8 * 60),
+                    to_ns("2024-03-01T05:00:00Z"), to_ns("2024-03-01T13:00:00Z"))
+
+        bars = await client.get_candles_columnar(symbol, h4, "2024-03-01T01:00:00Z", "2024-03-01T13:00:00Z")
+        assert store.missing(symbol, h4, to_ns("2024-03-01T01:00:00Z"), to_ns("2024-03-01T13:00:00Z")) == []
+        await client.aclose()
+        return bars.to_array()
+
+    bars = asyncio.run(main())
+    assert [to_iso(int(t)) for t in bars["ts"]] == [
+        "2024-03-01T01:00:00Z", "2024-03-01T05:00:00Z", "2024-03-01T09:00:00Z",
+    ]
+    assert list(bars["volume"][1:]) == [240, 240]
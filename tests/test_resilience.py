@@ -0,0 +1,123 @@
+"""Тесты повторов GET и хеджирования запросов"""
+
+import asyncio
+import random
+from collections.abc import Callable
+
+import httpx
+import pytest
+from adapters.endpoints import EndpointClass
+from adapters.finam_client import FinamAPIClient
+from adapters.resilience import RetryPolicy
+
+QUOTE_PATH = "/v1/instruments/SBER@MISX/quotes/latest"
+
+
+@pytest.fixture(autouse=True)
+def unlimited_rates(monkeypatch) -> None:  # noqa: ANN001
+    monkeypatch.setenv("FINAM_RATE_GLOBAL", "0")
+    for endpoint_class in EndpointClass:
+        monkeypatch.setenv(f"FINAM_RATE_{endpoint_class.name}", "0")
+
+
+def send(responses: list, method: str = "GET", hedge: bool = False,
+         prepare: Callable[[FinamAPIClient], None] | None = None) -> tuple[dict, int, FinamAPIClient]:
+    """
+    Отправить один запрос клиентом, сеть которого по очереди отдаёт responses
+
+    Элемент responses — ответ, исключение или пара (задержка в секундах, ответ).
+    Возвращает результат, число запросов в сеть и клиента.
+    """
+    sent = 0
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        nonlocal sent
+        sent += 1
+        result = responses[sent - 1]
+        if isinstance(result, tuple):
+            delay, result = result
+            await asyncio.sleep(delay)
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    async def main() -> tuple[dict, FinamAPIClient]:
+        http = httpx.AsyncClient(base_url="https://api.test", transport=httpx.MockTransport(handler))
+        client = FinamAPIClient(access_token="t", http=http, hedge_requests=hedge)
+        client.retry_policy = RetryPolicy(retries=2, backoff_base=0.001)
+        if prepare is not None:
+            prepare(client)
+        result = await client._send(method, QUOTE_PATH)
+        await http.aclose()
+        return result, client
+
+    result, client = asyncio.run(main())
+    return result, sent, client
+
+
+def ok(payload: dict | None = None) -> httpx.Response:
+    return httpx.Response(200, json=payload or {"ok": True})
+
+
+def test_get_is_retried_on_5xx() -> None:
+    result, sent, client = send([httpx.Response(503), httpx.Response(502), ok()])
+    assert result == {"ok": True}
+    assert sent == 3
+    assert client.resilience_stats.retries == 2
+
+
+def test_get_gives_up_after_retries() -> None:
+    result, sent, _ = send([httpx.Response(503)] * 3)
+    assert result["status_code"] == 503
+    assert sent == 3
+
+
+def test_get_is_retried_on_network_error() -> None:
+    result, sent, _ = send([httpx.ConnectError("reset"), ok()])
+    assert result == {"ok": True}
+    assert sent == 2
+
+
+def test_client_errors_are_not_retried() -> None:
+    result, sent, _ = send([httpx.Response(404, json={"message": "not found"})])
+    assert result["status_code"] == 404
+    assert result["details"] == {"message": "not found"}
+    assert sent == 1
+
+
+def test_orders_are_sent_once() -> None:
+    result, sent, _ = send([httpx.Response(503), ok()], method="POST")
+    assert result["status_code"] == 503
+    assert sent == 1
+
+
+def test_backoff_is_bounded() -> None:
+    random.seed(0)
+    policy = RetryPolicy(backoff_base=0.1, backoff_cap=0.5)
+    assert all(0 <= policy.delay(attempt) <= min(0.5, 0.1 * 2 ** attempt) for attempt in range(10) for _ in range(20))
+
+
+def fast_p95(client: FinamAPIClient) -> None:
+    for _ in range(client.latency.min_samples):
+        client.latency.record(EndpointClass.QUOTES, 0.01)
+
+
+def test_slow_get_is_hedged() -> None:
+    result, sent, client = send([(1.0, ok({"from": "primary"})), ok({"from": "hedge"})], hedge=True,
+                                prepare=fast_p95)
+    assert result == {"from": "hedge"}
+    assert sent == 2
+    assert (client.resilience_stats.hedges, client.resilience_stats.hedge_wins) == (1, 1)
+
+
+def test_fast_get_is_not_hedged() -> None:
+    result, sent, client = send([ok()], hedge=True, prepare=fast_p95)
+    assert result == {"ok": True}
+    assert sent == 1
+    assert client.resilience_stats.hedges == 0
+
+
+def test_no_hedge_without_latency_history() -> None:
+    result, sent, _ = send([(0.1, ok())], hedge=True)
+    assert result == {"ok": True}
+    assert sent == 1
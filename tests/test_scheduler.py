@@ -0,0 +1,92 @@
+"""Тесты планировщика запросов: приоритеты, лимиты и AIMD"""
+
+import asyncio
+
+from adapters.endpoints import EndpointClass
+from adapters.scheduler import DEFAULT_BUDGETS, RequestScheduler, TokenBucket
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_bucket_waits_for_refill() -> None:
+    clock = FakeClock()
+    bucket = TokenBucket(rate=2, burst=2, clock=clock)
+    bucket.take(0)
+    bucket.take(0)
+    assert bucket.wait_time(0) == 0.5
+    assert bucket.wait_time(0.5) == 0
+
+
+def test_aimd_halves_and_recovers() -> None:
+    clock = FakeClock()
+    bucket = TokenBucket(rate=10, burst=10, clock=clock)
+    bucket.slow_down(retry_after=3)
+    assert bucket.rate == 5
+    assert bucket.wait_time(0) == 3
+    for _ in range(5):
+        bucket.slow_down(None)
+    # Не ниже 5% базовой скорости
+    assert bucket.rate == 0.5
+    for _ in range(100):
+        bucket.recover()
+    assert bucket.rate == 10
+
+
+def test_unlimited_bucket() -> None:
+    bucket = TokenBucket(rate=0, burst=0)
+    bucket.take(0)
+    assert bucket.wait_time(0) == 0
+
+
+def test_budget_is_split_between_workers(monkeypatch) -> None:  # noqa: ANN001
+    monkeypatch.setenv("FINAM_RATE_GLOBAL", "20:40")
+    monkeypatch.setenv("FINAM_MCP_WORKERS", "4")
+    scheduler = RequestScheduler()
+    assert (scheduler.global_bucket.rate, scheduler.global_bucket.burst) == (5, 10)
+    assert RequestScheduler(workers=1).global_bucket.rate == 20
+    # Всплеск не меньше одного запроса
+    assert RequestScheduler(workers=100).buckets[EndpointClass.SESSION].burst == 1
+
+
+def test_waiters_are_served_by_priority(monkeypatch) -> None:  # noqa: ANN001
+    monkeypatch.setenv("FINAM_RATE_GLOBAL", "20:1")
+    for endpoint_class in EndpointClass:
+        monkeypatch.setenv(f"FINAM_RATE_{endpoint_class.name}", "0")
+
+    async def main() -> list[EndpointClass]:
+        scheduler = RequestScheduler(workers=1)
+        await scheduler.acquire(EndpointClass.QUOTES)  # Забирает весь всплеск
+        order: list[EndpointClass] = []
+
+        async def request(endpoint_class: EndpointClass) -> None:
+            await scheduler.acquire(endpoint_class)
+            order.append(endpoint_class)
+
+        await asyncio.gather(*(request(cls) for cls in (
+            EndpointClass.BARS, EndpointClass.REFERENCE, EndpointClass.QUOTES, EndpointClass.ORDERS,
+        )))
+        assert scheduler.stats.queued == 4
+        return order
+
+    assert asyncio.run(main()) == [
+        EndpointClass.ORDERS, EndpointClass.QUOTES, EndpointClass.REFERENCE, EndpointClass.BARS,
+    ]
+
+
+def test_rate_limited_class_does_not_block_others(monkeypatch) -> None:  # noqa: ANN001
+    monkeypatch.setenv("FINAM_RATE_GLOBAL", "0")
+
+    async def main() -> None:
+        scheduler = RequestScheduler(workers=1)
+        scheduler.on_rate_limited(EndpointClass.BARS, retry_after=60)
+        await asyncio.wait_for(scheduler.acquire(EndpointClass.QUOTES), timeout=1)
+        assert scheduler.stats.rate_limited == 1
+        assert scheduler.snapshot()["rates"][EndpointClass.BARS.value] == DEFAULT_BUDGETS[EndpointClass.BARS][0] / 2
+
+    asyncio.run(main())
@@ -0,0 +1,133 @@
+"""Тесты торговых сессий: интервалы расписания, простой вне торгов и перезагрузка расписания"""
+
+import asyncio
+
+import httpx
+import pytest
+from adapters import sessions
+from adapters.bar_store import NS, to_iso
+from adapters.endpoints import EndpointClass
+from adapters.finam_client import FinamAPIClient
+from adapters.sessions import TradingCalendar, trading_intervals
+
+HOUR = 3600 * NS
+T0 = 1_700_000_000 * NS
+
+
+def session(start: int, end: int, kind: str = "CORE_TRADING", status: str = "") -> dict:
+    return {"type": kind, "status": status, "interval": {"start_time": to_iso(start), "end_time": to_iso(end)}}
+
+
+# Две сессии: [T0, T0+8ч) и [T0+24ч, T0+32ч), между ними клиринг
+SCHEDULE = {"sessions": [
+    session(T0 + 24 * HOUR, T0 + 32 * HOUR),
+    session(T0, T0 + 8 * HOUR),
+    session(T0 + 8 * HOUR, T0 + 9 * HOUR, kind="CLEARING"),
+]}
+
+
+@pytest.fixture
+def clock(monkeypatch) -> list[int]:  # noqa: ANN001
+    """Локальное время календаря: clock[0], нс"""
+    now = [T0]
+    monkeypatch.setattr(sessions, "now_ns", lambda: now[0])
+    return now
+
+
+def test_trading_intervals_skip_idle_and_merge() -> None:
+    payload = {"sessions": [
+        *SCHEDULE["sessions"],
+        session(T0 + 7 * HOUR, T0 + 10 * HOUR, kind="EVENING", status="OPEN"),
+        session(T0 + 12 * HOUR, T0 + 13 * HOUR, status="HALT"),
+        {"type": "OPENING", "open_time": to_iso(T0 - HOUR), "close_time": to_iso(T0)},
+        {"type": "BROKEN", "interval": {"start_time": to_iso(T0)}},
+    ]}
+    assert trading_intervals(payload) == [(T0 - HOUR, T0 + 10 * HOUR), (T0 + 24 * HOUR, T0 + 32 * HOUR)]
+    assert trading_intervals({}) == []
+
+
+def test_idle_for_and_stretch(clock: list[int]) -> None:
+    calendar = TradingCalendar(max_idle=3600, schedule_ttl=21600)
+    assert calendar.is_open("SBER@MISX") is None
+    assert calendar.idle_for("SBER@MISX") == 0
+    calendar.set_schedule("SBER@MISX", SCHEDULE)
+
+    assert calendar.is_open("SBER@MISX", T0 + HOUR) is True
+    assert calendar.idle_for("SBER@MISX", T0 + HOUR) == 0
+    assert calendar.idle_for("SBER@MISX", T0 + 20 * HOUR) == 4 * 3600
+    # После конца расписания на него не полагаемся
+    assert calendar.idle_for("SBER@MISX", T0 + 40 * HOUR) == 0
+
+    clock[0] = T0 + 23 * HOUR + 1800 * NS
+    assert calendar.stretch("SBER@MISX", 5) == 1800
+    clock[0] = T0 + 10 * HOUR
+    assert calendar.stretch("SBER@MISX", 5) == 3600  # Не дольше max_idle
+    assert calendar.stretch("SBER@MISX", 0) == 0
+    assert calendar.stretch(None, 5) == 5
+
+
+def test_failed_schedule_is_retried(clock: list[int]) -> None:
+    calendar = TradingCalendar(schedule_ttl=21600)
+    assert calendar.needs_schedule("SBER@MISX")
+    calendar.set_schedule("SBER@MISX", {"error": "503 Service Unavailable"})
+    assert not calendar.needs_schedule("SBER@MISX")
+    assert calendar.is_open("SBER@MISX") is None
+    # Ошибку перезапрашиваем через минуту, а не через schedule_ttl
+    clock[0] += sessions._SCHEDULE_RETRY_NS
+    assert calendar.needs_schedule("SBER@MISX")
+
+    calendar.set_schedule("SBER@MISX", SCHEDULE)
+    clock[0] += sessions._SCHEDULE_RETRY_NS
+    assert not calendar.needs_schedule("SBER@MISX")
+    clock[0] += 21600 * NS
+    assert calendar.needs_schedule("SBER@MISX")
+
+
+def test_schedule_without_sessions_waits_for_ttl(clock: list[int]) -> None:
+    calendar = TradingCalendar(schedule_ttl=21600)
+    calendar.set_schedule("SBER@MISX", {"sessions": []})
+    clock[0] += 3600 * NS
+    assert not calendar.needs_schedule("SBER@MISX")
+
+
+def test_ended_schedule_is_reloaded(clock: list[int]) -> None:
+    calendar = TradingCalendar(schedule_ttl=21600)
+    calendar.set_schedule("SBER@MISX", {"sessions": [session(T0, T0 + 10 * NS)]})
+    clock[0] += 10 * NS
+    assert not calendar.needs_schedule("SBER@MISX")
+    clock[0] += sessions._SCHEDULE_RETRY_NS
+    assert calendar.needs_schedule("SBER@MISX")
+
+
+def test_client_stretches_ttl_after_background_load(monkeypatch) -> None:  # noqa: ANN001
+    monkeypatch.setenv("FINAM_RATE_GLOBAL", "0")
+    for endpoint_class in EndpointClass:
+        monkeypatch.setenv(f"FINAM_RATE_{endpoint_class.name}", "0")
+    now = sessions.now_ns()
+    schedule_calls = 0
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        nonlocal schedule_calls
+        if request.url.path == "/v1/assets/clock":
+            return httpx.Response(200, json={"timestamp": to_iso(sessions.now_ns())})
+        schedule_calls += 1
+        if schedule_calls == 1:
+            return httpx.Response(404, json={"message": "not found"})
+        return httpx.Response(200, json={"sessions": [session(now + HOUR, now + 2 * HOUR)]})
+
+    async def main() -> list[float]:
+        http = httpx.AsyncClient(base_url="https://api.test", transport=httpx.MockTransport(handler))
+        client = FinamAPIClient(access_token="t", http=http)
+        client.calendar = TradingCalendar(max_idle=900)
+        stretched = []
+        for _ in range(2):
+            # Пока расписание загружается в фоне (или не загрузилось), возвращается base
+            stretched.append(client.stretch_for_session("SBER@MISX", 5))
+            await asyncio.gather(*client._background.values())
+            stretched.append(client.stretch_for_session("SBER@MISX", 5))
+            client.calendar._schedules["SBER@MISX"].loaded_ns -= sessions._SCHEDULE_RETRY_NS
+        await http.aclose()
+        return stretched
+
+    assert asyncio.run(main()) == [5, 5, 5, 900]
+    assert schedule_calls == 2
@@ -0,0 +1,113 @@
+"""Тесты подписок на ресурсы: потоки арендаторов и один опрос на поток"""
+
+import asyncio
+import contextlib
+from collections.abc import AsyncIterator
+from typing import Any
+
+from adapters.backplane import MemoryBackplane
+from adapters.registry import tenant_id
+from adapters.streaming import ApiFeed, FakeFeed, StreamKind, SubscriptionHub, parse_uri, resource_uri
+
+URI = resource_uri(StreamKind.QUOTE, "SBER@MISX")
+
+
+class Session:
+    def __init__(self) -> None:
+        self.updates: list[str] = []
+
+    async def send_resource_updated(self, uri: Any) -> None:  # noqa: ANN401
+        self.updates.append(str(uri))
+
+
+class TokenFeed:
+    """Источник, запоминающий, с каким токеном его опрашивали"""
+
+    def __init__(self, token: str, polls: list[str]) -> None:
+        self.token = token
+        self.polls = polls
+
+    async def fetch(self, kind: StreamKind, symbol: str) -> dict[str, Any]:
+        self.polls.append(self.token)
+        return {"symbol": symbol, "kind": kind.value, "token": self.token, "n": len(self.polls)}
+
+    def interval(self, _symbol: str, base: float) -> float:
+        return base
+
+
+def test_parse_uri() -> None:
+    assert parse_uri("finam://orderbook/SBER@MISX") == (StreamKind.ORDERBOOK, "SBER@MISX")
+
+
+def test_streams_are_polled_with_subscriber_token() -> None:
+    polls: list[str] = []
+
+    async def main() -> tuple[Session, Session, Session, SubscriptionHub]:
+        backplane = MemoryBackplane()
+        hub = SubscriptionHub(lambda token: TokenFeed(token, polls), interval=0.01, backplane=backplane)
+        a1, a2, b = Session(), Session(), Session()
+        await hub.subscribe(URI, a1, "token-a")
+        await hub.subscribe(URI, a2, "token-a")
+        await hub.subscribe(URI, b, "token-b")
+        await asyncio.sleep(0.05)
+        assert (await hub.read(URI, "token-b"))["token"] == "token-b"
+        # Сырые токены не попадают в имена каналов и аренд backplane
+        assert not any("token-" in channel for channel in backplane._channels)
+        snapshot = hub.snapshot()
+        await hub.aclose()
+        assert snapshot["streams"] == sorted(f"{tenant_id(t)}:{URI}" for t in ("token-a", "token-b"))
+        return a1, a2, b, hub
+
+    a1, a2, b, hub = asyncio.run(main())
+    assert set(polls) == {"token-a", "token-b"}
+    assert a1.updates and a1.updates == a2.updates
+    assert b.updates
+    assert hub.stats.errors == 0
+
+
+def test_unsubscribe_stops_poll() -> None:
+    polls: list[str] = []
+
+    async def main() -> int:
+        hub = SubscriptionHub(lambda token: TokenFeed(token, polls), interval=0.01)
+        session = Session()
+        await hub.subscribe(URI, session, "t")
+        await asyncio.sleep(0.03)
+        await hub.unsubscribe(URI, session)
+        stopped_at = len(polls)
+        await asyncio.sleep(0.03)
+        assert hub.snapshot()["streams"] == []
+        return len(polls) - stopped_at
+
+    assert asyncio.run(main()) == 0
+
+
+class LeaseRegistry:
+    """Реестр с клиентом-заглушкой: запоминает токены, для которых брали клиента"""
+
+    def __init__(self) -> None:
+        self.leases: list[str] = []
+
+    @contextlib.asynccontextmanager
+    async def lease(self, token: str) -> AsyncIterator[Any]:
+        self.leases.append(token)
+        yield self
+
+    async def get_quote(self, symbol: str) -> dict[str, Any]:
+        return {"symbol": symbol}
+
+
+def test_api_feed_uses_tenant_client() -> None:
+    registry = LeaseRegistry()
+    feed = ApiFeed(registry, "tenant-token")
+    assert asyncio.run(feed.fetch(StreamKind.QUOTE, "SBER@MISX")) == {"symbol": "SBER@MISX"}
+    assert registry.leases == ["tenant-token"]
+
+
+def test_fake_feed_formats() -> None:
+    feed = FakeFeed(seed=1)
+    quote = asyncio.run(feed.fetch(StreamKind.QUOTE, "X"))
+    book = asyncio.run(feed.fetch(StreamKind.ORDERBOOK, "X"))
+    assert float(quote["quote"]["bid"]) < float(quote["quote"]["ask"])
+    assert len(book["orderbook"]["rows"]) == 20
+    assert feed.interval("X", 2.0) == 2.0
@@ -0,0 +1,108 @@
+"""Тесты индекса инструментов resolve_symbol"""
+
+import asyncio
+
+import httpx
+import pytest
+from adapters.endpoints import EndpointClass
+from adapters.finam_client import FinamAPIClient
+from adapters.symbols import SymbolCatalog, SymbolIndex, normalize, translit
+
+ASSETS = [
+    {"symbol": "SBER@MISX", "ticker": "SBER", "mic": "MISX", "isin": "RU0009029540", "name": "Сбербанк России ПАО ао",
+     "type": "EQUITIES"},
+    {"symbol": "SBERP@MISX", "ticker": "SBERP", "mic": "MISX", "isin": "RU0009029557", "name": "Сбербанк России ПАО ап",
+     "type": "EQUITIES"},
+    {"symbol": "SBER@RUSX", "ticker": "SBER", "mic": "RUSX", "name": "Сбербанк России", "type": "EQUITIES"},
+    {"symbol": "GMKN@MISX", "ticker": "GMKN", "mic": "MISX", "name": "ГМК Норильский никель ПАО ао",
+     "type": "EQUITIES"},
+    {"symbol": "GAZP@MISX", "ticker": "GAZP", "mic": "MISX", "name": "Газпром ПАО ао", "type": "EQUITIES"},
+]
+
+
+def index() -> SymbolIndex:
+    idx = SymbolIndex()
+    idx.update(ASSETS)
+    return idx
+
+
+def test_normalize_and_translit() -> None:
+    assert normalize("ПАО «Газпром»") == "газпром"
+    assert translit("сбербанк") == "sberbank"
+
+
+def test_exact_ticker_isin_and_alias() -> None:
+    idx = index()
+    top = idx.resolve("sber")[0]
+    assert (top["symbol"], top["match"], top["score"]) == ("SBER@MISX", "exact", 1.0)
+    assert idx.resolve("RU0009029557")[0]["symbol"] == "SBERP@MISX"
+    assert idx.resolve("Норникель")[0]["symbol"] == "GMKN@MISX"
+
+
+def test_preferred_mic_and_mic_filter() -> None:
+    idx = index()
+    assert [m["symbol"] for m in idx.resolve("SBER", limit=2)] == ["SBER@MISX", "SBER@RUSX"]
+    assert [m["symbol"] for m in idx.resolve("SBER", mic="rusx")] == ["SBER@RUSX"]
+
+
+def test_prefix_and_transliterated_prefix() -> None:
+    idx = index()
+    matches = idx.resolve("газпр")
+    assert matches[0]["symbol"] == "GAZP@MISX"
+    assert matches[0]["match"] == "prefix"
+    assert idx.resolve("norilsk")[0]["symbol"] == "GMKN@MISX"
+
+
+def test_fuzzy_only_without_better_matches() -> None:
+    idx = index()
+    matches = idx.resolve("сбербнак")
+    assert matches[0]["match"] == "fuzzy"
+    assert matches[0]["ticker"].startswith("SBER")
+    assert idx.resolve("???") == []
+
+
+def test_incremental_update_matches_rebuild() -> None:
+    idx = SymbolIndex(rebuild_ratio=10)  # Только точечные правки
+    idx.update(ASSETS)
+    changed = [*ASSETS[1:], {"symbol": "YDEX@MISX", "ticker": "YDEX", "mic": "MISX", "name": "Яндекс"}]
+    assert idx.update(changed) == (1, 1)
+    fresh = SymbolIndex()
+    fresh.update(changed)
+    for query in ("sber", "яндекс", "газп", "норильский"):
+        assert idx.resolve(query) == fresh.resolve(query)
+
+
+@pytest.fixture
+def unlimited_rates(monkeypatch) -> None:  # noqa: ANN001
+    monkeypatch.setenv("FINAM_RATE_GLOBAL", "0")
+    for endpoint_class in EndpointClass:
+        monkeypatch.setenv(f"FINAM_RATE_{endpoint_class.name}", "0")
+
+
+@pytest.mark.usefixtures("unlimited_rates")
+def test_catalog_is_shared_by_tenants() -> None:
+    tokens: list[str] = []
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        tokens.append(request.headers.get("authorization", ""))
+        await asyncio.sleep(0.01)
+        if request.headers.get("authorization") == "expired":
+            return httpx.Response(401, json={"message": "unauthenticated"})
+        return httpx.Response(200, json={"assets": ASSETS})
+
+    async def main() -> None:
+        http = httpx.AsyncClient(base_url="https://api.test", transport=httpx.MockTransport(handler))
+        catalog = SymbolCatalog(refresh_interval=0)
+        expired, first, second = (FinamAPIClient(access_token=token, http=http, symbols=catalog)
+                                  for token in ("expired", "first", "second"))
+        # Токен не подошёл, индекс пуст — ошибка, а следующий поиск загружает снимок заново
+        assert "error" in await expired.resolve_symbol("sber")
+        results = await asyncio.gather(first.resolve_symbol("sber"), second.resolve_symbol("газпром"))
+        assert [r[0]["symbol"] for r in results] == ["SBER@MISX", "GAZP@MISX"]
+        # Загруженный индекс общий: повторных запросов /v1/assets нет ни у одного арендатора
+        assert (await expired.resolve_symbol("gmkn"))[0]["symbol"] == "GMKN@MISX"
+        await catalog.aclose()
+        await http.aclose()
+
+    asyncio.run(main())
+    assert tokens == ["expired", "first"]
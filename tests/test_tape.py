@@ -0,0 +1,69 @@
+"""Тесты накопленной ленты сделок"""
+
+import random
+
+import pytest
+from adapters.bar_store import NS, to_iso
+from adapters.tape import TradeTape
+
+
+def trade(trade_id: int, second: int, price: float, size: float = 1, side: str = "SIDE_BUY") -> dict:
+    return {"trade_id": trade_id, "timestamp": to_iso(1_700_000_000 * NS + second * NS), "price": str(price),
+            "size": str(size), "side": side}
+
+
+def test_overlapping_polls_are_merged_by_id() -> None:
+    tape = TradeTape("X")
+    assert tape.merge([trade(1, 0, 10), trade(2, 1, 11)]) == 2
+    assert tape.merge([trade(2, 1, 11), trade(3, 2, 12, side="SIDE_SELL")]) == 1
+    assert len(tape) == 3
+    assert tape.duplicates == 1
+    flow = tape.flow()
+    assert flow["volume"] == 3
+    assert flow["vwap"] == pytest.approx(11)
+    assert (flow["buy_volume"], flow["sell_volume"]) == (2, 1)
+    assert flow["imbalance"] == pytest.approx(1 / 3)
+
+
+def test_eviction_keeps_sums_of_buffer() -> None:
+    tape = TradeTape("X", capacity=3)
+    tape.merge([trade(i, i, 10 + i, size=i + 1) for i in range(5)])
+    assert len(tape) == 3
+    trades = tape.trades()
+    assert list(trades["price"]) == [12, 13, 14]
+    assert tape.volume == pytest.approx(trades["size"].sum())
+    assert tape.notional == pytest.approx((trades["price"] * trades["size"]).sum())
+    # Вытесненный trade_id снова считается новым
+    assert tape.merge([trade(0, 0, 10)]) == 1
+
+
+def test_sums_do_not_drift_over_long_polling() -> None:
+    rng = random.Random(0)
+    tape = TradeTape("X", capacity=100)
+    for batch in range(200):
+        tape.merge([trade(batch * 50 + i, batch * 50 + i, rng.uniform(1, 1e4), rng.uniform(1e-3, 1e3),
+                          rng.choice(["buy", "sell"])) for i in range(50)])
+    trades = tape.trades()
+    size = trades["size"]
+    assert tape.volume == pytest.approx(size.sum(), rel=1e-12)
+    assert tape.notional == pytest.approx((trades["price"] * size).sum(), rel=1e-12)
+    assert tape.buy_volume == pytest.approx(size[trades["side"] == 1].sum(), rel=1e-12)
+
+
+def test_last_price_is_latest_by_timestamp() -> None:
+    tape = TradeTape("X")
+    tape.merge([trade(2, 10, 20)])
+    # Опоздавшая сделка из более раннего времени пришла следующим опросом
+    tape.merge([trade(1, 5, 15)])
+    flow = tape.flow()
+    assert flow["last_price"] == 20
+    assert flow["last_timestamp"] == to_iso(1_700_000_010 * NS)
+
+
+def test_window_and_buckets() -> None:
+    tape = TradeTape("X")
+    tape.merge([trade(1, 0, 10, 1), trade(2, 61, 20, 2), trade(3, 90, 30, 3, "SIDE_SELL")])
+    flow = tape.flow(window_s=30, bucket_s=60)
+    assert flow["trades"] == 2
+    assert flow["volume"] == 5
+    assert [b["volume"] for b in tape.flow(bucket_s=60)["buckets"]] == [1, 5]
@@ -0,0 +1,81 @@
+"""Тесты общего модуля трассировки агента и сервера"""
+
+import asyncio
+import json
+from decimal import Decimal
+
+from finam_tracing import (
+    TRACEPARENT,
+    FileExporter,
+    Span,
+    Tracer,
+    annotate,
+    detached,
+    inject,
+    parse_traceparent,
+    waterfall,
+)
+
+
+class Collect:
+    def __init__(self) -> None:
+        self.traces: list[list[Span]] = []
+
+    def export(self, spans: list[Span]) -> None:
+        self.traces.append(spans)
+
+
+def test_spans_nest_across_await_and_export_once() -> None:
+    exporter = Collect()
+    tracer = Tracer("mcp", [exporter])
+
+    async def child(name: str) -> None:
+        with tracer.span(name):
+            annotate(cache="hit")
+            await asyncio.sleep(0)
+
+    async def main() -> None:
+        with tracer.span("tool", root=True):
+            await asyncio.gather(child("a"), child("b"))
+
+    asyncio.run(main())
+    [spans] = exporter.traces
+    root = next(s for s in spans if s.name == "tool")
+    assert {s.name for s in spans} == {"tool", "a", "b"}
+    assert all(s.parent_id == root.span_id for s in spans if s is not root)
+    assert all(s.attributes == {"cache": "hit"} for s in spans if s is not root)
+
+
+def test_traceparent_continues_remote_trace() -> None:
+    agent, server = Collect(), Collect()
+    agent_tracer, server_tracer = Tracer("agent", [agent]), Tracer("mcp", [server])
+    with agent_tracer.span("request", root=True) as parent:
+        headers = inject({"accept": "application/json"})
+    assert headers[TRACEPARENT] == parent.traceparent
+    assert parse_traceparent(headers[TRACEPARENT]) == (parent.trace_id, parent.span_id, True)
+    with server_tracer.span("tool", headers[TRACEPARENT]) as span:
+        assert (span.trace_id, span.parent_id) == (parent.trace_id, parent.span_id)
+    assert parse_traceparent("00-bad") is None
+    assert "agent" in waterfall([s.as_dict() for s in agent.traces[0] + server.traces[0]])
+
+
+def test_disabled_unsampled_and_detached() -> None:
+    assert inject() == {}
+    with Tracer("mcp").span("x", root=True) as span:
+        assert span is None
+    exporter = Collect()
+    tracer = Tracer("mcp", [exporter], sample_rate=0.0)
+    with tracer.span("x", root=True), tracer.span("y"):
+        pass
+    assert exporter.traces == []
+    with Tracer("mcp", [exporter]).span("x", root=True):
+        assert detached().run(inject) == {}
+
+
+def test_file_exporter_writes_json_lines(tmp_path) -> None:  # noqa: ANN001
+    path = tmp_path / "traces" / "spans.jsonl"
+    tracer = Tracer("mcp", [FileExporter(str(path))])
+    with tracer.span("tool", root=True, price=Decimal("1.5")):
+        pass
+    [line] = path.read_text().splitlines()
+    assert json.loads(line)["attributes"] == {"price": "1.5"}